@@ -1,9 +1,31 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import threading
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk
+from infrastructure.table_service import TableService
+from app.tree_helpers import bulk_insert
+
+try:
+    from tkthread import TkThread
+except ImportError:  # Optional: fall back to Tk's after() queue
+    TkThread = None
 
 class MainWindow:
+    # Max items per Listbox.insert call (bounds the Tcl argv size)
+    LISTBOX_INSERT_CHUNK = 5000
+    # Rows shown in the table preview and extra rows rendered beyond the viewport
+    PREVIEW_ROW_LIMIT = 50
+    PREVIEW_ROW_BUFFER = 20
+    # Upper bound on concurrent table fetches when analyzing
+    MAX_FETCH_WORKERS = 8
+    # Worker threads kept alive for refresh/preview/analyze requests
+    MAX_BACKGROUND_WORKERS = 2
+    # Previews wider than this are drawn on a Canvas instead of a Treeview
+    # (rows are capped at PREVIEW_ROW_LIMIT, so only the width can trigger it)
+    CANVAS_PREVIEW_MIN_COLUMNS = 20
+    CANVAS_ROW_HEIGHT = 20
+    CANVAS_COLUMN_WIDTH = 120
+
     def __init__(self, db_service, on_analyze_callback):
         self.db_service = db_service
         self.on_analyze_callback = on_analyze_callback
@@ -11,9 +33,18 @@ class MainWindow:
         self.table_vars = {}
         self.sort_var = tk.BooleanVar(value=True)
         self.loading = False
+        self._table_service = TableService()
+        self._use_canvas_preview = True
+        self.tkt = None
+        self._worker = None
+        # Bumped on every preview/refresh so stale preview results are dropped
+        self._preview_gen = 0
+        # Table names currently shown in the listbox
+        self._last_tables = ()
         
     def show(self):
         self.window = tk.Tk()
+        self.tkt = TkThread(self.window) if TkThread else None
         self.window.title("Production Cycle Analyzer - Main Panel")
         self.window.geometry("650x550")
         
@@ -82,24 +113,35 @@ class MainWindow:
                                    bg="blue", fg="white", state=tk.DISABLED)
         self.analyze_btn.pack(side='left', padx=5)
         
+        # Long-lived worker threads for UI-triggered DB work (no thread start-up per click)
+        self._worker = ThreadPoolExecutor(max_workers=self.MAX_BACKGROUND_WORKERS,
+                                          thread_name_prefix="main-window")
+        
         self.window.mainloop()
+        self._worker.shutdown(wait=False)
     
     def start_loading_tables(self):
-        """Start loading tables in a separate thread to avoid freezing"""
+        """Start loading tables on a worker thread to avoid freezing"""
         if self.loading:
             return
             
         self.loading = True
+        self._preview_gen += 1
         self.refresh_btn.config(state=tk.DISABLED)
         self.preview_btn.config(state=tk.DISABLED)
         self.analyze_btn.config(state=tk.DISABLED)
         self.status_label.config(text="Loading tables...", fg="blue")
         self.progress.start()
         
-        # Run in separate thread to avoid freezing the UI
-        thread = threading.Thread(target=self.load_tables_with_timestring_thread)
-        thread.daemon = True
-        thread.start()
+        # Run on the worker pool to avoid freezing the UI
+        self._worker.submit(self.load_tables_with_timestring_thread)
+    
+    def _run_on_ui(self, callback, *args):
+        """Marshal a callback from a worker thread onto the Tk main thread"""
+        if self.tkt is not None:
+            self.tkt.nosync(callback, *args)
+        else:
+            self.window.after(0, callback, *args)
     
     def load_tables_with_timestring_thread(self):
         """Thread function to load tables"""
@@ -108,32 +150,60 @@ class MainWindow:
             valid_tables = self.db_service.get_tables_with_timestring()
             
             # Update UI in the main thread
-            self.window.after(0, self.update_table_list, valid_tables)
+            self._run_on_ui(self.update_table_list, valid_tables)
             
         except Exception as e:
             error_msg = f"Error loading tables: {str(e)}"
-            self.window.after(0, self.show_error, error_msg)
+            self._run_on_ui(self.show_error, error_msg)
     
     def update_table_list(self, valid_tables):
         """Update the UI with the loaded tables"""
-        self.listbox.delete(0, tk.END)
+        self.progress.stop()
+        new_tables = tuple(valid_tables)
         
-        if valid_tables:
-            for table in valid_tables:
-                self.listbox.insert(tk.END, table)
+        if new_tables:
+            # Only touch the listbox when the table list actually changed
+            if new_tables != self._last_tables:
+                self._sync_listbox(new_tables)
             
             status_text = f"Found {len(valid_tables)} tables with TimeString column"
             self.status_label.config(text=status_text, fg="green")
             self.preview_btn.config(state=tk.NORMAL)
             self.analyze_btn.config(state=tk.NORMAL)
         else:
+            self.listbox.delete(0, tk.END)
             self.listbox.insert(tk.END, "No tables with TimeString column found")
             self.listbox.config(state=tk.DISABLED)
             self.status_label.config(text="No tables with TimeString found", fg="red")
         
+        self._last_tables = new_tables
         self.loading = False
         self.refresh_btn.config(state=tk.NORMAL)
-        self.progress.stop()
+    
+    def _sync_listbox(self, new_tables):
+        """Apply only the delta between the displayed and the new table list"""
+        old_tables = self._last_tables
+        old_set, new_set = set(old_tables), set(new_tables)
+        kept_in_order = [t for t in old_tables if t in new_set] == [t for t in new_tables if t in old_set]
+        
+        if not old_tables or not kept_in_order:
+            # Nothing reusable on screen (or the order changed): rebuild in batches,
+            # one Tcl call per chunk instead of one per table
+            self.listbox.config(state=tk.NORMAL)
+            self.listbox.delete(0, tk.END)
+            for start in range(0, len(new_tables), self.LISTBOX_INSERT_CHUNK):
+                self.listbox.insert(tk.END, *new_tables[start:start + self.LISTBOX_INSERT_CHUNK])
+            return
+        
+        # Delete removed tables from the bottom up so indices stay valid
+        for index in reversed(range(len(old_tables))):
+            if old_tables[index] not in new_set:
+                self.listbox.delete(index)
+        
+        # Insert added tables at their position in the new list
+        for index, table in enumerate(new_tables):
+            if table not in old_set:
+                self.listbox.insert(index, table)
     
     def show_error(self, error_msg):
         """Show error message"""
@@ -160,33 +230,50 @@ class MainWindow:
         self.progress.start()
         self.preview_btn.config(state=tk.DISABLED)
         
-        # Run preview in separate thread
-        thread = threading.Thread(target=self.preview_table_thread, args=(table_name,))
-        thread.daemon = True
-        thread.start()
+        # Newer requests supersede in-flight ones
+        self._preview_gen += 1
+        
+        # Run preview on the worker pool
+        self._worker.submit(self.preview_table_thread, table_name, self.sort_var.get(), self._preview_gen)
     
-    def preview_table_thread(self, table_name):
+    def _get_df(self, table_name, sort):
+        """Fetch (and optionally sort) a whole table; not cached, so the window holds no table between analyses"""
+        if sort:
+            return self.db_service.fetch_and_sort_table_data(table_name)
+        return self.db_service.fetch_table_data(table_name)
+    
+    def _if_current_preview(self, gen, callback, *args):
+        """Run a preview UI callback only if no newer preview/refresh was started"""
+        if gen == self._preview_gen:
+            callback(*args)
+    
+    def preview_table_thread(self, table_name, sort, gen):
         """Thread function to preview table"""
         try:
-            # Fetch and optionally sort the table
-            if self.sort_var.get():
-                df = self.db_service.fetch_and_sort_table_data(table_name)
-                title_suffix = " (Sorted)"
-            else:
-                df = self.db_service.fetch_table_data(table_name)
-                title_suffix = " (Original)"
+            # Pull only the preview rows, never the whole table
+            df = self.db_service.fetch_table_preview(table_name, self.PREVIEW_ROW_LIMIT, sort)
+            title_suffix = " (Sorted)" if sort else " (Original)"
             
             if df is None:
-                self.window.after(0, lambda: messagebox.showerror("Error", f"Could not load table '{table_name}'"))
+                self._run_on_ui(self._if_current_preview, gen,
+                                messagebox.showerror, "Error", f"Could not load table '{table_name}'")
             else:
+                # Parse/verify TimeString and format rows here so the main thread only builds widgets
+                conversion_info = None
+                if 'TimeString' in df.columns:
+                    conversion_info = self._table_service.verify_datetime_conversion(df)
+                rows = self._format_preview_rows(df.head(self.PREVIEW_ROW_LIMIT))
+                
                 # Show preview window in main thread
-                self.window.after(0, self.show_table_preview, df, f"Preview: {table_name}{title_suffix}")
+                self._run_on_ui(self._if_current_preview, gen,
+                                self.show_table_preview, df, f"Preview: {table_name}{title_suffix}",
+                                conversion_info, rows)
                 
         except Exception as e:
             error_msg = f"Error previewing table: {str(e)}"
-            self.window.after(0, lambda: messagebox.showerror("Error", error_msg))
+            self._run_on_ui(self._if_current_preview, gen, messagebox.showerror, "Error", error_msg)
         finally:
-            self.window.after(0, self.end_preview_loading)
+            self._run_on_ui(self._if_current_preview, gen, self.end_preview_loading)
     
     def end_preview_loading(self):
         """End the preview loading state"""
@@ -194,7 +281,7 @@ class MainWindow:
         self.preview_btn.config(state=tk.NORMAL)
         self.status_label.config(text="Ready", fg="green")
     
-    def show_table_preview(self, df, title):
+    def show_table_preview(self, df, title, conversion_info=None, rows=None):
         """Show a preview of the table data with datetime info"""
         preview = tk.Toplevel(self.window)
         preview.title(title)
@@ -204,11 +291,7 @@ class MainWindow:
                 font=("Arial", 12, "bold")).pack(pady=10)
         
         # Show datetime conversion info
-        if 'TimeString' in df.columns:
-            from infrastructure.table_service import TableService
-            ts = TableService()
-            conversion_info = ts.verify_datetime_conversion(df)
-            
+        if conversion_info is not None:
             info_text = f"Datetime conversion: {'✅ SUCCESS' if conversion_info['success'] else '❌ FAILED'}\n"
             info_text += f"Valid dates: {conversion_info['valid_count']}, Invalid: {conversion_info['invalid_count']}\n"
             if conversion_info['success']:
@@ -218,30 +301,134 @@ class MainWindow:
                                 fg="green" if conversion_info['success'] else "red")
             info_label.pack(pady=5)
         
-        # Create treeview for preview
         columns = list(df.columns)
-        tree_frame = ttk.Frame(preview)
+        if rows is None:
+            rows = self._format_preview_rows(df.head(self.PREVIEW_ROW_LIMIT))
+        
+        # Wide previews are drawn on a canvas; narrow ones use a Treeview
+        if self._use_canvas_preview and len(columns) > self.CANVAS_PREVIEW_MIN_COLUMNS:
+            self._build_canvas_grid(preview, columns, rows)
+        else:
+            self._build_preview_tree(preview, columns, rows)
+        
+        tk.Button(preview, text="Close", command=preview.destroy).pack(pady=10)
+    
+    def _build_preview_tree(self, parent, columns, rows):
+        """Create the preview Treeview and fill it lazily"""
+        tree_frame = ttk.Frame(parent)
         tree_frame.pack(fill='both', expand=True, padx=20, pady=10)
         
-        tree = ttk.Treeview(tree_frame, columns=columns, show='headings', height=15)
+        tree = ttk.Treeview(tree_frame, columns=columns, displaycolumns=columns,
+                            show='headings', height=15)
         
+        # Bind the methods once: wide tables configure hundreds of columns
+        heading = tree.heading
+        column = tree.column
         for col in columns:
-            tree.heading(col, text=col)
-            tree.column(col, width=120)
+            heading(col, text=col)
+            column(col, width=120)
         
         # Add scrollbar
         scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        # Add data to treeview (first 50 rows)
-        for _, row in df.head(50).iterrows():
-            tree.insert("", "end", values=tuple(row))
-        
-        tk.Button(preview, text="Close", command=preview.destroy).pack(pady=10)
+        # Add data to treeview, rendered lazily while scrolling
+        self._attach_lazy_rows(tree, scrollbar, rows)
+    
+    def _build_canvas_grid(self, parent, columns, rows):
+        """Draw the preview as text on a Canvas, rendering only the visible cells"""
+        row_height = self.CANVAS_ROW_HEIGHT
+        col_width = self.CANVAS_COLUMN_WIDTH
+        max_chars = col_width // 8
+        
+        grid_frame = ttk.Frame(parent)
+        grid_frame.pack(fill='both', expand=True, padx=20, pady=10)
+        
+        canvas = tk.Canvas(grid_frame, background="white", highlightthickness=0,
+                           yscrollincrement=row_height)
+        v_scrollbar = ttk.Scrollbar(grid_frame, orient=tk.VERTICAL)
+        h_scrollbar = ttk.Scrollbar(grid_frame, orient=tk.HORIZONTAL)
+        v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # Header row + data rows
+        canvas.configure(scrollregion=(0, 0, len(columns) * col_width, (len(rows) + 1) * row_height),
+                         xscrollcommand=h_scrollbar.set, yscrollcommand=v_scrollbar.set)
+        
+        def clip(value):
+            value = str(value)
+            return value if len(value) <= max_chars else value[:max_chars - 1] + "…"
+        
+        def redraw(event=None):
+            canvas.delete('cell')
+            left, top = canvas.canvasx(0), canvas.canvasy(0)
+            right, bottom = left + canvas.winfo_width(), top + canvas.winfo_height()
+            first_col = max(int(left // col_width), 0)
+            last_col = min(int(right // col_width) + 1, len(columns))
+            first_row = max(int(top // row_height) - 1, 0)
+            last_row = min(int(bottom // row_height), len(rows))
+            
+            for r in range(first_row, last_row):
+                y = (r + 1) * row_height + 2
+                row = rows[r]
+                for c in range(first_col, last_col):
+                    canvas.create_text(c * col_width + 4, y, text=clip(row[c]),
+                                       anchor='nw', font=("Arial", 9), tags='cell')
+            
+            # Header stays pinned to the top of the viewport
+            canvas.create_rectangle(left, top, right, top + row_height,
+                                    fill="#e8e8e8", outline="", tags='cell')
+            for c in range(first_col, last_col):
+                canvas.create_text(c * col_width + 4, top + 2, text=clip(columns[c]),
+                                   anchor='nw', font=("Arial", 9, "bold"), tags='cell')
+        
+        def xview(*args):
+            canvas.xview(*args)
+            redraw()
+        
+        def yview(*args):
+            canvas.yview(*args)
+            redraw()
+        
+        def on_mousewheel(event):
+            yview('scroll', int(-event.delta / 120) or (-1 if event.delta > 0 else 1), 'units')
+        
+        h_scrollbar.configure(command=xview)
+        v_scrollbar.configure(command=yview)
+        canvas.bind('<Configure>', redraw)
+        canvas.bind('<MouseWheel>', on_mousewheel)
+    
+    @staticmethod
+    def _format_preview_rows(df):
+        """Stringify preview rows up front so Tk does no per-cell conversion"""
+        # itertuples yields plain tuples, avoiding the per-row Series boxing of iterrows
+        return list(df.astype(str).itertuples(index=False, name=None))
+    
+    def _attach_lazy_rows(self, tree, scrollbar, rows):
+        """Insert only the visible rows and materialize more as the view nears the end"""
+        chunk_size = int(tree.cget('height')) + self.PREVIEW_ROW_BUFFER
+        materialized = 0
+        
+        def materialize_next():
+            nonlocal materialized
+            stop = min(materialized + chunk_size, len(rows))
+            bulk_insert(tree, rows[materialized:stop])
+            materialized = stop
+        
+        def on_yview(first, last):
+            scrollbar.set(first, last)
+            if materialized < len(rows) and float(last) >= 0.9:
+                materialize_next()
+        
+        tree.configure(yscrollcommand=on_yview)
+        materialize_next()
     
     def analyze_tables(self):
+        if self.loading:
+            return
+        
         selected_indices = self.listbox.curselection()
         selected_tables = [self.listbox.get(i) for i in selected_indices]
         
@@ -249,19 +436,58 @@ class MainWindow:
             messagebox.showwarning("Selection Error", "Please select at least one valid table")
             return
         
-        # Fetch table data with optional sorting
-        table_data = {}
-        for table in selected_tables:
-            if self.sort_var.get():
-                # Use sorted data
-                df = self.db_service.fetch_and_sort_table_data(table)
-            else:
-                # Use original data
-                df = self.db_service.fetch_table_data(table)
+        # Show loading while the tables are fetched
+        self.loading = True
+        self.refresh_btn.config(state=tk.DISABLED)
+        self.preview_btn.config(state=tk.DISABLED)
+        self.analyze_btn.config(state=tk.DISABLED)
+        self.status_label.config(text=f"Loading {len(selected_tables)} tables...", fg="blue")
+        self.progress.start()
+        
+        # Run fetches on the worker pool to avoid freezing the UI
+        self._worker.submit(self.analyze_tables_thread, selected_tables, self.sort_var.get())
+    
+    def analyze_tables_thread(self, selected_tables, sort):
+        """Thread function to fetch the selected tables concurrently"""
+        try:
+            # DB fetches (with optional sorting) are I/O bound, so run them side by side
+            max_workers = min(self.MAX_FETCH_WORKERS, len(selected_tables))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                frames = executor.map(self._get_df, selected_tables, [sort] * len(selected_tables))
+                fetched = dict(zip(selected_tables, frames))
             
-            if df is not None and any(col.lower() == 'timestring' for col in df.columns):
+            self._run_on_ui(self.finish_analyze_tables, fetched, sort)
+            
+        except Exception as e:
+            error_msg = f"Error loading tables: {str(e)}"
+            self._run_on_ui(self.end_analyze_loading)
+            self._run_on_ui(self.show_error, error_msg)
+    
+    def end_analyze_loading(self):
+        """End the analyze loading state"""
+        self.loading = False
+        self.progress.stop()
+        self.refresh_btn.config(state=tk.NORMAL)
+        self.preview_btn.config(state=tk.NORMAL)
+        self.analyze_btn.config(state=tk.NORMAL)
+        self.status_label.config(text="Ready", fg="green")
+    
+    @staticmethod
+    def _has_timestring(df):
+        """Check for a TimeString column, exact match first, then case-insensitive"""
+        if 'TimeString' in df.columns:
+            return True
+        return 'timestring' in {str(col).lower() for col in df.columns}
+    
+    def finish_analyze_tables(self, fetched, sort):
+        """Validate the fetched tables and hand them over for analysis"""
+        self.end_analyze_loading()
+        
+        table_data = {}
+        for table, df in fetched.items():
+            if df is not None and self._has_timestring(df):
                 table_data[table] = df
-                status = "sorted" if self.sort_var.get() else "original"
+                status = "sorted" if sort else "original"
                 print(f"Loaded {table} ({status})")
             else:
                 messagebox.showwarning("Data Error", 
@@ -271,4 +497,4 @@ class MainWindow:
             self.window.destroy()
             self.on_analyze_callback(table_data)
         else:
-            messagebox.showerror("Error", "No valid table data could be loaded for analysis")
\ No newline at end of file
+            messagebox.showerror("Error", "No valid table data could be loaded for analysis")
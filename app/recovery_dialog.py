@@ -0,0 +1,75 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+class RecoveryDialog:
+    # Shown in this order; the first entry is the default
+    STRATEGIES = [
+        ("auto", "Auto (recommended) - Let system choose best approach"),
+        ("interpolate", "Interpolate - Simple time-based interpolation"),
+        ("reconstruct", "Reconstruct - Smart pattern-based reconstruction"),
+        ("pattern", "Pattern - Advanced pattern detection"),
+        ("none", "None - Skip recovery (original behavior)"),
+    ]
+    # How often the dialog checks whether the analysis has finished
+    POLL_MS = 100
+
+    def __init__(self, start_analysis_callback, on_done_callback):
+        # start_analysis_callback(strategy) returns a Future with the analysis results
+        self.start_analysis_callback = start_analysis_callback
+        self.on_done_callback = on_done_callback
+        self.window = None
+        self._future = None
+
+    def show(self):
+        self.window = tk.Tk()
+        self.window.title("Production Cycle Analyzer - TimeString Recovery")
+        self.window.geometry("450x320")
+
+        self.strategy_var = tk.StringVar(value=self.STRATEGIES[0][0])
+
+        tk.Label(self.window, text="Choose TimeString recovery strategy", font=("Arial", 14)).pack(pady=10)
+
+        options_frame = tk.Frame(self.window)
+        options_frame.pack(padx=20, fill='x')
+        for value, label in self.STRATEGIES:
+            tk.Radiobutton(options_frame, text=label, variable=self.strategy_var,
+                           value=value, anchor='w').pack(fill='x')
+
+        self.progress = ttk.Progressbar(self.window, mode='indeterminate')
+        self.progress.pack(fill='x', padx=20, pady=10)
+
+        self.status_label = tk.Label(self.window, text="", fg="gray", font=("Arial", 9))
+        self.status_label.pack(pady=5)
+
+        self.run_btn = tk.Button(self.window, text="Run Analysis", command=self.run_analysis,
+                                 bg="blue", fg="white")
+        self.run_btn.pack(pady=10)
+
+        self.window.mainloop()
+
+    def run_analysis(self):
+        strategy = self.strategy_var.get()
+        self.run_btn.config(state=tk.DISABLED)
+        self.status_label.config(text="Running analysis...", fg="blue")
+        self.progress.start()
+
+        self._future = self.start_analysis_callback(strategy)
+        self._poll()
+
+    def _poll(self):
+        """Wait for the analysis without blocking the Tk event loop"""
+        if not self._future.done():
+            self.window.after(self.POLL_MS, self._poll)
+            return
+
+        self.progress.stop()
+        try:
+            results = self._future.result()
+        except Exception as e:
+            self.run_btn.config(state=tk.NORMAL)
+            self.status_label.config(text="Analysis failed", fg="red")
+            messagebox.showerror("Error", f"Analysis failed: {str(e)}")
+            return
+
+        self.window.destroy()
+        self.on_done_callback(results)
@@ -1,11 +1,14 @@
 # app/results_window.py
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import pandas as pd
-from core.models import AuthenticationType
+from tkinter import ttk, messagebox
 from services.fact_samples_service import FactSamplesService
 import threading
+import queue
+from app.tree_helpers import bulk_insert
 class ResultsWindow:
+    # How often the UI polls the ETL worker for progress (ms)
+    ETL_POLL_MS = 100
+
     def __init__(self, analysis_service, db_service, on_complete_callback):
         self.analysis_service = analysis_service
         self.db_service = db_service
@@ -16,6 +19,17 @@ class ResultsWindow:
         self.ref_var = tk.StringVar()  # Move this to init
         self.ref_dropdown = None
         self.valid_tables = [] 
+        self._rows = []
+        self._row_tags = []
+        self._first_row = 0
+        # Cycle Details nodes not expanded yet: tree item id -> TableResult
+        self._pending_details = {}
+        self._lotedata_running = False
+        # Reference table DataFrame fetched for LOTEDATA, keyed by table name
+        self._ref_df_cache = {}
+        self._last_ref_table = None
+        self._create_btn = None
+        self._etl_button = None
         
     def show(self, analysis_results):
         self.window = tk.Tk()
@@ -60,57 +74,56 @@ class ResultsWindow:
             tree.heading(col, text=col)
             tree.column(col, width=column_widths.get(col, 100))
         
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
+        # Add scrollbar (driven by the row window below, not by the tree itself)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        # Add data to treeview
-        valid_tables = []
-        for table_name, result in analysis_results.items():
-            first_cycle = result.cycles[0] if result.cycles else None
-            last_cycle = result.cycles[-1] if result.cycles else None
-            
-            status = "✅ OK" if not result.error_message else f"❌ Error: {result.error_message}"
-            
-            tree.insert("", "end", values=(
-                table_name,
-                result.total_cycles,
-                "Yes" if result.time_matched else "No",
-                status,
-                first_cycle.start_time.strftime("%d/%m/%Y %H:%M") if first_cycle else "N/A",
-                last_cycle.end_time.strftime("%d/%m/%Y %H:%M") if last_cycle else "N/A"
-            ))
-            
-            if not result.error_message and result.total_cycles > 0:
-                valid_tables.append(table_name)
+        # Pre-format the rows once, a column at a time; only the visible window is put in the tree
+        results_df = self.analysis_service.get_results_dataframe()
+        has_error = results_df['error_message'].astype(bool)
+        status = ("Error: " + results_df['error_message']).where(has_error, "OK")
+        time_matched = results_df['time_matched'].map({True: "Yes", False: "No"})
+        first_fmt = results_df['first_start'].dt.strftime("%d/%m/%Y %H:%M").fillna("N/A")
+        last_fmt = results_df['last_end'].dt.strftime("%d/%m/%Y %H:%M").fillna("N/A")
+        
+        self._rows = list(zip(results_df['table'], results_df['total_cycles'], time_matched,
+                              status, first_fmt, last_fmt))
+        self._row_tags = has_error.map({True: 'err', False: 'ok'}).tolist()
+        valid_tables = results_df.loc[~has_error & (results_df['total_cycles'] > 0), 'table'].tolist()
+        
+        # Status color comes from row tags instead of emoji glyphs in the cell text
+        tree.tag_configure('ok', foreground='green')
+        tree.tag_configure('err', foreground='red')
+        self._bind_virtual_rows(tree, scrollbar)
         
         # Details tab
         details_frame = ttk.Frame(notebook)
         notebook.add(details_frame, text="Cycle Details")
         
-        # Cycle details text area
-        details_text = scrolledtext.ScrolledText(details_frame, width=70, height=20)
-        details_text.pack(padx=10, pady=10, fill='both', expand=True)
+        # Cycle details tree: one node per table, cycle rows built when expanded
+        details_tree = ttk.Treeview(details_frame, columns=("Details",), height=20)
+        details_tree.heading("#0", text="Table / Cycle")
+        details_tree.heading("Details", text="Details")
+        details_tree.column("#0", width=220)
+        details_tree.column("Details", width=380)
+        
+        details_scrollbar = ttk.Scrollbar(details_frame, orient=tk.VERTICAL, command=details_tree.yview)
+        details_tree.configure(yscrollcommand=details_scrollbar.set)
+        details_scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=10)
+        details_tree.pack(padx=10, pady=10, fill='both', expand=True)
         
-        # Add cycle details
-        details_text.insert(tk.END, "CYCLE DETAILS\n" + "="*50 + "\n\n")
+        # Add one collapsed node per table, with a placeholder child so it can be opened
+        self._pending_details = {}
         for table_name, result in analysis_results.items():
             if result.cycles:
-                details_text.insert(tk.END, f"Table: {table_name}\n")
-                details_text.insert(tk.END, f"Total Cycles: {result.total_cycles}\n")
-                for cycle in result.cycles[:5]:  # Show first 5 cycles
-                    details_text.insert(tk.END, 
-                        f"Cycle {cycle.cycle_id}: {cycle.start_time.strftime('%d/%m/%Y %H:%M')} "
-                        f"to {cycle.end_time.strftime('%d/%m/%Y %H:%M')} "
-                        f"({cycle.duration_minutes:.1f} min, {cycle.sample_count} samples)\n"
-                    )
-                if result.total_cycles > 5:
-                    details_text.insert(tk.END, f"... and {result.total_cycles - 5} more cycles\n")
-                details_text.insert(tk.END, "-"*50 + "\n")
+                iid = details_tree.insert("", "end", text=table_name,
+                                          values=(f"Total Cycles: {result.total_cycles}",))
+                details_tree.insert(iid, "end", text="...")
+                self._pending_details[iid] = result
         
-        details_text.config(state=tk.DISABLED)
+        details_tree.bind('<<TreeviewOpen>>',
+                          lambda event: self._expand_cycle_details(details_tree, details_tree.focus()))
         
         # LOTEDATA creation section (only if we have valid tables)
         if valid_tables:
@@ -129,6 +142,8 @@ class ResultsWindow:
                                            values=valid_tables, state="readonly")
             self.ref_dropdown.pack(side='left', padx=5)
             self.ref_dropdown.set(valid_tables[0])
+            self._last_ref_table = valid_tables[0]
+            self.ref_dropdown.bind('<<ComboboxSelected>>', self._on_ref_table_changed)
             
             # LOTEDATA type selection
             type_frame = tk.Frame(lotedata_frame)
@@ -143,8 +158,9 @@ class ResultsWindow:
             ttk.Radiobutton(type_frame, text="BOTH: LOTE_SUMMARY + LOTE_DATA", 
                variable=self.lotedata_type, value="detailed_mapping").pack(side='left', padx=5)
             
-            tk.Button(lotedata_frame, text="Create LOTEDATA Table", command=self.create_lotedata,
-                     bg="green", fg="white", font=("Arial", 10, "bold")).pack(pady=10)
+            self._create_btn = tk.Button(lotedata_frame, text="Create LOTEDATA Table", command=self.create_lotedata,
+                     bg="green", fg="white", font=("Arial", 10, "bold"))
+            self._create_btn.pack(pady=10)
             
             # FACT SAMPLES ETL Button
             etl_frame = tk.Frame(self.window)
@@ -155,6 +171,7 @@ class ResultsWindow:
                     bg="blue", fg="white", font=("Arial", 10, "bold"),
                     padx=20, pady=10)
             fact_samples_btn.pack(pady=5)
+            self._etl_button = fact_samples_btn
 
             # Add tooltip
             self._create_tooltip(fact_samples_btn, 
@@ -172,6 +189,85 @@ class ResultsWindow:
     
 
     
+    def _expand_cycle_details(self, details_tree, iid):
+        """Replace a table node's placeholder with its first cycles on first open"""
+        result = self._pending_details.pop(iid, None)
+        if result is None:
+            return
+        
+        # Build every child line first, then add them to the tree in a single call
+        texts, rows = [], []
+        for cycle in result.cycles[:5]:  # Show first 5 cycles
+            texts.append(f"Cycle {cycle.cycle_id}")
+            rows.append((
+                f"{cycle.start_time.strftime('%d/%m/%Y %H:%M')} "
+                f"to {cycle.end_time.strftime('%d/%m/%Y %H:%M')} "
+                f"({cycle.duration_minutes:.1f} min, {cycle.sample_count} samples)",
+            ))
+        if result.total_cycles > 5:
+            texts.append(f"... and {result.total_cycles - 5} more cycles")
+            rows.append(("",))
+        
+        details_tree.delete(*details_tree.get_children(iid))
+        bulk_insert(details_tree, rows, texts=texts, parent=iid)
+    
+    def _bind_virtual_rows(self, tree, scrollbar):
+        """Show only a window of self._rows in the tree and move it on scroll"""
+        window_size = int(tree.cget('height'))
+        
+        def render(first):
+            total = len(self._rows)
+            first = max(0, min(first, total - window_size))
+            last = min(first + window_size, total)
+            self._first_row = first
+            
+            # Release rows that scrolled out of the window, keep the ones still visible
+            shown = [int(iid) for iid in tree.get_children()]
+            stale = [str(index) for index in shown if not first <= index < last]
+            if stale:
+                tree.delete(*stale)
+            kept = [index for index in shown if first <= index < last]
+            
+            # Missing rows form at most one block above and one below the kept rows
+            top_end = kept[0] if kept else last
+            bottom_start = kept[-1] + 1 if kept else last
+            for block, position in ((range(first, top_end), 0), (range(bottom_start, last), "end")):
+                bulk_insert(tree, [self._rows[index] for index in block],
+                            iids=[str(index) for index in block], index=position,
+                            tags=[self._row_tags[index] for index in block])
+            
+            if total:
+                scrollbar.set(first / total, last / total)
+            else:
+                scrollbar.set(0, 1)
+        
+        def on_scrollbar(action, amount, unit=None):
+            if action == 'moveto':
+                render(int(float(amount) * len(self._rows)))
+            else:
+                step = window_size if unit == 'pages' else 1
+                render(self._first_row + int(amount) * step)
+        
+        def on_mousewheel(event):
+            if event.num == 4 or event.delta > 0:
+                render(self._first_row - 1)
+            else:
+                render(self._first_row + 1)
+            return "break"
+        
+        scrollbar.configure(command=on_scrollbar)
+        tree.bind('<MouseWheel>', on_mousewheel)
+        tree.bind('<Button-4>', on_mousewheel)
+        tree.bind('<Button-5>', on_mousewheel)
+        render(0)
+    
+    def _on_ref_table_changed(self, event):
+        """Drop the cached data of the previously selected reference table"""
+        new_table = self.ref_dropdown.get()
+        if new_table != self._last_ref_table:
+            self._ref_df_cache.pop(self._last_ref_table, None)
+            self._last_ref_table = new_table
+    
     def create_lotedata(self):
         # Get the selected value from the combobox
         selected_table = self.ref_var.get()
@@ -188,14 +284,30 @@ class ResultsWindow:
             messagebox.showwarning("Selection Error", "Please select a reference table")
             return
         
+        if self._lotedata_running:
+            return
+        self._lotedata_running = True
+        self._create_btn.config(state='disabled')
+        
+        # Run in separate thread to avoid freezing UI (Tk values are captured here)
+        thread = threading.Thread(target=self._create_lotedata_worker,
+                                  args=(selected_table, self.lotedata_type.get()))
+        thread.daemon = True
+        thread.start()
+    
+    def _create_lotedata_worker(self, selected_table, lotedata_type):
+        """Generate and save LOTEDATA in background thread (no Tk calls here)"""
         try:
-            # Get reference table data for detailed mapping
-            ref_df = self.db_service.fetch_table_data(selected_table)
+            # Get reference table data for detailed mapping (reused on re-clicks)
+            ref_df = self._ref_df_cache.get(selected_table)
+            if ref_df is None:
+                ref_df = self.db_service.fetch_table_data(selected_table)
+                if ref_df is not None and not ref_df.empty:
+                    self._ref_df_cache[selected_table] = ref_df
             if ref_df is None or ref_df.empty:
                 raise ValueError("Could not fetch reference table data or table is empty")
             
             # Generate LOTEDATA based on selected type
-            lotedata_type = self.lotedata_type.get()
             print(f"DEBUG: Processing lotedata_type: {lotedata_type}")
             
             if lotedata_type == "summary":
@@ -203,12 +315,14 @@ class ResultsWindow:
                 lotedata_df = self.analysis_service.generate_lotedata_summary(selected_table)
                 success = self.db_service.save_lotedata(lotedata_df, "LOTEDATA_SUMMARY")
                 table_name = "LOTEDATA_SUMMARY"
+                previews = [(lotedata_df, table_name)]
                 
             elif lotedata_type == "detailed":
                 print("DEBUG: Generating detailed table")
                 lotedata_df = self.analysis_service.generate_lotedata_detailed(selected_table, ref_df)
                 success = self.db_service.save_lotedata(lotedata_df, "LOTEDATA_DETAILED")
                 table_name = "LOTEDATA_DETAILED"
+                previews = [(lotedata_df, table_name)]
                 
             elif lotedata_type == "detailed_mapping":
                 print("DEBUG: Generating both LOTE tables")
@@ -221,6 +335,8 @@ class ResultsWindow:
                 
                 success = success1 and success2
                 table_name = "LOTE_SUMMARY and LOTE_DATA"
+                previews = [(lote_tables['LOTE_SUMMARY'], "LOTE_SUMMARY"),
+                            (lote_tables['LOTE_DATA'], "LOTE_DATA")]
                 
                 # DEBUG: Print information about the tables
                 print(f"DEBUG: LOTE_SUMMARY shape: {lote_tables['LOTE_SUMMARY'].shape}")
@@ -232,6 +348,8 @@ class ResultsWindow:
             else:
                 raise ValueError(f"Invalid LOTEDATA type selected: {lotedata_type}")
             
+            cycle_events_df = None
+            cycle_events_error = None
             if success:
                 # ✅ AUTOMATICALLY RUN CYCLE_EVENTS GENERATION AFTER SUCCESSFUL LOTEDATA CREATION
                 print("🚀 Automatically generating Cycle_Events table...")
@@ -247,43 +365,59 @@ class ResultsWindow:
                     if cycle_events_df is not None:
                         print(f"✅ Cycle_Events table generated successfully with {len(cycle_events_df)} events")
                         
-                        # Show preview of Cycle_Events table
-                        self.show_lotedata_preview(cycle_events_df, "Cycle_Events")
-                        
-                        # Show success message including Cycle_Events creation
-                        messagebox.showinfo("Success", 
-                            f"{table_name} created successfully!\n\n"
-                            f"Cycle_Events table also generated with {len(cycle_events_df)} events.")
-                    else:
-                        messagebox.showinfo("Success", 
-                            f"{table_name} created successfully!\n\n"
-                            "Cycle_Events generation completed.")
-                        
                 except Exception as e:
                     print(f"⚠️ Cycle_Events generation failed: {e}")
-                    # Still show success for LOTEDATA, but warn about Cycle_Events
-                    messagebox.showinfo("Success with Warning", 
-                        f"{table_name} created successfully!\n\n"
-                        f"Cycle_Events generation encountered an issue: {str(e)}")
-                
-                # Show preview of the created LOTEDATA data
-                if lotedata_type == "detailed_mapping":
-                    # Show preview of both tables
-                    self.show_lotedata_preview(lote_tables['LOTE_SUMMARY'], "LOTE_SUMMARY")
-                    self.show_lotedata_preview(lote_tables['LOTE_DATA'], "LOTE_DATA")
-                else:
-                    self.show_lotedata_preview(lotedata_df, table_name)
-                    
-                # Window remains open - user can create more tables or run ETL
-                print(f"✅ {table_name} created. Window remains open for further actions.")
-                
-            else:
-                messagebox.showerror("Error", f"Failed to create {table_name}")
+                    cycle_events_error = str(e)
+            
+            # Update UI in main thread
+            self.window.after(0, self._lotedata_done, success, table_name, previews,
+                              cycle_events_df, cycle_events_error)
                 
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to create LOTEDATA: {str(e)}")
             import traceback
             traceback.print_exc()  # This will print the full traceback to help debug
+            self.window.after(0, self._lotedata_error, str(e))
+    
+    def _lotedata_done(self, success, table_name, previews, cycle_events_df, cycle_events_error):
+        """Handle LOTEDATA completion"""
+        self._lotedata_running = False
+        self._create_btn.config(state='normal')
+        
+        if not success:
+            messagebox.showerror("Error", f"Failed to create {table_name}")
+            return
+        
+        if cycle_events_error is not None:
+            # Still show success for LOTEDATA, but warn about Cycle_Events
+            messagebox.showinfo("Success with Warning", 
+                f"{table_name} created successfully!\n\n"
+                f"Cycle_Events generation encountered an issue: {cycle_events_error}")
+        elif cycle_events_df is not None:
+            # Show preview of Cycle_Events table
+            self.show_lotedata_preview(cycle_events_df, "Cycle_Events")
+            
+            # Show success message including Cycle_Events creation
+            messagebox.showinfo("Success", 
+                f"{table_name} created successfully!\n\n"
+                f"Cycle_Events table also generated with {len(cycle_events_df)} events.")
+        else:
+            messagebox.showinfo("Success", 
+                f"{table_name} created successfully!\n\n"
+                "Cycle_Events generation completed.")
+        
+        # Show preview of the created LOTEDATA data
+        for df, name in previews:
+            self.show_lotedata_preview(df, name)
+            
+        # Window remains open - user can create more tables or run ETL
+        print(f"✅ {table_name} created. Window remains open for further actions.")
+    
+    def _lotedata_error(self, error_msg):
+        """Handle LOTEDATA errors"""
+        self._lotedata_running = False
+        self._create_btn.config(state='normal')
+        messagebox.showerror("Error", f"Failed to create LOTEDATA: {error_msg}")
+    
     def show_lotedata_preview(self, df, table_name):
         """Show a preview of the LOTEDATA table"""
         preview = tk.Toplevel(self.window)
@@ -310,9 +444,9 @@ class ResultsWindow:
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        # Add data to treeview (first 20 rows)
-        for _, row in df.head(20).iterrows():
-            tree.insert("", "end", values=tuple(row))
+        # Add data to treeview (first 20 rows) in a single Tcl call, reading the
+        # rows straight from one object ndarray instead of boxing them per row
+        bulk_insert(tree, df.head(20).to_numpy(dtype=object).tolist())
         
         tk.Button(preview, text="Close", command=preview.destroy).pack(pady=10)
 
@@ -338,14 +472,15 @@ class ResultsWindow:
             return
         
         # Disable button during processing
-        for widget in self.window.winfo_children():
-            if isinstance(widget, tk.Button) and "Run FactSamples ETL" in widget.cget('text'):
-                widget.config(state='disabled', bg='gray')
-                break
+        self._etl_button.config(state='disabled', bg='gray')
         
         # Show progress window
         self.show_etl_progress(all_tables)
         
+        # Worker reports progress through a thread-safe queue polled by the UI
+        self._etl_queue = queue.Queue()
+        self.window.after(self.ETL_POLL_MS, self._poll_etl_queue)
+        
         # Run ETL in separate thread to avoid freezing UI
         thread = threading.Thread(target=self._run_etl_thread, args=(all_tables,))
         thread.daemon = True
@@ -355,22 +490,48 @@ class ResultsWindow:
         """Run ETL in background thread using all tables"""
         try:
             # Initialize and run the ETL service with ALL tables
-            etl_service = FactSamplesService(self.db_service, all_tables)
+            etl_service = FactSamplesService(
+                self.db_service, all_tables,
+                progress_callback=lambda done, total, table: self._etl_queue.put(("progress", done, total, table))
+            )
             success = etl_service.run()
             
-            # Update UI in main thread
-            self.window.after(0, self._etl_complete, success, len(all_tables))
+            self._etl_queue.put(("done", success, len(all_tables)))
             
         except Exception as e:
-            self.window.after(0, self._etl_error, str(e))
+            self._etl_queue.put(("error", str(e)))
+
+    def _poll_etl_queue(self):
+        """Drain ETL messages from the worker and update the progress window"""
+        try:
+            while True:
+                message = self._etl_queue.get_nowait()
+                kind = message[0]
+                
+                if kind == "progress":
+                    _, done, total, table = message
+                    if str(self.etl_progress.cget('mode')) != 'determinate':
+                        self.etl_progress.stop()
+                        self.etl_progress.config(mode='determinate', maximum=total)
+                    self.etl_progress['value'] = done
+                    self.etl_status_label.config(text=f"Processed {done}/{total}: {table}")
+                elif kind == "done":
+                    self.etl_progress.stop()
+                    self._etl_complete(message[1], message[2])
+                    return
+                elif kind == "error":
+                    self.etl_progress.stop()
+                    self._etl_error(message[1])
+                    return
+        except queue.Empty:
+            pass
+        
+        self.window.after(self.ETL_POLL_MS, self._poll_etl_queue)
 
     def _etl_complete(self, success, table_count):
         """Handle ETL completion"""
         # Re-enable button
-        for widget in self.window.winfo_children():
-            if isinstance(widget, tk.Button) and widget.cget('state') == 'disabled':
-                widget.config(state='normal', bg='blue')
-                break
+        self._etl_button.config(state='normal', bg='blue')
         
         # Close progress window
         #if hasattr(self, 'progress_window'):
@@ -414,10 +575,10 @@ class ResultsWindow:
         scrollbar.pack(side='right', fill='y')
         
         listbox = tk.Listbox(frame, yscrollcommand=scrollbar.set, font=("Arial", 9))
-        listbox.pack(fill='both', expand=True)
         
-        for table in all_tables:
-            listbox.insert('end', f"• {table}")
+        # Fill in one call before packing so Tk lays the list out once
+        listbox.insert('end', *[f"• {table}" for table in all_tables])
+        listbox.pack(fill='both', expand=True)
         
         scrollbar.config(command=listbox.yview)
         
@@ -426,16 +587,14 @@ class ResultsWindow:
         self.etl_progress.pack(fill='x', padx=50, pady=10)
         self.etl_progress.start()
         
-        tk.Label(self.progress_window, text="Building complete data warehouse from all available tables...", 
-                fg="gray", font=("Arial", 9)).pack()
+        self.etl_status_label = tk.Label(self.progress_window, text="Building complete data warehouse from all available tables...", 
+                fg="gray", font=("Arial", 9))
+        self.etl_status_label.pack()
 
     def _etl_error(self, error_msg):
         """Handle ETL errors"""
         # Re-enable button
-        for widget in self.window.winfo_children():
-            if isinstance(widget, tk.Button) and widget.cget('state') == 'disabled':
-                widget.config(state='normal', bg='blue')
-                break
+        self._etl_button.config(state='normal', bg='blue')
         
         # Close progress window
        # if hasattr(self, 'progress_window'):
@@ -444,22 +603,27 @@ class ResultsWindow:
         messagebox.showerror("ETL Error", f"FactSamples ETL failed:\n\n{error_msg}")
     
     def _create_tooltip(self, widget, text):
-        """Create a tooltip for a widget"""
+        """Create a tooltip for a widget (built once, then shown/hidden)"""
+        widget._tooltip = None
+        
         def on_enter(event):
-            tooltip = tk.Toplevel(self.window)
-            tooltip.wm_overrideredirect(True)
-            tooltip.wm_geometry(f"+{event.x_root+10}+{event.y_root+10}")
-            
-            label = tk.Label(tooltip, text=text, justify='left',
-                        background="#ffffe0", relief='solid', borderwidth=1,
-                        font=("Arial", 8))
-            label.pack()
+            if widget._tooltip is None:
+                tooltip = tk.Toplevel(self.window)
+                tooltip.wm_overrideredirect(True)
+                
+                label = tk.Label(tooltip, text=text, justify='left',
+                            background="#ffffe0", relief='solid', borderwidth=1,
+                            font=("Arial", 8))
+                label.pack()
+                
+                widget._tooltip = tooltip
             
-            widget.tooltip = tooltip
+            widget._tooltip.wm_geometry(f"+{event.x_root+10}+{event.y_root+10}")
+            widget._tooltip.deiconify()
         
         def on_leave(event):
-            if hasattr(widget, 'tooltip'):
-                widget.tooltip.destroy()
+            if widget._tooltip is not None:
+                widget._tooltip.withdraw()
         
         widget.bind('<Enter>', on_enter)
-        widget.bind('<Leave>', on_leave)
\ No newline at end of file
+        widget.bind('<Leave>', on_leave)
@@ -0,0 +1,32 @@
+# app/tree_helpers.py
+def bulk_insert(tree, rows, iids=None, index="end", tags=None, texts=None, parent=""):
+    """Insert many Treeview rows with one Tcl script instead of one call per row"""
+    if not rows:
+        return
+
+    # Each row is sent as a group of loop variables; Tkinter converts the tuple
+    # into a Tcl list, so values with spaces or braces are quoted by Tcl itself
+    columns = [("row", "-values $row", rows)]
+    if iids is not None:
+        columns.insert(0, ("id", "-id $id", iids))
+    if tags is not None:
+        columns.append(("tag", "-tags $tag", tags))
+    if texts is not None:
+        columns.append(("text", "-text $text", texts))
+
+    loop_vars = " ".join(name for name, _, _ in columns)
+    options = " ".join(option for _, option, _ in columns)
+    data = tuple(item for group in zip(*(values for _, _, values in columns)) for item in group)
+
+    if index == "end":
+        setup, position, step = "", "end", ""
+    else:
+        setup, position, step = f"set ::_bulk_insert_pos {int(index)}\n", "$::_bulk_insert_pos", "; incr ::_bulk_insert_pos"
+
+    tree.tk.call('set', '::_bulk_insert_rows', data)
+    tree.tk.call('set', '::_bulk_insert_parent', parent)
+    tree.tk.eval(
+        f'{setup}foreach {{{loop_vars}}} $::_bulk_insert_rows {{ '
+        f'{tree} insert $::_bulk_insert_parent {position} {options}{step} }}\n'
+        'unset ::_bulk_insert_rows ::_bulk_insert_parent'
+    )
@@ -1,88 +1,177 @@
 # core/cycle_analyzer.py
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
-from core.models import Cycle, TableResult
+from datetime import timedelta
+from typing import Dict, Tuple, Literal, Optional
+from core.models import CycleArray, TableResult, AnalysisContext
+
+try:
+    import ciso8601
+except ImportError:
+    ciso8601 = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _detect_cycles_kernel(ns: np.ndarray, threshold_ns: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Single pass over sorted int64 timestamps returning (start_idx, end_idx, counts) per cycle"""
+    capacity = 64
+    start_idx = np.empty(capacity, dtype=np.int64)
+    end_idx = np.empty(capacity, dtype=np.int64)
+    n_cycles = 0
+    cycle_start = 0
+
+    for i in range(1, ns.shape[0] + 1):
+        if i < ns.shape[0] and ns[i] - ns[i - 1] <= threshold_ns:
+            continue
+
+        # Close the current cycle (a gap was found or the series ended)
+        if n_cycles == capacity:
+            capacity *= 2
+            grown_start = np.empty(capacity, dtype=np.int64)
+            grown_end = np.empty(capacity, dtype=np.int64)
+            grown_start[:n_cycles] = start_idx[:n_cycles]
+            grown_end[:n_cycles] = end_idx[:n_cycles]
+            start_idx = grown_start
+            end_idx = grown_end
+
+        start_idx[n_cycles] = cycle_start
+        end_idx[n_cycles] = i - 1
+        n_cycles += 1
+        cycle_start = i
+
+    start_idx = start_idx[:n_cycles]
+    end_idx = end_idx[:n_cycles]
+    return start_idx, end_idx, end_idx - start_idx + 1
+
+
+if njit is not None:
+    _detect_cycles_kernel = njit(cache=True)(_detect_cycles_kernel)
+
 
 class CycleAnalyzer:
-    def __init__(self, time_threshold_minutes: int, expected_frequency_minutes: int):
+    TIME_FORMAT = '%d/%m/%Y %H:%M:%S'
+    # Upper bound on per-row mismatch entries built by _compare_time_series
+    MAX_MISMATCH_ROWS = 1000
+    # Row differences above this are flagged ❌ instead of ⚠️ (1 ms)
+    MATCH_TOLERANCE_NS = 1_000_000
+
+    def __init__(self, time_threshold_minutes: int, expected_frequency_minutes: int, trust_schema: bool = False):
         self.time_threshold = timedelta(minutes=time_threshold_minutes)
+        # Raw int64 form so gap checks compare integers instead of Timedelta objects
+        self.time_threshold_ns = int(time_threshold_minutes * 60 * 1_000_000_000)
+        # Set once the migration has made TimeString DATETIME (so unconvertible
+        # values are NULL); lets clean columns skip dropna
+        self.trust_schema = trust_schema
         self.expected_frequency = timedelta(minutes=expected_frequency_minutes)
+        # (id(df), column) -> (weakref to df, source values, parsed series) for
+        # the current analysis run; cleared by reset_parse_cache
+        self._parsed_cache = {}
     
     # --- Time Parsing ---
-    def parse_time_string(self, time_series: pd.Series) -> pd.Series:
-        """Parse TimeString into datetime with dd/mm/yyyy hh:mm:ss format"""
-        try:
-            return pd.to_datetime(time_series, dayfirst=True, errors='coerce')
-        except Exception:
-            def parse_custom_date(date_str):
+    @classmethod
+    def parse_time_string(cls, time_series: pd.Series, fmt: Optional[str] = None) -> pd.Series:
+        """Parse TimeString into datetime with dd/mm/yyyy hh:mm:ss format (or fmt)"""
+        # DATETIME columns (migrated tables, recovered frames) need no parsing
+        if pd.api.types.is_datetime64_dtype(time_series):
+            return time_series
+        
+        # Explicit format keeps pandas on its C fast path; cache=True parses
+        # each distinct timestamp string only once
+        parsed = pd.to_datetime(time_series, format=fmt or cls.TIME_FORMAT, errors='coerce', cache=True)
+        
+        # Values stored in any other layout go through the slower fallbacks
+        unparsed = parsed.isna() & time_series.notna()
+        if unparsed.any():
+            parsed[unparsed] = cls._parse_other_layouts(time_series[unparsed])
+        return parsed
+
+    def reset_parse_cache(self):
+        """Forget parsed columns; call at the start of each analysis run"""
+        self._parsed_cache.clear()
+
+    def parse_column(self, df: pd.DataFrame, time_column: str) -> pd.Series:
+        """
+        Parse df[time_column] once per analysis run and reuse it for the same frame.
+        Frames must not be edited in place during a run: in-place writes keep the
+        buffer checked below, so they are only dropped by reset_parse_cache
+        """
+        source = df[time_column].to_numpy()
+        key = (id(df), time_column)
+        
+        cached = self._parsed_cache.get(key)
+        if cached is not None:
+            df_ref, cached_source, parsed = cached
+            # The cached source keeps its buffer alive, so a different address or
+            # shape means the column was replaced since it was parsed
+            if (df_ref() is df
+                    and cached_source.shape == source.shape
+                    and cached_source.__array_interface__['data'] == source.__array_interface__['data']):
+                return parsed
+        
+        parsed = self.parse_time_string(df[time_column])
+        cache = self._parsed_cache
+        df_ref = weakref.ref(df, lambda _, key=key: cache.pop(key, None))
+        self._parsed_cache[key] = (df_ref, source, parsed)
+        return parsed
+
+    def _drop_invalid_times(self, parsed_series: pd.Series) -> pd.Series:
+        """Drop NaT timestamps; with a trusted schema a clean column is returned as-is"""
+        # The migration leaves unconvertible values as NULL, so even a trusted
+        # column gets one cheap NaT probe before dropna is skipped
+        if self.trust_schema and not np.isnat(parsed_series.to_numpy(dtype='datetime64[ns]')).any():
+            return parsed_series
+        return parsed_series.dropna()
+
+    @staticmethod
+    def _parse_other_layouts(values: pd.Series) -> pd.Series:
+        """Parse timestamps that don't follow TIME_FORMAT (ISO first, then day-first inference)"""
+        parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+        
+        if ciso8601 is not None:
+            def parse_iso(value):
                 try:
-                    return datetime.strptime(date_str, '%d/%m/%Y %H:%M:%S')
-                except Exception:
+                    return ciso8601.parse_datetime_as_naive(str(value))
+                except ValueError:
                     return pd.NaT
-            return time_series.apply(parse_custom_date)
+            parsed = pd.Series(
+                pd.to_datetime([parse_iso(v) for v in values.to_numpy(dtype=object)], errors='coerce'),
+                index=values.index
+            )
+        
+        remaining = parsed.isna()
+        if remaining.any():
+            parsed[remaining] = pd.to_datetime(values[remaining], dayfirst=True, errors='coerce', cache=True)
+        return parsed
 
-    def detect_cycles(self, time_series: pd.Series) -> List[Cycle]:
+    def detect_cycles(self, time_series: pd.Series, assume_sorted: bool = False) -> CycleArray:
         """
         Detect cycles from time series data
         """
         if len(time_series) == 0:
-            return []
+            return CycleArray.empty()
 
-        # Parse timestamps
-        parsed_series = self.parse_time_string(time_series)
-        
+        return self._detect_cycles_from_parsed(self.parse_time_string(time_series), assume_sorted)
+
+    def _detect_cycles_from_parsed(self, parsed_series: pd.Series, assume_sorted: bool = False) -> CycleArray:
+        """Detect cycles from an already-parsed datetime series"""
         # Remove invalid timestamps (original behavior)
-        valid_series = parsed_series.dropna()
+        valid_series = self._drop_invalid_times(parsed_series)
         if len(valid_series) == 0:
-            return []
+            return CycleArray.empty()
         
-        # Sort by datetime
-        valid_series = valid_series.sort_values().reset_index(drop=True)
+        # Sort by datetime, unless the rows already arrive in order (sorted reads
+        # are ordered by TimeString in SQL); the monotonic check is a single O(N) pass
+        if not assume_sorted and not valid_series.is_monotonic_increasing:
+            valid_series = valid_series.sort_values().reset_index(drop=True)
         
-        cycles = []
-        current_cycle_id = 1
-        cycle_start = valid_series.iloc[0]
-        previous_time = valid_series.iloc[0]
-        sample_count = 1
-
-        for i in range(1, len(valid_series)):
-            current_time = valid_series.iloc[i]
-            time_diff = current_time - previous_time
-            sample_count += 1
-
-            if time_diff > self.time_threshold:
-                # Close current cycle
-                duration = (previous_time - cycle_start).total_seconds() / 60
-                cycles.append(
-                    Cycle(
-                        cycle_id=current_cycle_id,
-                        start_time=cycle_start,
-                        end_time=previous_time,
-                        sample_count=sample_count - 1,
-                        duration_minutes=duration
-                    )
-                )
-                # Start new cycle
-                current_cycle_id += 1
-                cycle_start = current_time
-                sample_count = 1
-
-            previous_time = current_time
-
-        # Append last cycle
-        duration = (previous_time - cycle_start).total_seconds() / 60
-        cycles.append(
-            Cycle(
-                cycle_id=current_cycle_id,
-                start_time=cycle_start,
-                end_time=previous_time,
-                sample_count=sample_count,
-                duration_minutes=duration
-            )
-        )
-
-        return cycles
+        return self._detect_cycles_from_valid_times(valid_series)
 
     # --- Table Analyzer ---
     def analyze_table(self, table_name: str, df: pd.DataFrame, time_column: str = "TimeString") -> TableResult:
@@ -90,7 +179,7 @@ class CycleAnalyzer:
             if time_column not in df.columns:
                 return TableResult(
                     table_name=table_name,
-                    cycles=[],
+                    cycles=CycleArray.empty(),
                     total_cycles=0,
                     error_message=f"Column '{time_column}' not found"
                 )
@@ -98,12 +187,12 @@ class CycleAnalyzer:
             if df.empty:
                 return TableResult(
                     table_name=table_name,
-                    cycles=[],
+                    cycles=CycleArray.empty(),
                     total_cycles=0,
                     error_message="Table is empty"
                 )
 
-            cycles = self.detect_cycles(df[time_column])
+            cycles = self._detect_cycles_from_parsed(self.parse_column(df, time_column))
 
             return TableResult(
                 table_name=table_name,
@@ -113,93 +202,111 @@ class CycleAnalyzer:
         except Exception as e:
             return TableResult(
                 table_name=table_name,
-                cycles=[],
+                cycles=CycleArray.empty(),
                 total_cycles=0,
                 error_message=f"Analysis error: {str(e)}"
             )
 
 
-    def _detect_cycles_from_valid_times(self, time_series: pd.Series) -> List[Cycle]:
-        """Detect cycles from already-validated timestamps"""
-        cycles = []
-        current_cycle_id = 1
-        cycle_start = time_series.iloc[0]
-        previous_time = time_series.iloc[0]
-        sample_count = 1
-
-        for i in range(1, len(time_series)):
-            current_time = time_series.iloc[i]
-            time_diff = current_time - previous_time
-            sample_count += 1
-
-            if time_diff > self.time_threshold:
-                # Close current cycle
-                duration = (previous_time - cycle_start).total_seconds() / 60
-                cycles.append(
-                    Cycle(
-                        cycle_id=current_cycle_id,
-                        start_time=cycle_start,
-                        end_time=previous_time,
-                        sample_count=sample_count - 1,
-                        duration_minutes=duration
-                    )
-                )
-                # Start new cycle
-                current_cycle_id += 1
-                cycle_start = current_time
-                sample_count = 1
-
-            previous_time = current_time
-
-        # Append last cycle
-        duration = (previous_time - cycle_start).total_seconds() / 60
-        cycles.append(
-            Cycle(
-                cycle_id=current_cycle_id,
-                start_time=cycle_start,
-                end_time=previous_time,
-                sample_count=sample_count,
-                duration_minutes=duration
+    def parsed_times(self, ctx: AnalysisContext, table_name: str) -> np.ndarray:
+        """Valid timestamps of one context table as datetime64[ns], parsed on first access"""
+        times = ctx.parsed.get(table_name)
+        if times is None:
+            series = self._drop_invalid_times(self.parse_column(ctx.raw[table_name], ctx.time_column))
+            times = series.to_numpy(dtype='datetime64[ns]')
+            ctx.parsed[table_name] = times
+        return times
+
+    def detect_cycles_ctx(self, ctx: AnalysisContext, table_name: str) -> CycleArray:
+        """Detect cycles of one context table from its shared parsed buffer"""
+        return self._detect_cycles_from_parsed(pd.Series(self.parsed_times(ctx, table_name)))
+
+    def analyze_tables(self, tables: Dict[str, pd.DataFrame], time_column: str = "TimeString") -> Dict[str, TableResult]:
+        """Analyze several tables concurrently; each table is independent of the others"""
+        if len(tables) < 2:
+            return {name: self.analyze_table(name, df, time_column) for name, df in tables.items()}
+
+        # Threads rather than processes: the heavy work runs inside numpy/pandas,
+        # and shipping whole DataFrames to worker processes would cost more than it saves
+        max_workers = min(len(tables), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                lambda item: self.analyze_table(item[0], item[1], time_column),
+                tables.items()
             )
-        )
+            return dict(zip(tables.keys(), results))
+
+    def _detect_cycles_from_valid_times(self, time_series: pd.Series) -> CycleArray:
+        """Detect cycles from already-validated, sorted timestamps"""
+        ns = time_series.to_numpy(dtype='datetime64[ns]').view('i8')
+
+        if njit is not None:
+            # Fused single pass, no intermediate diff/mask/id arrays
+            start_idx, end_idx, counts = _detect_cycles_kernel(ns, self.time_threshold_ns)
+        else:
+            # Every gap wider than the threshold opens a new cycle, so the running
+            # count of gaps is the cycle index of each sample
+            gap_mask = np.diff(ns) > self.time_threshold_ns
+            cycle_ids = np.concatenate(([0], np.cumsum(gap_mask)))
+
+            # Samples are sorted, so each cycle is a contiguous run whose length
+            # is its bincount and whose first/last rows are its start/end
+            counts = np.bincount(cycle_ids).astype(np.int64)
+            end_idx = np.cumsum(counts) - 1
+            start_idx = end_idx - counts + 1
 
-        return cycles
+        start_times = ns[start_idx].view('datetime64[ns]')
+        end_times = ns[end_idx].view('datetime64[ns]')
+
+        return CycleArray(
+            cycle_ids=np.arange(1, len(start_times) + 1, dtype=np.int64),
+            start_times=start_times,
+            end_times=end_times,
+            sample_counts=counts,
+            durations=(end_times - start_times).view('i8') / 60e9
+        )
    
     # --- Enhanced Cross-Table Check with Debugging ---
-    def check_time_matching(self, tables: Dict[str, pd.DataFrame], time_column: str = "TimeString") -> Tuple[bool, Dict]:
+    def check_time_matching(self, tables: Dict[str, pd.DataFrame], time_column: str = "TimeString",
+                            detail_level: Literal['summary', 'detail'] = 'summary') -> Tuple[bool, Dict]:
         """
         Check if all selected tables have the same TimeString sequence.
+        With detail_level='detail' the per-row mismatch lists are filled as well.
         Returns: (is_matching, debug_info)
         """
+        return self.check_time_matching_ctx(AnalysisContext(raw=tables, time_column=time_column), detail_level)
+
+    def check_time_matching_ctx(self, ctx: AnalysisContext,
+                                detail_level: Literal['summary', 'detail'] = 'summary') -> Tuple[bool, Dict]:
+        """Same as check_time_matching, reading timestamps from the context's shared buffers"""
         debug_info = {
             "tables_checked": [],
             "mismatch_reasons": [],
             "summary": {}
         }
         
-        if not tables:
+        if not ctx.raw:
             debug_info["mismatch_reasons"].append("No tables provided")
             return False, debug_info
 
         parsed_series = {}
-        table_names = list(tables.keys())
         
         # Parse and prepare all time series
-        for table_name, df in tables.items():
-            if time_column not in df.columns:
-                reason = f"Table '{table_name}' missing '{time_column}' column"
+        for table_name, df in ctx.raw.items():
+            if ctx.time_column not in df.columns:
+                reason = f"Table '{table_name}' missing '{ctx.time_column}' column"
                 debug_info["mismatch_reasons"].append(reason)
                 debug_info["tables_checked"].append({"table": table_name, "status": "error", "reason": reason})
                 continue
             
-            series = self.parse_time_string(df[time_column]).dropna()
+            series = pd.Series(self.parsed_times(ctx, table_name))
             if series.empty:
                 reason = f"Table '{table_name}' has no valid timestamps after parsing"
                 debug_info["mismatch_reasons"].append(reason)
                 debug_info["tables_checked"].append({"table": table_name, "status": "error", "reason": reason})
                 continue
             
-            parsed_series[table_name] = series.reset_index(drop=True)
+            parsed_series[table_name] = series
             debug_info["tables_checked"].append({
                 "table": table_name, 
                 "status": "ok", 
@@ -225,7 +332,7 @@ class CycleAnalyzer:
             if table_name == reference_table:
                 continue
                 
-            comparison = self._compare_time_series(reference, series, reference_table, table_name)
+            comparison = self._compare_time_series(reference, series, reference_table, table_name, detail_level)
             
             if not comparison["matches"]:
                 all_matching = False
@@ -236,7 +343,8 @@ class CycleAnalyzer:
         return all_matching, debug_info
 
     def _compare_time_series(self, ref_series: pd.Series, test_series: pd.Series,
-                              ref_name: str, test_name: str) -> Dict:
+                              ref_name: str, test_name: str,
+                              detail_level: Literal['summary', 'detail'] = 'summary') -> Dict:
         """Compare two time series and return detailed comparison results with row-level info"""
         result = {
             "matches": True,
@@ -257,38 +365,77 @@ class CycleAnalyzer:
             )
             result["stats"]["length_difference"] = abs(len(ref_series) - len(test_series))
         
-        # Compare row by row
-        mismatch_count = 0
-        time_diffs = []
+        # Work on the raw datetime64 buffers; pandas indexers are never needed below
+        ref_values = ref_series.to_numpy(dtype='datetime64[ns]')
+        test_values = test_series.to_numpy(dtype='datetime64[ns]')
         
-        for i in range(min_length):
-            ref_time = ref_series.iloc[i]
-            test_time = test_series.iloc[i]
+        # Synchronized tables are the common case: a single buffer comparison settles them
+        if (len(ref_series) == len(test_series)
+                and ref_series.dtype == test_series.dtype
+                and np.array_equal(ref_values, test_values)):
+            return result
+        
+        # Compare the overlapping rows in one vectorized pass and only
+        # visit the rows that actually differ
+        ref_ns = ref_values.view('i8')[:min_length]
+        test_ns = test_values.view('i8')[:min_length]
+        diff_ns = np.abs(ref_ns - test_ns)
+        mism_idx = np.nonzero(diff_ns != 0)[0]
+        mismatch_count = len(mism_idx)
+        # Differences stay in int64 nanoseconds; seconds are only derived for reporting
+        mismatch_diff_ns = diff_ns[mism_idx]
+        
+        if mismatch_count and detail_level == 'detail':
+            # Only the first MAX_MISMATCH_ROWS mismatches are formatted; two fully
+            # misaligned tables would otherwise produce one entry per row
+            listed_idx = mism_idx[:self.MAX_MISMATCH_ROWS]
+            if mismatch_count > len(listed_idx):
+                result["stats"]["mismatch_rows_omitted"] = mismatch_count - len(listed_idx)
             
-            if ref_time != test_time:
-                mismatch_count += 1
-                diff_seconds = abs((ref_time - test_time).total_seconds())
-                time_diffs.append(diff_seconds)
-                
-                # Store detailed mismatch info
-                mismatch_info = {
+            ref_mismatches = pd.Series(ref_values[listed_idx])
+            test_mismatches = pd.Series(test_values[listed_idx])
+            
+            # Format all mismatching timestamps in one vectorized call per layout
+            def format_ms(series, fmt):
+                return series.dt.strftime(fmt).str.slice(0, -3).tolist()
+            
+            listed_diff_ns = mismatch_diff_ns[:len(listed_idx)]
+            rows = list(zip(
+                listed_idx.tolist(),
+                ref_mismatches.tolist(),
+                test_mismatches.tolist(),
+                (listed_diff_ns / 1e9).tolist(),
+                (listed_diff_ns > self.MATCH_TOLERANCE_NS).tolist(),
+                format_ms(ref_mismatches, '%d/%m/%Y %H:%M:%S.%f'),
+                format_ms(test_mismatches, '%d/%m/%Y %H:%M:%S.%f'),
+                format_ms(ref_mismatches, '%Y-%m-%d %H:%M:%S.%f'),
+                format_ms(test_mismatches, '%Y-%m-%d %H:%M:%S.%f')
+            ))
+            
+            # Store detailed mismatch info
+            result["mismatch_details"] = [
+                {
                     "row_index": i,
                     "reference_value": ref_time,
                     "test_value": test_time,
                     "difference_seconds": diff_seconds,
-                    "reference_str": ref_time.strftime('%d/%m/%Y %H:%M:%S.%f')[:-3],
-                    "test_str": test_time.strftime('%d/%m/%Y %H:%M:%S.%f')[:-3]
+                    "reference_str": ref_str,
+                    "test_str": test_str
                 }
-                result["mismatch_details"].append(mismatch_info)
-                
-                # Store for detailed row comparison
-                result["row_comparisons"].append({
+                for i, ref_time, test_time, diff_seconds, _, ref_str, test_str, _, _ in rows
+            ]
+            
+            # Store for detailed row comparison
+            result["row_comparisons"] = [
+                {
                     "row": i + 1,  # 1-based indexing for readability
-                    "reference": ref_time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
-                    "test": test_time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+                    "reference": ref_iso,
+                    "test": test_iso,
                     "diff_seconds": f"{diff_seconds:.6f}",
-                    "match": "❌" if diff_seconds > 0.001 else "⚠️"  # 1ms tolerance
-                })
+                    "match": "❌" if beyond_tolerance else "⚠️"  # 1ms tolerance
+                }
+                for i, _, _, diff_seconds, beyond_tolerance, _, _, ref_iso, test_iso in rows
+            ]
         
         # Check for extra rows in either series
         if len(ref_series) > len(test_series):
@@ -302,13 +449,13 @@ class CycleAnalyzer:
             result["stats"]["extra_rows_in_test"] = extra_rows
         
         # Add statistical information
-        if time_diffs:
+        if mismatch_count:
             result["matches"] = False
             result["stats"]["mismatch_count"] = mismatch_count
             result["stats"]["mismatch_percentage"] = (mismatch_count / min_length) * 100
-            result["stats"]["avg_time_diff_seconds"] = sum(time_diffs) / len(time_diffs)
-            result["stats"]["max_time_diff_seconds"] = max(time_diffs) if time_diffs else 0
-            result["stats"]["min_time_diff_seconds"] = min(time_diffs) if time_diffs else 0
+            result["stats"]["avg_time_diff_seconds"] = float(mismatch_diff_ns.mean()) / 1e9
+            result["stats"]["max_time_diff_seconds"] = int(mismatch_diff_ns.max()) / 1e9
+            result["stats"]["min_time_diff_seconds"] = int(mismatch_diff_ns.min()) / 1e9
             
             result["reasons"].append(f"{mismatch_count} rows have timestamp mismatches")
             result["reasons"].append(f"Average time difference: {result['stats']['avg_time_diff_seconds']:.6f} seconds")
@@ -322,7 +469,7 @@ class CycleAnalyzer:
             )
         
         # Check if differences are within acceptable tolerance (1 second)
-        if time_diffs and max(time_diffs) <= 1.0:
+        if mismatch_count and mismatch_diff_ns.max() <= 1_000_000_000:
             result["reasons"].append("All differences are within 1 second tolerance")
         
         return result
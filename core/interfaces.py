@@ -18,11 +18,24 @@ class IDatabaseConnection(ABC):
         pass
     
     @abstractmethod
-    def read_table(self, table_name: str) -> Optional[pd.DataFrame]:
+    def table_has_timestring(self, table_name: str) -> bool:
         pass
     
     @abstractmethod
-    def create_lotedata_table(self, df: pd.DataFrame, table_name: str = 'LOTEDATA') -> bool:
+    def read_table(self, table_name: str, order_by_timestring: bool = False) -> Optional[pd.DataFrame]:
+        pass
+    
+    @abstractmethod
+    def read_columns(self, table_name: str, columns: List[str],
+                     float_columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        pass
+    
+    @abstractmethod
+    def read_table_preview(self, table_name: str, limit: int = 50, order_by_timestring: bool = True) -> Optional[pd.DataFrame]:
+        pass
+    
+    @abstractmethod
+    def create_lotedata_table(self, df: pd.DataFrame, table_name: str = 'LOTEDATA', if_exists: str = 'replace') -> bool:
         pass
 
 class IDatabaseRepository(ABC):
@@ -35,16 +48,29 @@ class IDatabaseRepository(ABC):
         pass
     
     @abstractmethod
-    def fetch_table_data(self, table_name: str) -> Optional[pd.DataFrame]:
+    def fetch_table_data(self, table_name: str, sort: bool = False) -> Optional[pd.DataFrame]:
+        pass
+    
+    @abstractmethod
+    def fetch_columns(self, table_name: str, columns: List[str],
+                      float_columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        pass
+    
+    @abstractmethod
+    def fetch_table_preview(self, table_name: str, limit: int = 50, sort: bool = True) -> Optional[pd.DataFrame]:
         pass
     
     @abstractmethod
-    def save_lotedata(self, df: pd.DataFrame, table_name: str = 'LOTEDATA') -> bool:
+    def save_lotedata(self, df: pd.DataFrame, table_name: str = 'LOTEDATA', if_exists: str = 'replace') -> bool:
         pass
     
     @abstractmethod
     def check_table_has_timestring_fast(self, table_name: str) -> bool:
         pass
+    
+    @abstractmethod
+    def invalidate(self):
+        pass
 
 class ITableService(ABC):
     @abstractmethod
@@ -72,6 +98,14 @@ class IMigrationService(ABC):
     def get_column_type(self, table_name: str, column_name: str = "TimeString") -> str:
         pass
     
+    @abstractmethod
+    def get_column_types_bulk(self, column_name: str = "TimeString") -> Dict[str, str]:
+        pass
+    
+    @abstractmethod
+    def needs_migration(self) -> bool:
+        pass
+    
     @abstractmethod
     def migrate_timestring_to_datetime(self) -> Dict[str, bool]:
         pass
@@ -82,4 +116,12 @@ class IMigrationService(ABC):
     
     @abstractmethod
     def ensure_tables_ordered(self) -> Dict[str, bool]:
+        pass
+    
+    @abstractmethod
+    def dispose_engine(self):
+        pass
+    
+    @abstractmethod
+    def invalidate_cache(self):
         pass
\ No newline at end of file
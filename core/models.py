@@ -1,7 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, Union
 from enum import Enum
+import numpy as np
+import pandas as pd
 
 class AuthenticationType(Enum):
     SQL_SERVER = "sql_server"
@@ -15,19 +17,73 @@ class Cycle:
     sample_count: int = 0  # Added field for sample count
     duration_minutes: float = 0.0  # Added field for duration
 
+@dataclass
+class CycleArray:
+    """Columnar (structure-of-arrays) storage for the cycles of one table"""
+    cycle_ids: np.ndarray
+    start_times: np.ndarray  # datetime64[ns]
+    end_times: np.ndarray  # datetime64[ns]
+    sample_counts: np.ndarray
+    durations: np.ndarray  # minutes
+
+    @classmethod
+    def empty(cls) -> "CycleArray":
+        return cls(
+            cycle_ids=np.empty(0, dtype=np.int64),
+            start_times=np.empty(0, dtype='datetime64[ns]'),
+            end_times=np.empty(0, dtype='datetime64[ns]'),
+            sample_counts=np.empty(0, dtype=np.int64),
+            durations=np.empty(0, dtype=np.float64)
+        )
+
+    def __len__(self) -> int:
+        return len(self.cycle_ids)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Cycle, "CycleArray"]:
+        """Index like the old List[Cycle]: an int gives a Cycle, a slice a CycleArray"""
+        if isinstance(index, slice):
+            return CycleArray(
+                cycle_ids=self.cycle_ids[index],
+                start_times=self.start_times[index],
+                end_times=self.end_times[index],
+                sample_counts=self.sample_counts[index],
+                durations=self.durations[index]
+            )
+        return Cycle(
+            cycle_id=int(self.cycle_ids[index]),
+            start_time=pd.Timestamp(self.start_times[index]),
+            end_time=pd.Timestamp(self.end_times[index]),
+            sample_count=int(self.sample_counts[index]),
+            duration_minutes=float(self.durations[index])
+        )
+
+    def __iter__(self) -> Iterator[Cycle]:
+        for values in zip(self.cycle_ids.tolist(), pd.DatetimeIndex(self.start_times),
+                          pd.DatetimeIndex(self.end_times), self.sample_counts.tolist(),
+                          self.durations.tolist()):
+            yield Cycle(*values)
+
 @dataclass
 class TableResult:
     table_name: str
-    cycles: List[Cycle]
+    cycles: CycleArray
     total_cycles: int
     time_matched: bool = False  # Added field for cross-table matching
     error_message: str = ""  # Added field for error information
 
+@dataclass
+class AnalysisContext:
+    """Tables under analysis plus their parsed time columns, shared by the analyzer's checks"""
+    raw: Dict[str, pd.DataFrame]
+    time_column: str = "TimeString"
+    parsed: Dict[str, np.ndarray] = field(default_factory=dict)  # table -> valid datetime64[ns]
+
 @dataclass
 class AnalysisConfig:
     time_threshold_minutes: int = 10
     expected_frequency_minutes: int = 5
     time_column: str = "TimeString"
+    trust_schema: bool = False  # TimeString migrated to DATETIME (NULL where unconvertible)
 
 @dataclass
 class DatabaseConfig:
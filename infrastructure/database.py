@@ -1,15 +1,32 @@
 # infrastructure/database.py
+import os
+import tempfile
 from sqlalchemy import create_engine, text, DateTime
 from sqlalchemy.exc import SQLAlchemyError
 from typing import Optional, List
 import pandas as pd
 from core.models import AuthenticationType
+from core.cycle_analyzer import CycleAnalyzer
 from core.interfaces import IDatabaseConnection
 
 class DatabaseConnection(IDatabaseConnection):
+    # Sized to match the concurrent table fetches issued by the UI
+    POOL_SIZE = 8
+    # Rows fetched per round-trip when reading a whole table
+    READ_CHUNK_SIZE = 100_000
+    # Rows per executemany batch when writing LOTEDATA tables
+    WRITE_CHUNK_SIZE = 10_000
+    # SQL Server types whose ORDER BY is chronological
+    DATETIME_TYPES = {'datetime', 'datetime2', 'smalldatetime', 'date', 'datetimeoffset'}
+    # Frames at least this large are loaded with BULK INSERT when the server is local
+    BULK_INSERT_MIN_ROWS = 50_000
+    # BULK INSERT reads its file on the server, so it is only usable on these hosts
+    LOCAL_HOSTS = {'localhost', '127.0.0.1', '::1', '.', '(local)'}
+
     def __init__(self):
         self.engine = None
         self.connection_string = None
+        self.server_is_local = False
         self.excluded_tables = {
             "FactSamples",
             "Cycle_Events"
@@ -30,11 +47,21 @@ class DatabaseConnection(IDatabaseConnection):
                     f"?driver=ODBC+Driver+17+for+SQL+Server"
                 )
             
-            self.engine = create_engine(self.connection_string)
+            # Pooled engine: every fetch reuses a warm connection instead of
+            # paying the TCP + auth handshake again. fast_executemany sends
+            # to_sql inserts as ODBC parameter arrays instead of one row at a time
+            self.engine = create_engine(
+                self.connection_string,
+                pool_size=self.POOL_SIZE,
+                max_overflow=0,
+                pool_pre_ping=True,
+                fast_executemany=True
+            )
             
             # Test connection
             with self.engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
+            self.server_is_local = str(config.host).strip().lower() in self.LOCAL_HOSTS
             return True
         except SQLAlchemyError as e:
             print(f"Connection error: {e}")
@@ -68,51 +95,181 @@ class DatabaseConnection(IDatabaseConnection):
             
             try:
                 with self.engine.connect() as conn:
+                    # sys catalog views are probed through their object_id
+                    # indexes; the INFORMATION_SCHEMA views re-join system
+                    # metadata and check permissions row by row
                     result = conn.execute(text("""
-                        SELECT t.TABLE_NAME
-                        FROM INFORMATION_SCHEMA.TABLES t
-                        INNER JOIN INFORMATION_SCHEMA.COLUMNS c 
-                            ON t.TABLE_NAME = c.TABLE_NAME 
-                            AND t.TABLE_SCHEMA = c.TABLE_SCHEMA
-                        WHERE t.TABLE_TYPE = 'BASE TABLE'
-                        AND c.COLUMN_NAME = 'TimeString'
-                        AND t.TABLE_NAME NOT LIKE 'sys%'
-                        AND t.TABLE_NAME NOT LIKE 'MS%'
-                        AND t.TABLE_NAME NOT IN ('LOTEDATA', 'LOTEDATA_SUMMARY', 'LOTEDATA_DETAILED',
-                                                'LOTE_DATA', 'LOTE_SUMMARY', 'FactSamples')
-                        ORDER BY t.TABLE_NAME
+                        SELECT t.name
+                        FROM sys.tables t
+                        WHERE EXISTS (
+                            SELECT 1 FROM sys.columns c
+                            WHERE c.object_id = t.object_id
+                            AND c.name = 'TimeString'
+                        )
+                        AND t.name NOT LIKE 'sys%'
+                        AND t.name NOT LIKE 'MS%'
+                        AND t.name NOT IN ('LOTEDATA', 'LOTEDATA_SUMMARY', 'LOTEDATA_DETAILED',
+                                           'LOTE_DATA', 'LOTE_SUMMARY', 'FactSamples')
+                        ORDER BY t.name
                     """))
                     return [row[0] for row in result if row[0] not in self.excluded_tables]
             except SQLAlchemyError as e:
                 print(f"Error fetching tables with TimeString: {e}")
                 return []
 
-    def read_table(self, table_name: str) -> Optional[pd.DataFrame]:
+    def table_has_timestring(self, table_name: str) -> bool:
+        """Check a single table for a TimeString column without listing every table"""
+        if not self.engine or table_name in self.excluded_tables:
+            return False
+        
+        try:
+            with self.engine.connect() as conn:
+                # Same filters as get_tables_with_timestring, probed for one name
+                result = conn.execute(text("""
+                    SELECT CASE WHEN EXISTS (
+                        SELECT 1
+                        FROM sys.tables t
+                        INNER JOIN sys.columns c ON c.object_id = t.object_id
+                        WHERE t.name = :table_name
+                        AND c.name = 'TimeString'
+                        AND t.name NOT LIKE 'sys%'
+                        AND t.name NOT LIKE 'MS%'
+                        AND t.name NOT IN ('LOTEDATA', 'LOTEDATA_SUMMARY', 'LOTEDATA_DETAILED',
+                                           'LOTE_DATA', 'LOTE_SUMMARY', 'FactSamples')
+                    ) THEN 1 ELSE 0 END
+                """), {"table_name": table_name})
+                return bool(result.scalar())
+        except SQLAlchemyError as e:
+            print(f"Error checking [{table_name}] for TimeString: {e}")
+            return False
+
+    @staticmethod
+    def _timestring_type(conn, table_name: str) -> Optional[str]:
+        """SQL Server type name of the table's TimeString column, or None if it has none"""
+        return conn.execute(text("""
+            SELECT TYPE_NAME(c.system_type_id)
+            FROM sys.columns c
+            WHERE c.object_id = OBJECT_ID(:table_name) AND c.name = 'TimeString'
+        """), {"table_name": table_name}).scalar()
+    
+    def read_table(self, table_name: str, order_by_timestring: bool = False) -> Optional[pd.DataFrame]:
         if not self.engine:
             return None
         
         try:
-            # Simple query - we'll handle milliseconds in Python
-            query = text(f"SELECT * FROM [{table_name}]")
-            df = pd.read_sql(query, self.engine)
-            
-            # Ensure TimeString is properly handled
-            if 'TimeString' in df.columns:
-                # Convert to datetime if it's not already
-                if not pd.api.types.is_datetime64_any_dtype(df['TimeString']):
-                    df['TimeString'] = pd.to_datetime(df['TimeString'], dayfirst=True, errors='coerce')
+            # Fetch in chunks and normalize each one as it arrives so the raw
+            # result set and its converted copies never coexist in full
+            with self.engine.connect() as conn:
+                # When sorting, let SQL Server hand rows back in TimeString order (an
+                # index scan once the migration created the TimeString index). Only a
+                # DATETIME column orders chronologically: dd/mm/yyyy text would sort
+                # as strings, so those tables keep their stored order
+                order_clause = ""
+                if order_by_timestring and self._timestring_type(conn, table_name) in self.DATETIME_TYPES:
+                    order_clause = " ORDER BY [TimeString]"
+                query = text(f"SELECT * FROM [{table_name}]{order_clause}")
                 
-                # Remove milliseconds from TimeString column itself
-                df['TimeString'] = df['TimeString'].dt.strftime('%Y-%m-%d %H:%M:%S')
-                df['TimeString'] = pd.to_datetime(df['TimeString'], errors='coerce')
+                # Text TimeStrings are parsed by _normalize_timestring with the
+                # explicit format first, rather than by read_sql's inference
+                chunks = [
+                    self._normalize_timestring(chunk)
+                    for chunk in pd.read_sql(query, conn, chunksize=self.READ_CHUNK_SIZE)
+                ]
             
-            return df
+            if not chunks:
+                return pd.DataFrame()
+            if len(chunks) == 1:
+                return chunks[0]
+            return pd.concat(chunks, ignore_index=True)
             
         except SQLAlchemyError as e:
             print(f"Error reading table [{table_name}]: {e}")
             return None
     
-    def create_lotedata_table(self, df: pd.DataFrame, table_name: str = 'LOTEDATA') -> bool:
+    def read_columns(self, table_name: str, columns: List[str],
+                     float_columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """Read only the given columns, skipping rows without a TimeString when it is one of them"""
+        if not self.engine:
+            return None
+        
+        try:
+            quote = self.engine.dialect.identifier_preparer.quote_identifier
+            # Projection and the NULL filter run in SQL Server, so unused columns
+            # and unusable rows never cross the network
+            where_clause = " WHERE [TimeString] IS NOT NULL" if 'TimeString' in columns else ""
+            # float_columns are cast in SQL Server (unconvertible text becomes NULL),
+            # so they arrive as float64 instead of being converted in pandas
+            float_columns = set(float_columns or [])
+            select_list = ', '.join(
+                f"TRY_CAST({quote(col)} AS FLOAT) AS {quote(col)}" if col in float_columns else quote(col)
+                for col in columns
+            )
+            query = text(f"SELECT {select_list} FROM {quote(table_name)}{where_clause}")
+            
+            with self.engine.connect() as conn:
+                chunks = [
+                    self._normalize_timestring(chunk)
+                    for chunk in pd.read_sql(query, conn, chunksize=self.READ_CHUNK_SIZE)
+                ]
+            
+            if not chunks:
+                return pd.DataFrame(columns=columns)
+            if len(chunks) == 1:
+                return chunks[0]
+            return pd.concat(chunks, ignore_index=True)
+            
+        except SQLAlchemyError as e:
+            print(f"Error reading columns of table [{table_name}]: {e}")
+            return None
+    
+    def read_table_preview(self, table_name: str, limit: int = 50, order_by_timestring: bool = True) -> Optional[pd.DataFrame]:
+        """Read only the first rows of a table instead of materializing all of it"""
+        if not self.engine:
+            return None
+        
+        try:
+            with self.engine.connect() as conn:
+                order_clause = ""
+                timestring_type = self._timestring_type(conn, table_name) if order_by_timestring else None
+                if timestring_type is not None:
+                    if timestring_type in self.DATETIME_TYPES:
+                        order_clause = " ORDER BY [TimeString]"
+                    else:
+                        # dd/mm/yyyy text sorts as strings, so pick the first rows by
+                        # their converted time (unconvertible values last)
+                        as_time = "TRY_CONVERT(DATETIME, [TimeString], 103)"
+                        order_clause = f" ORDER BY CASE WHEN {as_time} IS NULL THEN 1 ELSE 0 END, {as_time}"
+                query = text(f"SELECT TOP ({int(limit)}) * FROM [{table_name}]{order_clause}")
+                df = pd.read_sql(query, conn)
+            return self._normalize_timestring(df)
+            
+        except SQLAlchemyError as e:
+            print(f"Error reading preview of table [{table_name}]: {e}")
+            return None
+    
+    def _normalize_timestring(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Ensure TimeString is datetime without milliseconds"""
+        if 'TimeString' in df.columns:
+            # Convert to datetime if it's not already
+            if not pd.api.types.is_datetime64_any_dtype(df['TimeString']):
+                df['TimeString'] = CycleAnalyzer.parse_time_string(df['TimeString'])
+            
+            # Remove milliseconds from TimeString column itself (no string round-trip)
+            df['TimeString'] = self._truncate_to_seconds(df['TimeString'])
+        
+        return df
+    
+    @staticmethod
+    def _truncate_to_seconds(series: pd.Series):
+        """Drop sub-second precision with two numpy casts on the datetime64 buffer"""
+        values = series.to_numpy()
+        if values.dtype.kind != 'M':
+            # tz-aware columns come back as objects; let pandas handle those
+            return series.dt.floor('s')
+        return values.astype('datetime64[s]').astype(values.dtype)
+    
+    def create_lotedata_table(self, df: pd.DataFrame, table_name: str = 'LOTEDATA', if_exists: str = 'replace') -> bool:
+        """Write df to table_name, replacing the table or appending to it as if_exists says"""
         if not self.engine:
             return False
         
@@ -139,11 +296,9 @@ class DatabaseConnection(IDatabaseConnection):
                     return False
             
             # Ensure TimeString is datetime type for Power BI compatibility
-            if 'TimeString' in df.columns:
-                df = df.copy()
-                # Convert to datetime if it's not already
-                if not pd.api.types.is_datetime64_any_dtype(df['TimeString']):
-                    df['TimeString'] = pd.to_datetime(df['TimeString'], dayfirst=True, errors='coerce')
+            # Convert to datetime if it's not already (assign leaves the caller's frame as is)
+            if 'TimeString' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['TimeString']):
+                df = df.assign(TimeString=CycleAnalyzer.parse_time_string(df['TimeString']))
             
             # Remove unwanted columns from any table
             unwanted_columns = ['VarName', 'Validity', 'Time_ms', 'VarName', 'Validity', 'Time_ms']
@@ -155,17 +310,68 @@ class DatabaseConnection(IDatabaseConnection):
             if 'TimeString' in df.columns:
                 dtype_mapping['TimeString'] = DateTime()
             
+            # BULK INSERT maps file fields to table columns by position, so it is
+            # only used for tables it creates itself
+            if not (if_exists == 'replace' and self.server_is_local
+                    and len(df) >= self.BULK_INSERT_MIN_ROWS
+                    and self._bulk_insert(df, table_name, dtype_mapping)):
+                self._write_with_to_sql(df, table_name, dtype_mapping, if_exists)
+            
+            action = "created table" if if_exists == 'replace' else f"wrote {len(df)} rows to"
+            print(f"Successfully {action}: {table_name} with columns: {list(df.columns)}")
+            return True
+            
+        except SQLAlchemyError as e:
+            print(f"Error creating {table_name} table: {e}")
+            return False    
+    def _write_with_to_sql(self, df: pd.DataFrame, table_name: str, dtype_mapping: dict,
+                           if_exists: str = 'replace'):
+        """Write df to table_name through batched parameterized INSERTs"""
+        # One transaction for the whole write. fast_executemany already sends
+        # each chunk as a parameter array (method='multi' would only hit the
+        # 2100-parameter limit); NOCOUNT drops the per-batch row-count messages
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql("SET NOCOUNT ON")
             df.to_sql(
                 table_name, 
-                self.engine, 
-                if_exists='replace', 
+                conn, 
+                if_exists=if_exists, 
                 index=False,
-                dtype=dtype_mapping
+                dtype=dtype_mapping,
+                chunksize=self.WRITE_CHUNK_SIZE
             )
+            # The pooled connection is reused by code that reads rowcount. Only
+            # reset on success, so a failed write raises its own error
+            conn.exec_driver_sql("SET NOCOUNT OFF")
+    
+    def _bulk_insert(self, df: pd.DataFrame, table_name: str, dtype_mapping: dict) -> bool:
+        """Replace table_name with df through a temp file and BULK INSERT; False if it could not be used"""
+        fd, path = tempfile.mkstemp(suffix='.dat', prefix='lotes_')
+        os.close(fd)
+        try:
+            # \x01 never appears in the exported values; ISO 8601 with the 'T'
+            # separator is read the same way whatever the session DATEFORMAT is
+            df.to_csv(path, sep='\x01', index=False, header=False,
+                      lineterminator='\n', date_format='%Y-%m-%dT%H:%M:%S')
             
-            print(f"Successfully created table: {table_name} with columns: {list(df.columns)}")
+            quoted_table = self.engine.dialect.identifier_preparer.quote_identifier(table_name)
+            with self.engine.begin() as conn:
+                # Create the (empty) table with the same column types to_sql would use
+                df.head(0).to_sql(table_name, conn, if_exists='replace', index=False, dtype=dtype_mapping)
+                # TABLOCK on the freshly created heap lets SQL Server log the load minimally
+                conn.exec_driver_sql(
+                    f"BULK INSERT {quoted_table} FROM '{path.replace(chr(39), chr(39) * 2)}' "
+                    "WITH (FIELDTERMINATOR = '0x01', ROWTERMINATOR = '0x0a', "
+                    "CODEPAGE = '65001', TABLOCK)"
+                )
+            print(f"⚡ Bulk loaded {len(df)} rows into {table_name}")
             return True
             
-        except SQLAlchemyError as e:
-            print(f"Error creating {table_name} table: {e}")
-            return False
\ No newline at end of file
+        except (SQLAlchemyError, OSError) as e:
+            print(f"⚠️ BULK INSERT into {table_name} unavailable, using batched inserts: {e}")
+            return False
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
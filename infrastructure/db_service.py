@@ -1,6 +1,7 @@
 # infrastructure/db_service.py
 from core.models import DatabaseConfig, AuthenticationType
 from core.interfaces import IDatabaseConnection, IDatabaseRepository, ITableService, IMigrationService
+from core.cycle_analyzer import CycleAnalyzer
 import pandas as pd
 from typing import Dict
 
@@ -14,20 +15,37 @@ class DatabaseService:
     
     def connect_to_database(self, config: DatabaseConfig) -> bool:
         success = self.connection.connect(config)
+        # Cached table lists and server options belong to the previous database
+        if self.repository:
+            self.repository.invalidate()
+        if self.migration_service:
+            self.migration_service.invalidate_cache()
+            self.migration_service.dispose_engine()
         return success
     
+    def needs_migration(self) -> bool:
+        """Cheap precheck: is there any TimeString column left to migrate or index?"""
+        if self.migration_service:
+            return self.migration_service.needs_migration()
+        return False
+    
     def migrate_database_schema(self) -> Dict[str, bool]:
         """Migrate all TimeString columns to datetime type"""
         if self.migration_service:
             print("🚀 Starting database migration...")
-            print("Step 1: Converting TimeString columns to DATETIME")
-            migration_results = self.migration_service.migrate_timestring_to_datetime()
-            
-            print("\nStep 2: Creating indexes for better performance")
-            index_results = self.migration_service.create_indexes_on_timestring()
-            
-            print("\nStep 3: Ensuring physical ordering by TimeString")
-            ordering_results = self.migration_service.ensure_tables_ordered()
+            try:
+                print("Step 1: Converting TimeString columns to DATETIME")
+                migration_results = self.migration_service.migrate_timestring_to_datetime()
+                
+                # The clustered index goes first: building it afterwards would rebuild
+                # every nonclustered index to swap row locators for the clustering key
+                print("\nStep 2: Ensuring physical ordering by TimeString")
+                ordering_results = self.migration_service.ensure_tables_ordered()
+                
+                print("\nStep 3: Creating indexes for better performance")
+                index_results = self.migration_service.create_indexes_on_timestring()
+            finally:
+                self.migration_service.dispose_engine()
             
             # Count successful migrations
             successful_migrations = sum(1 for result in migration_results.values() if result)
@@ -56,50 +74,66 @@ class DatabaseService:
             return self.repository.get_tables_with_timestring()
         return []
     
-    def fetch_table_data(self, table_name: str):
+    def fetch_table_data(self, table_name: str, sort: bool = False):
+        """Fetch a whole table in stored order (sort=True lets SQL Server order DATETIME TimeStrings)"""
         if self.repository:
-            return self.repository.fetch_table_data(table_name)
+            return self.repository.fetch_table_data(table_name, sort)
         return None
     
+    def fetch_table_columns(self, table_name: str, columns: list, float_columns: list = None):
+        """Fetch only the given columns of a table (rows with a NULL TimeString are skipped in SQL)"""
+        if self.repository:
+            return self.repository.fetch_columns(table_name, columns, float_columns)
+        return None
+    
+    def fetch_table_preview(self, table_name: str, limit: int = 50, sort: bool = True, time_column: str = "TimeString"):
+        """
+        Fetch only the first rows of a table (ordered by TimeString in SQL when sorting)
+        """
+        if not self.repository:
+            return None
+        
+        df = self.repository.fetch_table_preview(table_name, limit, sort)
+        if df is not None and sort:
+            return self.table_service.sort_table_by_timestring(df, time_column)
+        return df
+    
     def fetch_and_sort_table_data(self, table_name: str, time_column: str = "TimeString"):
         """
         Fetch table data, convert to datetime, and sort
         """
-        df = self.fetch_table_data(table_name)
+        df = self.fetch_table_data(table_name, sort=True)
         if df is not None:
-            # Verify conversion before and after
-            print(f"🔍 Verifying datetime conversion for {table_name}:")
-            before = self.table_service.verify_datetime_conversion(df, time_column)
-            print(f"   Before: {before}")
-            
+            # read_table already hands TimeString back as datetime, so a single
+            # check after sorting reports the same counts without a second scan
             processed_df = self.table_service.sort_table_by_timestring(df, time_column)
             
             if processed_df is not None:
+                print(f"🔍 Verifying datetime conversion for {table_name}:")
                 after = self.table_service.verify_datetime_conversion(processed_df, time_column)
                 print(f"   After: {after}")
             
             return processed_df
         return None
     
-    def save_lotedata(self, df, table_name: str = 'LOTEDATA'):
+    def save_lotedata(self, df, table_name: str = 'LOTEDATA', if_exists: str = 'replace'):
         print(f"DEBUG: Saving {table_name} with shape {df.shape}")
         print(f"DEBUG: {table_name} columns: {list(df.columns)}")
         
         if self.repository:
             # Ensure TimeString is properly formatted for Power BI
             if 'TimeString' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['TimeString']):
-                df = df.copy()
-                df['TimeString'] = pd.to_datetime(df['TimeString'], dayfirst=True, errors='coerce')
+                # New frame with just the converted column; the caller's frame is untouched
+                df = df.assign(TimeString=CycleAnalyzer.parse_time_string(df['TimeString']))
             
-            success = self.repository.save_lotedata(df, table_name)
+            success = self.repository.save_lotedata(df, table_name, if_exists)
             print(f"DEBUG: Save {table_name} result: {success}")
             return success
         return False
     
     def check_table_has_timestring(self, table_name: str) -> bool:
-        """Check if a table has a TimeString column by loading data"""
-        df = self.fetch_table_data(table_name)
-        return df is not None and any(col.lower() == 'timestring' for col in df.columns)
+        """Check if a table has a TimeString column (schema lookup, no data is loaded)"""
+        return self.check_table_has_timestring_fast(table_name)
     
     def check_table_has_timestring_fast(self, table_name: str) -> bool:
         """Fast check if table has TimeString column without loading data"""
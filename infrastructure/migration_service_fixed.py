@@ -1,19 +1,107 @@
 # infrastructure/migration_service_fixed.py
-from sqlalchemy import text
+from sqlalchemy import create_engine, text, bindparam
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.exc import SQLAlchemyError
-from typing import List, Dict
+from typing import List, Dict, Optional, Callable, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import queue
 import pandas as pd
 from core.interfaces import IMigrationService
 
 class MigrationService(IMigrationService):
+    # Tables migrated/indexed concurrently; matches DatabaseConnection.POOL_SIZE
+    MAX_WORKERS = 8
+    # Above this many rows a bare heap is rebuilt with SELECT INTO instead of backfilled in place
+    LARGE_TABLE_ROWS = 1_000_000
+    
+    # Per-table metadata queries, built once and reused (SQLAlchemy caches their compiled form)
+    COLUMN_TYPE_SQL = text("""
+        SELECT DATA_TYPE 
+        FROM INFORMATION_SCHEMA.COLUMNS 
+        WHERE TABLE_NAME = :table_name 
+        AND COLUMN_NAME = :column_name
+    """)
+    # SELECT INTO copies columns and IDENTITY only; any index, constraint,
+    # default, trigger, incoming foreign key, computed column definition,
+    # permission or extended property would be lost in a table swap
+    SWAP_BLOCKERS_SQL = text("""
+        SELECT
+            (SELECT COUNT(*) FROM sys.indexes WHERE object_id = OBJECT_ID(:table_name) AND index_id > 0)
+          + (SELECT COUNT(*) FROM sys.objects WHERE parent_object_id = OBJECT_ID(:table_name))
+          + (SELECT COUNT(*) FROM sys.foreign_keys WHERE referenced_object_id = OBJECT_ID(:table_name))
+          + (SELECT COUNT(*) FROM sys.computed_columns WHERE object_id = OBJECT_ID(:table_name))
+          + (SELECT COUNT(*) FROM sys.database_permissions WHERE class = 1 AND major_id = OBJECT_ID(:table_name))
+          + (SELECT COUNT(*) FROM sys.extended_properties WHERE class = 1 AND major_id = OBJECT_ID(:table_name))
+    """)
+    TABLE_COLUMNS_SQL = text("""
+        SELECT name FROM sys.columns
+        WHERE object_id = OBJECT_ID(:table_name)
+        ORDER BY column_id
+    """)
+    INDEX_METADATA_SQL = text("""
+        SELECT o.name, i.name, i.is_primary_key
+        FROM sys.indexes i
+        INNER JOIN sys.objects o ON i.object_id = o.object_id
+        WHERE o.type = 'U'
+        AND o.name IN :tables
+        AND (i.is_primary_key = 1 OR i.name LIKE 'IX[_]%[_]TimeString%')
+    """).bindparams(bindparam("tables", expanding=True))
+    
     def __init__(self, db_connection):
         self.db_connection = db_connection
         self.excluded_tables = {"LOTE_DATA", "LOTE_SUMMARY", "FactSamples", "Cycle_Events"}
+        # The three migration steps each need this list; query it once
+        self._timestring_tables_cache: Optional[List[str]] = None
+        self._index_options_cache: Optional[str] = None
+        self._engine: Optional[Engine] = None
+    
+    @property
+    def engine(self) -> Engine:
+        """Dedicated engine for the migration's short, back-to-back DDL sessions"""
+        if self._engine is None:
+            if not getattr(self.db_connection, "connection_string", None):
+                return self.db_connection.engine
+            # Connections are checked out and used immediately, so the pre-ping
+            # round-trip buys nothing; every worker closes its own transactions,
+            # so the rollback on check-in is skipped too. Not meant for idle
+            # application traffic: dispose_engine() once the migration is done
+            self._engine = create_engine(
+                self.db_connection.connection_string,
+                pool_size=self.MAX_WORKERS,
+                max_overflow=0,
+                pool_pre_ping=False,
+                pool_reset_on_return=None,
+                fast_executemany=True
+            )
+        return self._engine
+    
+    def dispose_engine(self):
+        """Close the migration engine's pooled connections"""
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+    
+    def _quote(self, name: str) -> str:
+        """Dialect-quoted identifier for DDL, e.g. [My]]Table] on SQL Server"""
+        return self.engine.dialect.identifier_preparer.quote_identifier(name)
+    
+    @staticmethod
+    def _literal(value: str) -> str:
+        """N'...' string literal for names passed to OBJECT_ID, EXEC or sp_rename"""
+        return "N'" + value.replace("'", "''") + "'"
+    
+    def invalidate_cache(self):
+        """Forget cached schema metadata so the next lookup hits the database"""
+        self._timestring_tables_cache = None
+        self._index_options_cache = None
     
     def get_tables_with_timestring(self) -> List[str]:
         """Get all tables that have a TimeString column"""
+        if self._timestring_tables_cache is not None:
+            return list(self._timestring_tables_cache)
+        
         try:
-            with self.db_connection.engine.connect() as conn:
+            with self.engine.connect() as conn:
                 result = conn.execute(text("""
                     SELECT DISTINCT t.TABLE_NAME
                     FROM INFORMATION_SCHEMA.TABLES t
@@ -27,7 +115,8 @@ class MigrationService(IMigrationService):
                 """))
                 tables = [row[0] for row in result]
                 # 🚫 Exclude LOTE tables
-                return [t for t in tables if t not in self.excluded_tables]
+                self._timestring_tables_cache = [t for t in tables if t not in self.excluded_tables]
+                return list(self._timestring_tables_cache)
         except SQLAlchemyError as e:
             print(f"Error getting tables with TimeString: {e}")
             return []
@@ -35,161 +124,355 @@ class MigrationService(IMigrationService):
     def get_column_type(self, table_name: str, column_name: str = "TimeString") -> str:
         """Get the current data type of a column"""
         try:
-            with self.db_connection.engine.connect() as conn:
-                result = conn.execute(text(f"""
-                    SELECT DATA_TYPE 
-                    FROM INFORMATION_SCHEMA.COLUMNS 
-                    WHERE TABLE_NAME = '{table_name}' 
-                    AND COLUMN_NAME = '{column_name}'
-                """))
+            with self.engine.connect() as conn:
+                result = conn.execute(self.COLUMN_TYPE_SQL, {"table_name": table_name, "column_name": column_name})
                 return result.scalar() or "unknown"
         except SQLAlchemyError as e:
             print(f"Error getting column type for {table_name}.{column_name}: {e}")
             return "unknown"
     
+    def get_column_types_bulk(self, column_name: str = "TimeString") -> Dict[str, str]:
+        """Get the data type of a column for every table that has it, in one query"""
+        try:
+            with self.engine.connect() as conn:
+                result = conn.execute(text("""
+                    SELECT TABLE_NAME, DATA_TYPE 
+                    FROM INFORMATION_SCHEMA.COLUMNS 
+                    WHERE COLUMN_NAME = :column_name
+                """), {"column_name": column_name})
+                return {row[0]: row[1] for row in result}
+        except SQLAlchemyError as e:
+            print(f"Error getting column types for {column_name}: {e}")
+            return {}
+    
+    def needs_migration(self) -> bool:
+        """Check whether any TimeString column still needs converting or indexing"""
+        try:
+            # A one-off probe: use the application engine so a skipped migration
+            # never opens the dedicated migration pool
+            with self.db_connection.engine.connect() as conn:
+                # Stops at the first table that isn't DATETIME yet or lacks its
+                # TimeString index, instead of sweeping every table
+                result = conn.execute(
+                    text("""
+                        SELECT TOP 1 1
+                        FROM sys.tables t
+                        INNER JOIN sys.columns c ON c.object_id = t.object_id
+                        WHERE c.name = 'TimeString'
+                        AND t.name NOT LIKE 'sys%'
+                        AND t.name NOT LIKE 'MS%'
+                        AND t.name NOT IN :excluded
+                        AND (
+                            TYPE_NAME(c.system_type_id) <> 'datetime'
+                            OR NOT EXISTS (
+                                SELECT 1 FROM sys.indexes i
+                                WHERE i.object_id = t.object_id
+                                AND i.name = 'IX_' + t.name + '_TimeString'
+                            )
+                        )
+                    """).bindparams(bindparam("excluded", expanding=True)),
+                    {"excluded": sorted(self.excluded_tables)}
+                )
+                return result.scalar() is not None
+        except SQLAlchemyError as e:
+            # Can't tell; let the full migration sweep decide per table
+            print(f"Error checking whether migration is needed: {e}")
+            return True
+    
+    def get_tables_needing_migration(self) -> Optional[Dict[str, str]]:
+        """Get the tables whose TimeString column isn't DATETIME yet, with its current type"""
+        try:
+            with self.engine.connect() as conn:
+                result = conn.execute(text("""
+                    SELECT t.name, c.DATA_TYPE
+                    FROM sys.tables t
+                    INNER JOIN INFORMATION_SCHEMA.COLUMNS c
+                    ON c.TABLE_NAME = t.name
+                    AND c.TABLE_SCHEMA = SCHEMA_NAME(t.schema_id)
+                    WHERE c.COLUMN_NAME = 'TimeString'
+                    AND c.DATA_TYPE <> 'datetime'
+                """))
+                return {row[0]: row[1] for row in result if row[0] not in self.excluded_tables}
+        except SQLAlchemyError as e:
+            print(f"Error getting tables that need migration: {e}")
+            return None
+    
+    def get_row_counts_bulk(self) -> Dict[str, int]:
+        """Get the row count of every user table from partition metadata, in one query"""
+        try:
+            with self.engine.connect() as conn:
+                result = conn.execute(text("""
+                    SELECT t.name, SUM(p.rows)
+                    FROM sys.tables t
+                    INNER JOIN sys.partitions p ON p.object_id = t.object_id
+                    WHERE p.index_id IN (0, 1)
+                    GROUP BY t.name
+                """))
+                return {row[0]: int(row[1] or 0) for row in result}
+        except SQLAlchemyError as e:
+            print(f"Error getting table row counts: {e}")
+            return {}
+    
+    def _run_per_table(self, worker: Callable[[Connection, str], bool], tables: List[str]) -> Dict[str, bool]:
+        """Run an independent per-table DDL step for every table on a thread pool"""
+        if not tables:
+            return {}
+        
+        pending = queue.SimpleQueue()
+        for table_name in tables:
+            pending.put(table_name)
+        results = {}
+        
+        def drain():
+            # One connection per thread for all the tables it picks up; the
+            # worker commits each table in its own conn.begin() block
+            try:
+                with self.engine.connect() as conn:
+                    while True:
+                        try:
+                            table_name = pending.get_nowait()
+                        except queue.Empty:
+                            return
+                        results[table_name] = worker(conn, table_name)
+            except SQLAlchemyError as e:
+                print(f"❌ Connection error during migration step: {e}")
+        
+        # Each thread holds one pooled connection, so the pool
+        # (DatabaseConnection.POOL_SIZE) must be at least MAX_WORKERS
+        workers = min(self.MAX_WORKERS, len(tables))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for _ in range(workers):
+                executor.submit(drain)
+        
+        # Tables never reached because a connection failed count as failed
+        return {table_name: results.get(table_name, False) for table_name in tables}
+    
     def migrate_timestring_to_datetime(self) -> Dict[str, bool]:
         """Migrate all TimeString columns from char to datetime type"""
-        results = {}
         tables = self.get_tables_with_timestring()
+        pending = self.get_tables_needing_migration()
+        if pending is None:
+            return {table_name: False for table_name in tables}
         
-        for table_name in tables:
-            try:
-                current_type = self.get_column_type(table_name)
-                print(f"Table: {table_name}, Current TimeString type: {current_type}")
+        # Tables the filter left out are already DATETIME; no per-table work needed
+        results = {table_name: True for table_name in tables if table_name not in pending}
+        if results:
+            print(f"✅ {len(results)} tables already have a DATETIME TimeString")
+        
+        to_migrate = [table_name for table_name in tables if table_name in pending]
+        if to_migrate:
+            row_counts = self.get_row_counts_bulk()
+            results.update(self._run_per_table(
+                lambda conn, table_name: self._migrate_table(conn, table_name, pending[table_name], row_counts.get(table_name, 0)),
+                to_migrate
+            ))
+            # Column types changed; the table list itself is re-read on next use
+            self.invalidate_cache()
+        
+        return {table_name: results[table_name] for table_name in tables}
+    
+    def _migrate_table(self, conn: Connection, table_name: str, current_type: str, row_count: int = 0) -> bool:
+        """Convert one table's TimeString column to DATETIME"""
+        try:
+            print(f"Table: {table_name}, Current TimeString type: {current_type}")
+            
+            if current_type.lower() in ['varchar', 'char', 'nvarchar', 'nchar', 'text']:
+                if row_count >= self.LARGE_TABLE_ROWS:
+                    columns = self._get_swappable_columns(conn, table_name)
+                    if columns:
+                        return self._swap_table(conn, table_name, columns)
                 
-                if current_type.lower() in ['varchar', 'char', 'nvarchar', 'nchar', 'text']:
-                    # Use a single transaction for all operations
-                    with self.db_connection.engine.begin() as conn:
-                        # Step 1: Add a new datetime column
-                        conn.execute(text(f"""
-                            ALTER TABLE [{table_name}]
-                            ADD TimeString_temp DATETIME
-                        """))
-                        
-                        # Step 2: Convert and copy data using proper format
-                        conn.execute(text(f"""
-                            UPDATE [{table_name}]
-                            SET TimeString_temp = TRY_CONVERT(DATETIME, TimeString, 103)
-                            WHERE TRY_CONVERT(DATETIME, TimeString, 103) IS NOT NULL
-                        """))
-                        
-                        # Step 3: Drop the old column
-                        conn.execute(text(f"""
-                            ALTER TABLE [{table_name}]
-                            DROP COLUMN TimeString
-                        """))
-                        
-                        # Step 4: Rename the new column (KEEP AS DATETIME)
-                        conn.execute(text(f"""
-                            EXEC sp_rename '{table_name}.TimeString_temp', 'TimeString', 'COLUMN'
-                        """))
-                    
-                    print(f"✅ Successfully migrated {table_name}.TimeString to DATETIME")
-                    results[table_name] = True
+                # Use a single transaction and a single round-trip for all operations.
+                # T-SQL can't mix ADD and DROP COLUMN in one ALTER TABLE, and a batch
+                # is compiled as a whole, so the UPDATE that references the new column
+                # goes through EXEC to be compiled only after the ADD has run.
+                # TRY_CONVERT already yields NULL for unparseable values, so no
+                # WHERE filter is needed (it would convert every row twice).
+                # Indexes on the old column would block its DROP; they're dropped up
+                # front (nonclustered before clustered) and rebuilt on the DATETIME
+                # column by ensure_tables_ordered / create_indexes_on_timestring.
+                # XACT_ABORT rolls the whole table back on any error, so a failure
+                # can't leave TimeString_temp behind; one left by an interrupted
+                # older run is dropped before the ADD
+                table = self._quote(table_name)
+                update = f"UPDATE {table} SET TimeString_temp = TRY_CONVERT(DATETIME, TimeString, 103)"
+                with conn.begin():
+                    conn.exec_driver_sql(f"""
+                        SET NOCOUNT ON;
+                        SET XACT_ABORT ON;
+                        DECLARE @drop_indexes NVARCHAR(MAX) = N'';
+                        SELECT @drop_indexes += N'DROP INDEX ' + QUOTENAME(i.name)
+                                              + N' ON ' + QUOTENAME(OBJECT_NAME(i.object_id)) + N';'
+                        FROM sys.indexes i
+                        WHERE i.object_id = OBJECT_ID({self._literal(table)})
+                        AND i.is_primary_key = 0
+                        AND i.is_unique_constraint = 0
+                        AND EXISTS (
+                            SELECT 1 FROM sys.index_columns ic
+                            INNER JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+                            WHERE ic.object_id = i.object_id AND ic.index_id = i.index_id
+                            AND c.name = 'TimeString'
+                        )
+                        ORDER BY i.index_id DESC;
+                        EXEC(@drop_indexes);
+                        IF COL_LENGTH({self._literal(table)}, 'TimeString_temp') IS NOT NULL
+                            ALTER TABLE {table} DROP COLUMN TimeString_temp;
+                        ALTER TABLE {table} ADD TimeString_temp DATETIME;
+                        EXEC({self._literal(update)});
+                        ALTER TABLE {table} DROP COLUMN TimeString;
+                        EXEC sp_rename {self._literal(table + '.TimeString_temp')}, N'TimeString', 'COLUMN';
+                    """)
                 
-                elif current_type.lower() == 'datetime':
-                    print(f"✅ {table_name}.TimeString is already DATETIME")
-                    results[table_name] = True
-                else:
-                    print(f"⚠️ {table_name}.TimeString has unexpected type: {current_type}")
-                    results[table_name] = False
-                    
-            except SQLAlchemyError as e:
-                print(f"❌ Error migrating {table_name}: {e}")
-                # Check if the temporary column exists and clean up if needed
-                try:
-                    with self.db_connection.engine.connect() as conn:
-                        result = conn.execute(text(f"""
-                            SELECT COUNT(*) 
-                            FROM INFORMATION_SCHEMA.COLUMNS 
-                            WHERE TABLE_NAME = '{table_name}' 
-                            AND COLUMN_NAME = 'TimeString_temp'
-                        """))
-                        if result.scalar() > 0:
-                            conn.execute(text(f"""
-                                ALTER TABLE [{table_name}]
-                                DROP COLUMN TimeString_temp
-                            """))
-                            print(f"Cleaned up temporary column in {table_name}")
-                except:
-                    pass
+                print(f"✅ Successfully migrated {table_name}.TimeString to DATETIME")
+                return True
+            
+            else:
+                print(f"⚠️ {table_name}.TimeString has unexpected type: {current_type}")
+                return False
                 
-                results[table_name] = False
-        
-        return results
+        except SQLAlchemyError as e:
+            print(f"❌ Error migrating {table_name}: {e}")
+            return False
+    
+    def _get_swappable_columns(self, conn: Connection, table_name: str) -> List[str]:
+        """Column names of a table that SELECT INTO can rebuild without losing anything, else []"""
+        try:
+            # OBJECT_ID parses its argument as a multi-part name, so pass it quoted
+            params = {"table_name": self._quote(table_name)}
+            with conn.begin():
+                if conn.execute(self.SWAP_BLOCKERS_SQL, params).scalar():
+                    return []
+                result = conn.execute(self.TABLE_COLUMNS_SQL, params)
+                return [row[0] for row in result]
+        except SQLAlchemyError as e:
+            print(f"Error inspecting {table_name} for table swap: {e}")
+            return []
+    
+    def _swap_table(self, conn: Connection, table_name: str, columns: List[str]) -> bool:
+        """Rebuild a large heap with TimeString converted via SELECT INTO and swap it in"""
+        select_list = ", ".join(
+            "TRY_CONVERT(DATETIME, TimeString, 103) AS TimeString" if column == "TimeString"
+            else self._quote(column)
+            for column in columns
+        )
+        table = self._quote(table_name)
+        # SELECT INTO is minimally logged under SIMPLE/BULK_LOGGED recovery and
+        # writes every row once, instead of an UPDATE plus a column drop
+        with conn.begin():
+            conn.exec_driver_sql(f"""
+                SET NOCOUNT ON;
+                SET XACT_ABORT ON;
+                SELECT {select_list} INTO {self._quote(table_name + '_new')} FROM {table};
+                EXEC sp_rename {self._literal(table)}, {self._literal(table_name + '_old')};
+                EXEC sp_rename {self._literal(self._quote(table_name + '_new'))}, {self._literal(table_name)};
+                DROP TABLE {self._quote(table_name + '_old')};
+            """)
+        print(f"✅ Successfully migrated {table_name}.TimeString to DATETIME (table rebuilt)")
+        return True
+    
+    def get_index_metadata(self, tables: List[str]) -> Optional[Tuple[Set[Tuple[str, str]], Set[str]]]:
+        """Get the existing (table, index) TimeString indexes and the tables with a primary key, in one query"""
+        existing = set()
+        primary_key_tables = set()
+        try:
+            with self.engine.connect() as conn:
+                # Chunked to stay under SQL Server's 2100-parameter limit
+                for i in range(0, len(tables), 1000):
+                    result = conn.execute(self.INDEX_METADATA_SQL, {"tables": tables[i:i + 1000]})
+                    for table_name, index_name, is_primary_key in result:
+                        if is_primary_key:
+                            primary_key_tables.add(table_name)
+                        else:
+                            existing.add((table_name, index_name))
+            return existing, primary_key_tables
+        except SQLAlchemyError as e:
+            print(f"Error getting index metadata: {e}")
+            return None
+    
+    def get_index_options(self) -> str:
+        """WITH clause for TimeString index builds, based on what the server edition supports"""
+        if self._index_options_cache is None:
+            # Sorting in tempdb keeps the sort runs out of the user database's log
+            options = ["SORT_IN_TEMPDB = ON"]
+            try:
+                with self.engine.connect() as conn:
+                    edition = conn.execute(text("SELECT CAST(SERVERPROPERTY('EngineEdition') AS INT)")).scalar()
+                # Online builds (writers aren't blocked) and page compression need
+                # Enterprise/Developer (3), Azure SQL Database (5) or Managed Instance (8)
+                if edition in (3, 5, 8):
+                    options += ["ONLINE = ON", "DATA_COMPRESSION = PAGE"]
+            except SQLAlchemyError as e:
+                print(f"Error reading server edition, using basic index options: {e}")
+            self._index_options_cache = f"WITH ({', '.join(options)})"
+        return self._index_options_cache
     
     def create_indexes_on_timestring(self) -> Dict[str, bool]:
         """Create indexes on TimeString columns for better performance"""
-        results = {}
         tables = self.get_tables_with_timestring()
+        metadata = self.get_index_metadata(tables)
+        if metadata is None:
+            return {table_name: False for table_name in tables}
+        existing, _ = metadata
+        self.get_index_options()
+        return self._run_per_table(lambda conn, table_name: self._create_index(conn, table_name, existing), tables)
+    
+    def _create_index(self, conn: Connection, table_name: str, existing: Set[Tuple[str, str]]) -> bool:
+        """Create the TimeString index on one table if it's missing"""
+        index_name = f"IX_{table_name}_TimeString"
+        if (table_name, index_name) in existing:
+            print(f"✅ Index already exists on {table_name}.TimeString")
+            return True
         
-        for table_name in tables:
-            try:
-                # Check if index already exists
-                with self.db_connection.engine.connect() as conn:
-                    result = conn.execute(text(f"""
-                        SELECT COUNT(*) 
-                        FROM sys.indexes 
-                        WHERE object_id = OBJECT_ID('{table_name}') 
-                        AND name = 'IX_{table_name}_TimeString'
-                    """))
-                    if result.scalar() == 0:
-                        conn.execute(text(f"""
-                            CREATE INDEX IX_{table_name}_TimeString 
-                            ON [{table_name}] (TimeString)
-                        """))
-                        print(f"✅ Created index on {table_name}.TimeString")
-                    else:
-                        print(f"✅ Index already exists on {table_name}.TimeString")
-                results[table_name] = True
-            except SQLAlchemyError as e:
-                print(f"❌ Error creating index on {table_name}: {e}")
-                results[table_name] = False
-        
-        return results
+        try:
+            with conn.begin():
+                conn.exec_driver_sql(f"""
+                    CREATE INDEX {self._quote(index_name)} 
+                    ON {self._quote(table_name)} (TimeString)
+                    {self.get_index_options()}
+                """)
+                print(f"✅ Created index on {table_name}.TimeString")
+            return True
+        except SQLAlchemyError as e:
+            print(f"❌ Error creating index on {table_name}: {e}")
+            return False
     
     def ensure_tables_ordered(self) -> Dict[str, bool]:
         """Ensure all tables have clustered index on TimeString for physical ordering"""
-        results = {}
         tables = self.get_tables_with_timestring()
+        metadata = self.get_index_metadata(tables)
+        if metadata is None:
+            return {table_name: False for table_name in tables}
+        existing, primary_key_tables = metadata
+        self.get_index_options()
+        return self._run_per_table(
+            lambda conn, table_name: self._ensure_table_ordered(conn, table_name, existing, primary_key_tables),
+            tables
+        )
+    
+    def _ensure_table_ordered(self, conn: Connection, table_name: str, existing: Set[Tuple[str, str]],
+                              primary_key_tables: Set[str]) -> bool:
+        """Create the clustered TimeString index on one table unless it has a primary key"""
+        if table_name in primary_key_tables:
+            print(f"⚠️ {table_name} has primary key, skipping clustered index")
+            return True
         
-        for table_name in tables:
-            try:
-                # Check if table already has a clustered index
-                with self.db_connection.engine.connect() as conn:
-                    result = conn.execute(text(f"""
-                        SELECT COUNT(*) 
-                        FROM sys.indexes 
-                        WHERE object_id = OBJECT_ID('{table_name}') 
-                        AND is_primary_key = 1
-                    """))
-                    has_primary_key = result.scalar() > 0
-                
-                if not has_primary_key:
-                    # Check if clustered index already exists
-                    with self.db_connection.engine.connect() as conn:
-                        result = conn.execute(text(f"""
-                            SELECT COUNT(*) 
-                            FROM sys.indexes 
-                            WHERE object_id = OBJECT_ID('{table_name}') 
-                            AND name = 'IX_{table_name}_TimeString_Clustered'
-                        """))
-                        if result.scalar() == 0:
-                            # Create clustered index for physical ordering
-                            conn.execute(text(f"""
-                                CREATE CLUSTERED INDEX IX_{table_name}_TimeString_Clustered 
-                                ON [{table_name}] (TimeString)
-                            """))
-                            print(f"✅ Created clustered index on {table_name}.TimeString")
-                        else:
-                            print(f"✅ Clustered index already exists on {table_name}.TimeString")
-                else:
-                    print(f"⚠️ {table_name} has primary key, skipping clustered index")
-                
-                results[table_name] = True
-                
-            except SQLAlchemyError as e:
-                print(f"❌ Error ensuring ordering for {table_name}: {e}")
-                results[table_name] = False
+        # Check if clustered index already exists
+        index_name = f"IX_{table_name}_TimeString_Clustered"
+        if (table_name, index_name) in existing:
+            print(f"✅ Clustered index already exists on {table_name}.TimeString")
+            return True
         
-        return results
\ No newline at end of file
+        try:
+            with conn.begin():
+                # Create clustered index for physical ordering
+                conn.exec_driver_sql(f"""
+                    CREATE CLUSTERED INDEX {self._quote(index_name)} 
+                    ON {self._quote(table_name)} (TimeString)
+                    {self.get_index_options()}
+                """)
+                print(f"✅ Created clustered index on {table_name}.TimeString")
+            return True
+            
+        except SQLAlchemyError as e:
+            print(f"❌ Error ensuring ordering for {table_name}: {e}")
+            return False
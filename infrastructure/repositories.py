@@ -1,5 +1,5 @@
 # infrastructure/repositories.py
-from typing import List, Optional
+from typing import List, Optional, FrozenSet
 import pandas as pd
 from core.models import DatabaseConfig
 from core.interfaces import IDatabaseRepository
@@ -7,21 +7,40 @@ from core.interfaces import IDatabaseRepository
 class DatabaseRepository(IDatabaseRepository):
     def __init__(self, db_connection):
         self.db_connection = db_connection
+        # Membership set from the latest TimeString table listing, for the fast checks
+        self._timestring_tables: Optional[FrozenSet[str]] = None
+    
+    def invalidate(self):
+        """Forget cached table metadata, e.g. after connecting to another database"""
+        self._timestring_tables = None
     
     def get_available_tables(self) -> List[str]:
         return self.db_connection.get_tables()
     
     def get_tables_with_timestring(self) -> List[str]:
-        """Get only tables that have a TimeString column"""
-        return self.db_connection.get_tables_with_timestring()
+        """Get only tables that have a TimeString column (always re-listed, so new or migrated tables show up)"""
+        tables = self.db_connection.get_tables_with_timestring()
+        # An empty list may just be a failed query; keep the previous set then
+        if tables:
+            self._timestring_tables = frozenset(tables)
+        return tables
+    
+    def fetch_table_data(self, table_name: str, sort: bool = False) -> Optional[pd.DataFrame]:
+        return self.db_connection.read_table(table_name, order_by_timestring=sort)
+    
+    def fetch_columns(self, table_name: str, columns: List[str],
+                      float_columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        return self.db_connection.read_columns(table_name, columns, float_columns)
     
-    def fetch_table_data(self, table_name: str) -> Optional[pd.DataFrame]:
-        return self.db_connection.read_table(table_name)
+    def fetch_table_preview(self, table_name: str, limit: int = 50, sort: bool = True) -> Optional[pd.DataFrame]:
+        return self.db_connection.read_table_preview(table_name, limit, order_by_timestring=sort)
     
-    def save_lotedata(self, df: pd.DataFrame, table_name: str = 'LOTEDATA') -> bool:
-        return self.db_connection.create_lotedata_table(df, table_name)
+    def save_lotedata(self, df: pd.DataFrame, table_name: str = 'LOTEDATA', if_exists: str = 'replace') -> bool:
+        return self.db_connection.create_lotedata_table(df, table_name, if_exists)
     
     def check_table_has_timestring_fast(self, table_name: str) -> bool:
         """Fast check if table has TimeString column without loading data"""
-        tables_with_timestring = self.get_tables_with_timestring()
-        return table_name in tables_with_timestring
\ No newline at end of file
+        if self._timestring_tables is not None:
+            return table_name in self._timestring_tables
+        # Cold cache: probe this one table rather than listing all of them
+        return self.db_connection.table_has_timestring(table_name)
\ No newline at end of file
@@ -1,4 +1,5 @@
 # infrastructure/table_service.py
+import numpy as np
 import pandas as pd
 from typing import Optional, Dict
 from core.cycle_analyzer import CycleAnalyzer
@@ -16,25 +17,27 @@ class TableService(ITableService):
             if df is None or df.empty or time_column not in df.columns:
                 return None
             
-            df = df.copy()
-            
-            # Convert to datetime if needed
-            if not pd.api.types.is_datetime64_any_dtype(df[time_column]):
-                df[time_column] = pd.to_datetime(df[time_column], dayfirst=True, errors='coerce')
-            
-            # Remove milliseconds
-            df[time_column] = df[time_column].dt.strftime('%Y-%m-%d %H:%M:%S')
-            df[time_column] = pd.to_datetime(df[time_column], errors='coerce')
+            # assign builds a new frame around the converted column only; the
+            # other columns are shared with df rather than copied
+            times = self._parse_to_seconds(df[time_column])
             
             # Remove rows with invalid dates
-            valid_mask = df[time_column].notna()
-            df = df[valid_mask].copy()
+            valid_mask = times.notna()
+            if not valid_mask.all():
+                df, times = df[valid_mask], times[valid_mask]
             
-            return df
+            return df.assign(**{time_column: times})
             
         except Exception as e:
             print(f"Error converting {time_column} to datetime: {e}")
             return None
+    def _parse_to_seconds(self, values: pd.Series) -> pd.Series:
+        """Parse a time column (unless it already is datetime64) and drop milliseconds"""
+        # Explicit format first, other layouts as fallback
+        if not pd.api.types.is_datetime64_any_dtype(values):
+            values = self.analyzer.parse_time_string(values)
+        return values.dt.floor('s')
+    
     def sort_table_by_timestring(self, df: pd.DataFrame, time_column: str = "TimeString") -> Optional[pd.DataFrame]:
         """
         Sort DataFrame by TimeString column in ascending order with datetime conversion
@@ -43,17 +46,22 @@ class TableService(ITableService):
             if df is None or df.empty or time_column not in df.columns:
                 return None
             
-            # First convert to datetime
-            df = self.convert_timestring_to_datetime(df, time_column)
-            if df is None:
-                return None
+            # Convert, drop invalid rows and sort in one gather: the stable argsort
+            # runs on the raw datetime64 buffer of the valid rows only
+            times = self._parse_to_seconds(df[time_column]).to_numpy(dtype='datetime64[ns]')
             
-            # Sort by the datetime column
-            df = df.sort_values(time_column, ascending=True)
+            # Tables read with ORDER BY TimeString arrive sorted: one linear check
+            # then skips the argsort and the row gather
+            if not np.isnat(times).any() and np.all(times[1:] >= times[:-1]):
+                df = df.reset_index(drop=True)
+                df[time_column] = times
+                return df
             
-            # Reset index after sorting
-            df = df.reset_index(drop=True)
+            valid_positions = np.flatnonzero(~np.isnat(times))
+            order = valid_positions[np.argsort(times[valid_positions], kind='stable')]
             
+            df = df.iloc[order].reset_index(drop=True)
+            df[time_column] = times[order]
             return df
             
         except Exception as e:
@@ -92,15 +100,19 @@ class TableService(ITableService):
         }
         
         if df is not None and not df.empty and time_column in df.columns:
-            # Check if already datetime
-            if pd.api.types.is_datetime64_any_dtype(df[time_column]):
-                result['success'] = True
-                result['converted_type'] = 'datetime64[ns]'
-                result['valid_count'] = len(df)
-                result['date_range'] = f"{df[time_column].min()} to {df[time_column].max()}"
+            # Already datetime: report from the column itself instead of reparsing it
+            values = df[time_column]
+            if pd.api.types.is_datetime64_any_dtype(values):
+                valid_count = int(values.notna().sum())
+                result['success'] = valid_count > 0
+                result['converted_type'] = str(values.dtype)
+                result['valid_count'] = valid_count
+                result['invalid_count'] = len(values) - valid_count
+                if valid_count > 0:
+                    result['date_range'] = f"{values.min()} to {values.max()}"
             else:
                 # Try conversion
-                converted = pd.to_datetime(df[time_column], dayfirst=True, errors='coerce')
+                converted = self.analyzer.parse_time_string(values)
                 valid_mask = converted.notna()
                 
                 result['valid_count'] = valid_mask.sum()
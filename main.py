@@ -1,8 +1,11 @@
 # main.py
 import tkinter as tk
+from tkinter import messagebox
+from concurrent.futures import ThreadPoolExecutor
 from app.welcome_window import WelcomeWindow
 from app.main_window import MainWindow
 from app.results_window import ResultsWindow
+from app.recovery_dialog import RecoveryDialog
 from infrastructure.db_service import DatabaseService
 from infrastructure.database import DatabaseConnection
 from infrastructure.repositories import DatabaseRepository
@@ -38,7 +41,10 @@ class ProductionCycleAnalyzerApp:
     def on_database_connect(self, db_config: DatabaseConfig, analysis_config: AnalysisConfig, should_migrate: bool) -> bool:
         success = self.db_service.connect_to_database(db_config)
         if success:
-            if should_migrate:
+            if should_migrate and not self.db_service.needs_migration():
+                print("✅ All TimeString columns are already DATETIME and indexed, skipping migration")
+                analysis_config.trust_schema = True
+            elif should_migrate:
                 migration_results = self.db_service.migrate_database_schema()
                 successful_migrations = sum(1 for result in migration_results.get('migration', {}).values() if result)
                 total_tables = len(migration_results.get('migration', {}))
@@ -47,6 +53,10 @@ class ProductionCycleAnalyzerApp:
                     print(f"✅ Successfully migrated {successful_migrations}/{total_tables} tables")
                 else:
                     print("⚠️ No migrations were performed")
+                
+                # Every TimeString is DATETIME now, so unconvertible values are NULL
+                # and clean columns can skip the analyzer's dropna
+                analysis_config.trust_schema = total_tables > 0 and successful_migrations == total_tables
 
             # 👉 Run FactSamples ETL
             print("⚙️ NOT Running FactSamples ETL yet...")
@@ -61,26 +71,31 @@ class ProductionCycleAnalyzerApp:
         main.show()
     
     def on_analyze_tables(self, table_data):
-        # Ask user for recovery strategy
-        print("\n🔄 Choose TimeString recovery strategy:")
-        print("1. Auto (recommended) - Let system choose best approach")
-        print("2. Interpolate - Simple time-based interpolation")
-        print("3. Reconstruct - Smart pattern-based reconstruction")
-        print("4. Pattern - Advanced pattern detection")
-        print("5. None - Skip recovery (original behavior)")
+        # A single worker keeps analysis runs serialized: AnalysisService holds
+        # per-run state, so a re-dispatch must wait for the prefetch to finish
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis")
+        
+        # Most runs keep the default strategy, so start it while the user decides
+        prefetch = executor.submit(self.analysis_service.analyze_tables, table_data, "auto")
         
-        choice = input("Enter choice (1-5, default=1): ").strip()
-        strategies = {"1": "auto", "2": "interpolate", "3": "reconstruct", "4": "pattern", "5": "none"}
-        strategy = strategies.get(choice, "auto")
+        def start_analysis(strategy):
+            if strategy == "auto":
+                print("🔧 Using auto recovery strategy...")
+                return prefetch
+            # Drop the prefetch if it hasn't started yet; otherwise its result is discarded
+            prefetch.cancel()
+            if strategy == "none":
+                print("⏭️ Skipping data recovery...")
+            else:
+                print(f"🔧 Using {strategy} recovery strategy...")
+            return executor.submit(self.analysis_service.analyze_tables, table_data, strategy)
         
-        if strategy == "none":
-            print("⏭️ Skipping data recovery...")
-            analysis_results = self.analysis_service.analyze_tables(table_data, "none")
-        else:
-            print(f"🔧 Using {strategy} recovery strategy...")
-            analysis_results = self.analysis_service.analyze_tables(table_data, strategy)
+        def on_done(analysis_results):
+            executor.shutdown(wait=False)
+            self.show_results_window(analysis_results)
         
-        self.show_results_window(analysis_results)
+        dialog = RecoveryDialog(start_analysis, on_done)
+        dialog.show()
     
     def show_results_window(self, analysis_results):
         results = ResultsWindow(self.analysis_service, self.db_service, self.on_complete)
@@ -89,8 +104,7 @@ class ProductionCycleAnalyzerApp:
     def on_complete(self):
         print("Analysis completed successfully!")
         # Option to restart or exit
-        restart = input("Would you like to restart? (y/n): ")
-        if restart.lower() == 'y':
+        if messagebox.askyesno("Analysis Complete", "Would you like to restart?"):
             self.run()
 
 if __name__ == "__main__":
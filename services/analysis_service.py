@@ -1,188 +1,317 @@
 # services/analysis_service.py
 from core.cycle_analyzer import CycleAnalyzer
-from core.models import TableResult, AnalysisConfig
+from core.models import AnalysisConfig, AnalysisContext
 import pandas as pd
 import numpy as np  # Add this import
-from datetime import datetime, timedelta  # Add this import
-from typing import Dict
-from infrastructure.database import DatabaseConnection
+from typing import Dict, List, Tuple, Optional, TYPE_CHECKING
 from services.timestring_recovery_service import TimeStringRecoveryService
 #from services.format_preservation_service import FormatPreservationService
-import json
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+if TYPE_CHECKING:
+    # Only named in annotations: importing it would load SQLAlchemy with this module
+    from infrastructure.database import DatabaseConnection
+
+
+def _scatter_cycle_ids(lo: np.ndarray, hi: np.ndarray, ids: np.ndarray, n_rows: int) -> np.ndarray:
+    """Row-level CycleIDs: rows lo[k]:hi[k] get ids[k], all others 0"""
+    out = np.zeros(n_rows, dtype=np.int32)
+    for k in range(lo.shape[0]):
+        out[lo[k]:hi[k]] = ids[k]
+    return out
+
+
+if njit is not None:
+    _scatter_cycle_ids = njit(cache=True, boundscheck=False)(_scatter_cycle_ids)
 
 class AnalysisService:
-    def __init__(self, config: AnalysisConfig):
+    def __init__(self, config: AnalysisConfig, verbose: bool = True):
         self.config = config
+        # When False the time-matching report leaves out statistics and per-row mismatches
+        self.verbose = verbose
         self.analyzer = CycleAnalyzer(
             time_threshold_minutes=self.config.time_threshold_minutes,
-            expected_frequency_minutes=self.config.expected_frequency_minutes
+            expected_frequency_minutes=self.config.expected_frequency_minutes,
+            trust_schema=self.config.trust_schema
         )
         self.recovery_service = TimeStringRecoveryService() 
         self.analysis_results = {}
         self.time_matched = False
+        # (table, id(frame)) -> (parsed series, row order, sorted times) for the LOTE generators
+        self._sorted_cache = {}
     
     def analyze_tables(self, table_data: dict, recovery_strategy: str = "auto", 
                   generate_events: bool = True, db_connection=None) -> dict:
         self.analysis_results = {}
+        self._sorted_cache = {}
+        # Parsed columns are reused only within this run, so edits made to the
+        # frames between runs are never answered from a stale parse
+        self.analyzer.reset_parse_cache()
         
         # First, analyze and recover TimeString data if needed
         recovered_table_data = {}
         recovery_reports = {}
         
-        for table_name, df in table_data.items():
-            if self.config.time_column in df.columns:
-                # Analyze TimeString quality
-                quality_report = self.recovery_service.analyze_timestring_quality(df, self.config.time_column)
-                
-                print(f"\n📊 TimeString Quality Report for {table_name}:")
-                print(f"   Total rows: {quality_report['total_rows']}")
-                print(f"   Valid timestamps: {quality_report['valid_count']} ({quality_report['valid_count']/quality_report['total_rows']*100:.1f}%)")
-                print(f"   Invalid timestamps: {quality_report['invalid_count']} ({quality_report['invalid_count']/quality_report['total_rows']*100:.1f}%)")
-                print(f"   Null values: {quality_report['null_count']} ({quality_report['null_count']/quality_report['total_rows']*100:.1f}%)")
-                print(f"   Data loss potential: {quality_report['data_loss_percentage']:.1f}%")
-                
-                # Recover data if needed
-                if quality_report['data_loss_percentage'] > 0:
-                    print(f"   🚨 Data recovery needed! Using {recovery_strategy} strategy...")
-                    
-                    recovery_result = self.recovery_service.recover_timestrings(
-                        df, self.config.time_column, recovery_strategy
-                    )
-                    
-                    if recovery_result["success"]:
-                        recovered_table_data[table_name] = recovery_result["recovered_df"]
-                        recovery_reports[table_name] = recovery_result["recovery_report"]
-                        
-                        print(f"   ✅ Recovered {recovery_result['recovery_report']['total_recovered']} timestamps")
-                        print(f"   📈 Average confidence: {recovery_result['recovery_report']['average_confidence']:.2f}")
-                        
-                        # Show recovery details for first few items
-                        if recovery_result['recovery_report']['recovery_details']:
-                            print(f"   🔍 Sample recoveries:")
-                            for detail in recovery_result['recovery_report']['recovery_details'][:3]:
-                                print(f"      Row {detail['index']}: '{detail['original_value']}' → '{detail['recovered_value']}' (confidence: {detail['confidence']:.2f})")
-                    else:
-                        print(f"   ⚠️ Recovery failed: {recovery_result['message']}")
-                        recovered_table_data[table_name] = df
-                else:
-                    print(f"   ✅ No recovery needed - all timestamps are valid!")
-                    recovered_table_data[table_name] = df
-            else:
-                recovered_table_data[table_name] = df
+        # Quality checks and recoveries are independent per table, so they run
+        # side by side; each table's report is printed in table order afterwards
+        tables = list(table_data.items())
+        def prepare(item):
+            return self._recover_table(item[0], item[1], recovery_strategy)
+        
+        if len(tables) < 2:
+            prepared = [prepare(item) for item in tables]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(tables), os.cpu_count() or 1)) as executor:
+                prepared = list(executor.map(prepare, tables))
+        
+        for (table_name, _), (recovered_df, recovery_report, report_text) in zip(tables, prepared):
+            sys.stdout.write(report_text)
+            recovered_table_data[table_name] = recovered_df
+            if recovery_report is not None:
+                recovery_reports[table_name] = recovery_report
         
         # Use recovered data for analysis
         table_data = recovered_table_data
         
+        # Recovered timestamps are written where the NULLs were, which breaks the
+        # SQL ordering the analyzer would otherwise rely on
+        self.analyzer.trust_schema = self.config.trust_schema and not recovery_reports
+        
         # ⭐⭐⭐ ENSURE CLEAN TIMESTRING FORMAT (NO MILLISECONDS) ⭐⭐⭐
         for table_name, df in table_data.items():
             if self.config.time_column in df.columns:
                 # Remove milliseconds if present in datetime columns
                 if pd.api.types.is_datetime64_any_dtype(df[self.config.time_column]):
-                    # Remove milliseconds by converting to string and back
-                    df[self.config.time_column] = df[self.config.time_column].dt.strftime('%Y-%m-%d %H:%M:%S')
-                    df[self.config.time_column] = pd.to_datetime(df[self.config.time_column], errors='coerce')
+                    # Remove milliseconds by flooring the datetime64 buffer (no string round-trip)
+                    df[self.config.time_column] = df[self.config.time_column].dt.floor('s')
         
         # Enhanced time matching with debugging
-        time_matched, debug_info = self.analyzer.check_time_matching(table_data, self.config.time_column)
+        # One context per run so each table's timestamps are parsed once
+        analysis_context = AnalysisContext(raw=table_data, time_column=self.config.time_column)
+        # Per-row mismatch strings are only built when the report will show them
+        detail_level = 'detail' if self.verbose else 'summary'
+        time_matched, debug_info = self.analyzer.check_time_matching_ctx(analysis_context, detail_level=detail_level)
         self.time_matched = time_matched
         
-        # Print detailed debug information
-        print("\n" + "="*80)
-        print("TIME STRING MATCHING ANALYSIS - DETAILED REPORT")
-        print("="*80)
+        # Print detailed debug information: the report is collected in a buffer
+        # and written once, instead of one console write per line
+        report = io.StringIO()
+        print("\n" + "="*80, file=report)
+        print("TIME STRING MATCHING ANALYSIS - DETAILED REPORT", file=report)
+        print("="*80, file=report)
         
-        print(f"\nTables analyzed: {len(debug_info.get('tables_checked', []))}")
+        print(f"\nTables analyzed: {len(debug_info.get('tables_checked', []))}", file=report)
         for table_info in debug_info.get('tables_checked', []):
             status = "✅" if table_info['status'] == 'ok' else "❌"
-            print(f"{status} {table_info['table']}: {table_info.get('reason', 'OK')}")
+            print(f"{status} {table_info['table']}: {table_info.get('reason', 'OK')}", file=report)
             if 'count' in table_info:
-                print(f"   Rows: {table_info['count']}, Range: {table_info.get('time_range', 'N/A')}")
+                print(f"   Rows: {table_info['count']}, Range: {table_info.get('time_range', 'N/A')}", file=report)
         
         if debug_info.get('reference_table'):
-            print(f"\n📊 Reference table: {debug_info['reference_table']}")
-            print(f"   Rows: {debug_info['reference_count']}")
-            print(f"   Time range: {debug_info['reference_range']}")
-        
-        # Print detailed comparison results
-        for table_name, comparison in debug_info.get('summary', {}).items():
-            print(f"\n🔍 Comparing {debug_info['reference_table']} vs {table_name}:")
-            
-            if comparison['matches']:
-                print("   ✅ Perfect match!")
-            else:
-                print("   ❌ Mismatches found:")
+            print(f"\n📊 Reference table: {debug_info['reference_table']}", file=report)
+            print(f"   Rows: {debug_info['reference_count']}", file=report)
+            print(f"   Time range: {debug_info['reference_range']}", file=report)
+        
+        # Print detailed comparison results; on a full match there are no
+        # mismatch details to walk, so the matched tables share one line
+        if time_matched:
+            compared = list(debug_info.get('summary', {}))
+            if compared:
+                print(f"\n🔍 Comparing {debug_info['reference_table']} vs {', '.join(compared)}: ✅ Perfect match!", file=report)
+        else:
+            for table_name, comparison in debug_info.get('summary', {}).items():
+                print(f"\n🔍 Comparing {debug_info['reference_table']} vs {table_name}:", file=report)
+                
+                if comparison['matches']:
+                    print("   ✅ Perfect match!", file=report)
+                    continue
+                
+                print("   ❌ Mismatches found:", file=report)
                 for reason in comparison.get('reasons', []):
-                    print(f"      - {reason}")
+                    print(f"      - {reason}", file=report)
                 
                 # Print statistics
                 stats = comparison.get('stats', {})
-                if stats:
-                    print(f"\n   📈 Statistics:")
+                if stats and self.verbose:
+                    print(f"\n   📈 Statistics:", file=report)
                     for stat_name, stat_value in stats.items():
                         if isinstance(stat_value, float):
-                            print(f"      {stat_name}: {stat_value:.6f}")
+                            print(f"      {stat_name}: {stat_value:.6f}", file=report)
                         else:
-                            print(f"      {stat_name}: {stat_value}")
+                            print(f"      {stat_name}: {stat_value}", file=report)
                 
                 # Show first few mismatches with details
                 mismatches = comparison.get('mismatch_details', [])
                 if mismatches:
-                    print(f"\n   🚫 First 10 row mismatches (showing {min(10, len(mismatches))} of {len(mismatches)}):")
+                    total_mismatches = stats.get('mismatch_count', len(mismatches))
+                    print(f"\n   🚫 First 10 row mismatches (showing {min(10, len(mismatches))} of {total_mismatches}):", file=report)
                     for i, mismatch in enumerate(mismatches[:10]):
-                        print(f"      Row {mismatch['row_index'] + 1}:")
-                        print(f"        Reference: {mismatch['reference_str']}")
-                        print(f"        Test:      {mismatch['test_str']}")
-                        print(f"        Difference: {mismatch['difference_seconds']:.6f} seconds")
+                        print(f"      Row {mismatch['row_index'] + 1}:", file=report)
+                        print(f"        Reference: {mismatch['reference_str']}", file=report)
+                        print(f"        Test:      {mismatch['test_str']}", file=report)
+                        print(f"        Difference: {mismatch['difference_seconds']:.6f} seconds", file=report)
                         
                         # Show human-readable difference
                         if mismatch['difference_seconds'] > 60:
                             mins = mismatch['difference_seconds'] / 60
-                            print(f"        ({mins:.1f} minutes)")
+                            print(f"        ({mins:.1f} minutes)", file=report)
                         elif mismatch['difference_seconds'] > 1:
-                            print(f"        ({mismatch['difference_seconds']:.1f} seconds)")
+                            print(f"        ({mismatch['difference_seconds']:.1f} seconds)", file=report)
                         else:
                             ms = mismatch['difference_seconds'] * 1000
-                            print(f"        ({ms:.1f} milliseconds)")
+                            print(f"        ({ms:.1f} milliseconds)", file=report)
                         
                         if i < 9:  # Add separator except for last item
-                            print("      " + "-" * 50)
+                            print("      " + "-" * 50, file=report)
         
         if debug_info.get('mismatch_reasons'):
-            print(f"\n❌ OVERALL MISMATCH REASONS:")
+            print(f"\n❌ OVERALL MISMATCH REASONS:", file=report)
             for reason in debug_info['mismatch_reasons']:
-                print(f"   - {reason}")
+                print(f"   - {reason}", file=report)
         else:
-            print(f"\n✅ All tables have matching time sequences!")
-        
-        print(f"\n🎯 Overall time matching: {'✅ YES' if time_matched else '❌ NO'}")
-        print("="*80 + "\n")
-        
-        # Continue with individual table analysis
-        for table_name, df in table_data.items():
-            try:
-                result = self.analyzer.analyze_table(table_name, df, self.config.time_column)
-                result.time_matched = time_matched
-                self.analysis_results[table_name] = result
-                
-                if result.error_message:
-                    print(f"Warning analyzing {table_name}: {result.error_message}")
-                else:
-                    print(f"Analyzed {table_name}: {result.total_cycles} cycles found")
-                    
-            except Exception as e:
-                error_result = TableResult(
-                    table_name=table_name,
-                    cycles=[],
-                    total_cycles=0,
-                    error_message=f"Unexpected error: {str(e)}"
-                )
-                self.analysis_results[table_name] = error_result
-                print(f"Error analyzing table {table_name}: {e}")
+            print(f"\n✅ All tables have matching time sequences!", file=report)
+        
+        print(f"\n🎯 Overall time matching: {'✅ YES' if time_matched else '❌ NO'}", file=report)
+        print("="*80 + "\n", file=report)
+        sys.stdout.write(report.getvalue())
+        
+        # Continue with individual table analysis (tables are analyzed concurrently;
+        # analyze_table reports its own failures through error_message)
+        table_results = self.analyzer.analyze_tables(table_data, self.config.time_column)
+        for table_name, result in table_results.items():
+            result.time_matched = time_matched
+            self.analysis_results[table_name] = result
+            
+            if result.error_message:
+                print(f"Warning analyzing {table_name}: {result.error_message}")
+            else:
+                print(f"Analyzed {table_name}: {result.total_cycles} cycles found")
         if generate_events and db_connection:
             self.generate_cycle_events(table_data, db_connection)
     
         return self.analysis_results
     
+    def _recover_table(self, table_name: str, df: pd.DataFrame,
+                       recovery_strategy: str) -> Tuple[pd.DataFrame, Optional[dict], str]:
+        """Check one table's TimeString quality and recover it if needed; returns (df, report, printed text)"""
+        out = io.StringIO()
+        recovered_df, recovery_report = df, None
+        if self.config.time_column not in df.columns:
+            return recovered_df, recovery_report, ""
+        
+        # Analyze TimeString quality (datetime64 columns without NaT are answered from the dtype)
+        quality_report = self.recovery_service.analyze_timestring_quality(df, self.config.time_column)
+        
+        print(f"\n📊 TimeString Quality Report for {table_name}:", file=out)
+        total_rows = quality_report['total_rows']
+        print(f"   Total rows: {total_rows}", file=out)
+        print(f"   Valid timestamps: {quality_report['valid_count']} ({quality_report['valid_count']/total_rows*100:.1f}%)", file=out)
+        print(f"   Invalid timestamps: {quality_report['invalid_count']} ({quality_report['invalid_count']/total_rows*100:.1f}%)", file=out)
+        print(f"   Null values: {quality_report['null_count']} ({quality_report['null_count']/total_rows*100:.1f}%)", file=out)
+        print(f"   Data loss potential: {quality_report['data_loss_percentage']:.1f}%", file=out)
+        
+        # Recover data if needed
+        if quality_report['data_loss_percentage'] > 0:
+            print(f"   🚨 Data recovery needed! Using {recovery_strategy} strategy...", file=out)
+            
+            recovery_result = self.recovery_service.recover_timestrings(
+                df, self.config.time_column, recovery_strategy
+            )
+            
+            if recovery_result["success"]:
+                recovered_df = recovery_result["recovered_df"]
+                recovery_report = recovery_result["recovery_report"]
+                
+                print(f"   ✅ Recovered {recovery_result['recovery_report']['total_recovered']} timestamps", file=out)
+                print(f"   📈 Average confidence: {recovery_result['recovery_report']['average_confidence']:.2f}", file=out)
+                
+                # Show recovery details for first few items
+                if recovery_result['recovery_report']['recovery_details']:
+                    print(f"   🔍 Sample recoveries:", file=out)
+                    for detail in recovery_result['recovery_report']['recovery_details'][:3]:
+                        print(f"      Row {detail['index']}: '{detail['original_value']}' → '{detail['recovered_value']}' (confidence: {detail['confidence']:.2f})", file=out)
+            else:
+                print(f"   ⚠️ Recovery failed: {recovery_result['message']}", file=out)
+        else:
+            print(f"   ✅ No recovery needed - all timestamps are valid!", file=out)
+        
+        return recovered_df, recovery_report, out.getvalue()
+    
+    def _sorted_time_view(self, table_name: str, df: pd.DataFrame) -> Tuple[np.ndarray, pd.Series]:
+        """Positions of df's rows with a valid timestamp in time order, and those timestamps"""
+        # The analyzer hands back the same parsed Series while df's column is
+        # unchanged, so that identity tells whether the cached order still holds
+        parsed = self.analyzer.parse_column(df, self.config.time_column)
+        key = (table_name, id(df))
+        cached = self._sorted_cache.get(key)
+        if cached is not None and cached[0] is parsed:
+            return cached[1], cached[2]
+        
+        valid_positions = np.flatnonzero(parsed.notna().to_numpy())
+        order = valid_positions[np.argsort(parsed.to_numpy()[valid_positions], kind='stable')]
+        time_series = parsed.iloc[order]
+        self._sorted_cache[key] = (parsed, order, time_series)
+        return order, time_series
+    
+    @staticmethod
+    def _cycle_ids_for(sorted_times: pd.Series, cycles) -> np.ndarray:
+        """CycleID for each row of an ascending time series (0 where no cycle covers it)"""
+        times_ns = sorted_times.to_numpy(dtype='datetime64[ns]').view('i8')
+        # Sorted rows make every cycle one contiguous slice: find its bounds
+        # with a binary search instead of scanning all rows once per cycle
+        lo = np.searchsorted(times_ns, cycles.start_times.view('i8'), side='left')
+        hi = np.searchsorted(times_ns, cycles.end_times.view('i8'), side='right')
+        
+        if njit is not None:
+            # Compiled slice stores: no interpreter overhead per cycle
+            return _scatter_cycle_ids(lo, hi, cycles.cycle_ids, len(times_ns))
+        
+        # Cycle IDs are small sequential counters: int32 halves the column's memory
+        cycle_ids = np.zeros(len(times_ns), dtype=np.int32)
+        for start, end, cycle_id in zip(lo.tolist(), hi.tolist(), cycles.cycle_ids.tolist()):
+            cycle_ids[start:end] = cycle_id
+        return cycle_ids
+    
+    def _build_lote_data(self, reference_table_name: str, reference_df: pd.DataFrame,
+                         columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Reference rows with a valid timestamp in time order (only `columns` if given), plus their CycleID"""
+        result = self.analysis_results[reference_table_name]
+        # Valid rows in time order (parsed and sorted once per reference frame)
+        order, time_series = self._sorted_time_view(reference_table_name, reference_df)
+        source_df = reference_df if columns is None else reference_df[columns]
+        # One gather of the selected columns, with CycleID added; the gathered
+        # labels are scattered, so the result gets a fresh RangeIndex
+        lote_df = source_df.iloc[order].assign(CycleID=self._cycle_ids_for(time_series, result.cycles))
+        return lote_df.reset_index(drop=True)
+    
+    @staticmethod
+    def _build_lote_summary(cycles) -> pd.DataFrame:
+        """One LOTE summary row per cycle: CycleID, StartTime, EndTime, TotalTime, SamplesCount"""
+        # Calculate total time in hh:mm:ss format, one array operation per field
+        total_seconds = (cycles.durations * 60).astype(np.int64)
+        hours = np.char.zfill((total_seconds // 3600).astype(str), 2)
+        minutes = np.char.zfill((total_seconds % 3600 // 60).astype(str), 2)
+        seconds = np.char.zfill((total_seconds % 60).astype(str), 2)
+        total_times = np.char.add(np.char.add(np.char.add(hours, ':'), np.char.add(minutes, ':')), seconds)
+        
+        # Start/end strings come from one vectorized strftime per column; the
+        # typed cycle arrays are wrapped as-is (copy-on-write keeps them safe)
+        return pd.DataFrame({
+            'CycleID': cycles.cycle_ids,
+            'StartTime': pd.DatetimeIndex(cycles.start_times).strftime('%d/%m/%Y %H:%M:%S').to_numpy(),
+            'EndTime': pd.DatetimeIndex(cycles.end_times).strftime('%d/%m/%Y %H:%M:%S').to_numpy(),
+            'TotalTime': total_times.astype(object),
+            'SamplesCount': cycles.sample_counts
+        }, copy=False)
+    
     def generate_lotedata_summary(self, reference_table_name: str) -> pd.DataFrame:
         """
         Generate LOTEDATA table with cycle summary information
@@ -200,23 +329,7 @@ class AnalysisService:
             raise ValueError("No cycles found in reference table")
         
         # Create summary DataFrame
-        summary_data = []
-        for cycle in result.cycles:
-            # Calculate total time in hh:mm:ss format
-            total_seconds = int(cycle.duration_minutes * 60)
-            hours, remainder = divmod(total_seconds, 3600)
-            minutes, seconds = divmod(remainder, 60)
-            total_time = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-            
-            summary_data.append({
-                'CycleID': cycle.cycle_id,
-                'StartTime': cycle.start_time.strftime('%d/%m/%Y %H:%M:%S'),
-                'EndTime': cycle.end_time.strftime('%d/%m/%Y %H:%M:%S'),
-                'TotalTime': total_time,
-                'SamplesCount': cycle.sample_count
-            })
-        
-        return pd.DataFrame(summary_data)
+        return self._build_lote_summary(result.cycles)
     
     def generate_lotedata_detailed(self, reference_table_name: str, reference_df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -230,30 +343,8 @@ class AnalysisService:
         if result.error_message:
             raise ValueError(f"Cannot generate LOTEDATA: {result.error_message}")
         
-        lotedata_df = reference_df.copy()
-        
-        # Add LoteID column
-        lotedata_df['CycleID'] = 0
-        
-        # Parse TimeString to datetime for comparison
-        time_series = self.analyzer.parse_time_string(lotedata_df[self.config.time_column])
-        
-        # Remove rows with invalid dates
-        valid_mask = time_series.notna()
-        time_series = time_series[valid_mask]
-        lotedata_df = lotedata_df[valid_mask]
-        
-        # Sort by datetime
-        sorted_indices = time_series.sort_values().index
-        time_series = time_series.loc[sorted_indices]
-        lotedata_df = lotedata_df.loc[sorted_indices]
-        
-        # Assign CycleID based on cycles
-        for cycle in result.cycles:
-            mask = (time_series >= cycle.start_time) & (time_series <= cycle.end_time)
-            lotedata_df.loc[mask, 'CycleID'] = cycle.cycle_id
-        
-        return lotedata_df[[self.config.time_column, 'CycleID']]
+        # Only the time column is gathered; the rest of the frame is never copied
+        return self._build_lote_data(reference_table_name, reference_df, [self.config.time_column])
     
     def generate_lotedata_detailed_mapping(self, reference_table_name: str, reference_df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -268,29 +359,8 @@ class AnalysisService:
         if result.error_message:
             raise ValueError(f"Cannot generate LOTE_DATA: {result.error_message}")
         
-        # Create a copy of the reference dataframe
-        lotedata_df = reference_df.copy()
-        
-        # Add CycleID column (will replace VarValue)
-        lotedata_df['CycleID'] = 0
-        
-        # Parse TimeString to datetime for comparison
-        time_series = self.analyzer.parse_time_string(lotedata_df[self.config.time_column])
-        
-        # Remove rows with invalid dates
-        valid_mask = time_series.notna()
-        time_series = time_series[valid_mask]
-        lotedata_df = lotedata_df[valid_mask]
-        
-        # Sort by datetime
-        sorted_indices = time_series.sort_values().index
-        time_series = time_series.loc[sorted_indices]
-        lotedata_df = lotedata_df.loc[sorted_indices]
-        
-        # Assign CycleID based on cycles
-        for cycle in result.cycles:
-            mask = (time_series >= cycle.start_time) & (time_series <= cycle.end_time)
-            lotedata_df.loc[mask, 'CycleID'] = cycle.cycle_id
+        # CycleID is added to the reference rows and will replace VarValue
+        lotedata_df = self._build_lote_data(reference_table_name, reference_df)
         
         # Replace VarValue with CycleID if VarValue column exists
         if 'VarValue' in lotedata_df.columns:
@@ -298,6 +368,23 @@ class AnalysisService:
         
         return lotedata_df
     
+    def get_results_dataframe(self) -> pd.DataFrame:
+        """
+        Get one row per analyzed table with its first cycle start and last cycle end
+        Columns: table, total_cycles, time_matched, error_message, first_start, last_end
+        """
+        results = self.analysis_results
+        return pd.DataFrame({
+            'table': list(results.keys()),
+            'total_cycles': [result.total_cycles for result in results.values()],
+            'time_matched': [result.time_matched for result in results.values()],
+            'error_message': [result.error_message for result in results.values()],
+            'first_start': pd.to_datetime([result.cycles.start_times[0] if result.cycles else None
+                                           for result in results.values()]),
+            'last_end': pd.to_datetime([result.cycles.end_times[-1] if result.cycles else None
+                                        for result in results.values()])
+        }).astype({'table': object, 'total_cycles': 'int64', 'time_matched': bool, 'error_message': object})
+    
     def get_analysis_summary(self) -> dict:
         """Get a summary of the analysis results"""
         summary = {
@@ -351,54 +438,18 @@ class AnalysisService:
         print(f"DEBUG: Found {len(result.cycles)} cycles")
         
         # Generate LOTE_SUMMARY (summary table)
-        summary_data = []
-        for cycle in result.cycles:
-            # Calculate total time in hh:mm:ss format
-            total_seconds = int(cycle.duration_minutes * 60)
-            hours, remainder = divmod(total_seconds, 3600)
-            minutes, seconds = divmod(remainder, 60)
-            total_time = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-            
-            summary_data.append({
-                'CycleID': cycle.cycle_id,
-                'StartTime': cycle.start_time.strftime('%d/%m/%Y %H:%M:%S'),
-                'EndTime': cycle.end_time.strftime('%d/%m/%Y %H:%M:%S'),
-                'TotalTime': total_time,
-                'SamplesCount': cycle.sample_count
-            })
-        
-        lote_summary_df = pd.DataFrame(summary_data)
+        lote_summary_df = self._build_lote_summary(result.cycles)
         print(f"DEBUG: LOTE_SUMMARY shape: {lote_summary_df.shape}")
         
         # Generate LOTE_DATA (detailed table with CycleID mapping)
-        lote_data_df = reference_df.copy()
-        
-        # Add CycleID column
-        lote_data_df['CycleID'] = 0
-        
-        # Parse TimeString to datetime for comparison
-        time_series = self.analyzer.parse_time_string(lote_data_df[self.config.time_column])
-        
-        # Remove rows with invalid dates
-        valid_mask = time_series.notna()
-        time_series = time_series[valid_mask]
-        lote_data_df = lote_data_df[valid_mask]
-        
-        # Sort by datetime
-        sorted_indices = time_series.sort_values().index
-        time_series = time_series.loc[sorted_indices]
-        lote_data_df = lote_data_df.loc[sorted_indices]
-        
-        # Assign CycleID based on cycles
-        for cycle in result.cycles:
-            mask = (time_series >= cycle.start_time) & (time_series <= cycle.end_time)
-            lote_data_df.loc[mask, 'CycleID'] = cycle.cycle_id
-        
-        # Remove VarValue column if it exists
-        if 'VarValue' in lote_data_df.columns:
-            lote_data_df = lote_data_df.drop(columns=['VarValue'])
+        # Remove VarValue column if it exists, before the rows are gathered
+        columns = None
+        if 'VarValue' in reference_df.columns:
+            columns = [col for col in reference_df.columns if col != 'VarValue']
             print("✅ Removed VarValue column from LOTE_DATA table")
         
+        lote_data_df = self._build_lote_data(reference_table_name, reference_df, columns)
+        
         print(f"DEBUG: LOTE_DATA shape: {lote_data_df.shape}")
         print(f"DEBUG: LOTE_DATA columns: {list(lote_data_df.columns)}")
         
@@ -421,18 +472,13 @@ class AnalysisService:
         if not result.cycles:
             raise ValueError("No cycles found in reference table")
 
-        df = reference_df.copy()
-        time_series = self.analyzer.parse_time_string(df[self.config.time_column])
-        valid_mask = time_series.notna()
-        df = df[valid_mask]
-        time_series = time_series[valid_mask].sort_values().reset_index(drop=True)
-        df = df.loc[time_series.index]
+        # Valid rows in time order: one gather, positionally aligned with time_series
+        order, time_series = self._sorted_time_view(reference_table_name, reference_df)
+        df = reference_df.iloc[order].reset_index(drop=True)
+        time_series = time_series.reset_index(drop=True)
 
-        # Assign CycleID from cycles
-        df['CycleID'] = 0
-        for cycle in result.cycles:
-            mask = (time_series >= cycle.start_time) & (time_series <= cycle.end_time)
-            df.loc[mask, 'CycleID'] = cycle.cycle_id
+        # Assign CycleID from the cycles' columnar start/end arrays
+        df['CycleID'] = self._cycle_ids_for(time_series, result.cycles)
 
         # Compute Δt in minutes
         df['Duration_min'] = time_series.diff().shift(-1).dt.total_seconds().div(60)
@@ -1,15 +1,72 @@
+import numpy as np
 import pandas as pd
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 from datetime import datetime
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+from core.cycle_analyzer import CycleAnalyzer
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _covering_cycles(times_ns: np.ndarray, starts_ns: np.ndarray, ends_ns: np.ndarray) -> np.ndarray:
+    """Index of the cycle covering each time (last start <= t and t <= its end), -1 if none"""
+    out = np.empty(times_ns.shape[0], dtype=np.int64)
+    n_cycles = starts_ns.shape[0]
+    for i in range(times_ns.shape[0]):
+        t = times_ns[i]
+        # Binary search for the first start after t
+        lo, hi = 0, n_cycles
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if starts_ns[mid] <= t:
+                lo = mid + 1
+            else:
+                hi = mid
+        k = lo - 1
+        out[i] = k if k >= 0 and t <= ends_ns[k] else -1
+    return out
+
+
+if njit is not None:
+    _covering_cycles = njit(cache=True, boundscheck=False)(_covering_cycles)
 
 class FactSamplesService:
-    def __init__(self, db_service, source_tables: Optional[List[str]] = None):
+    # Concurrent source-table fetches: one below the connection pool size
+    # (DatabaseConnection.POOL_SIZE, no overflow) so save_to_db on the
+    # coordinating thread always has a connection free
+    MAX_WORKERS = 7
+    # Candidate value columns in a source table, in order of preference
+    VALUE_COLUMNS = ['VarValue', 'Value', 'VALOR', 'Medicion']
+    # Secondary indexes on FactSamples: (index name, column)
+    FACT_INDEXES = [
+        ("IX_FactSamples_TimeString", "TimeString"),
+        ("IX_FactSamples_CycleID", "CycleID"),
+        ("IX_FactSamples_VariableName", "VariableName"),
+        ("IX_FactSamples_PartitionKey", "PartitionKey"),
+        ("IX_FactSamples_MachineName", "MachineName"),
+    ]
+    # Indexes are built once after the load, sorting in tempdb on all available CPUs
+    INDEX_OPTIONS = "WITH (SORT_IN_TEMPDB = ON, MAXDOP = 0)"
+    # Column names and types of the source and cycle tables, read in one round-trip
+    TABLE_COLUMNS_SQL = text("""
+        SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_NAME IN :tables
+    """).bindparams(bindparam('tables', expanding=True))
+
+    def __init__(self, db_service, source_tables: Optional[List[str]] = None,
+                 progress_callback: Optional[Callable[[int, int, str], None]] = None):
         """
         Initialize with your existing DatabaseService
         If source_tables is None, automatically discover ALL tables with TimeString
+        progress_callback(done, total, table_name) is called after each source table
         """
         self.db_service = db_service
+        self.progress_callback = progress_callback
         self.excluded_tables = {
            # "LOTE_SUMMARY",
             "FactSamples",
@@ -21,6 +78,10 @@ class FactSamplesService:
 
         self.lote_table = "LOTE_DATA"
         self.summary_table = "LOTE_SUMMARY"
+        # table -> {column: data type} for the source and cycle tables, read on first use
+        self._source_columns: Optional[Dict[str, Dict[str, str]]] = None
+        # table -> its value column (None if it has none), derived from the same schema read
+        self._value_columns: Optional[Dict[str, Optional[str]]] = None
         print(f"📊 Found {len(self.source_tables)} tables for FactSamples ETL")
 
     def _get_all_tables_with_timestring(self) -> List[str]:
@@ -68,16 +129,11 @@ class FactSamplesService:
         """Create necessary indexes for performance"""
         try:
             with self.db_service.connection.engine.connect() as conn:
-                indexes = [
-                    "CREATE INDEX IX_FactSamples_TimeString ON FactSamples(TimeString)",
-                    "CREATE INDEX IX_FactSamples_CycleID ON FactSamples(CycleID)",
-                    "CREATE INDEX IX_FactSamples_VariableName ON FactSamples(VariableName)",
-                    "CREATE INDEX IX_FactSamples_PartitionKey ON FactSamples(PartitionKey)",
-                    "CREATE INDEX IX_FactSamples_MachineName ON FactSamples(MachineName)"
-                ]
-                for index_sql in indexes:
+                for index_name, column in self.FACT_INDEXES:
+                    index_sql = f"CREATE INDEX {index_name} ON FactSamples({column}) {self.INDEX_OPTIONS}"
                     try:
-                        conn.execute(text(index_sql))
+                        with conn.begin():
+                            conn.exec_driver_sql(index_sql)
                         print(f"✅ Created index: {index_sql[:50]}...")
                     except Exception as index_error:
                         print(f"⚠️ Index may already exist: {index_error}")
@@ -86,22 +142,182 @@ class FactSamplesService:
             print(f"❌ Error creating indexes: {e}")
             return False
 
+    def drop_indexes(self) -> bool:
+        """Drop the secondary indexes so the load doesn't maintain them row by row"""
+        try:
+            with self.db_service.connection.engine.begin() as conn:
+                for index_name, _ in self.FACT_INDEXES:
+                    conn.exec_driver_sql(f"""
+                        IF EXISTS (SELECT 1 FROM sys.indexes
+                                   WHERE name = N'{index_name}' AND object_id = OBJECT_ID(N'FactSamples'))
+                            DROP INDEX {index_name} ON FactSamples
+                    """)
+            print("✅ Dropped FactSamples indexes for the load")
+            return True
+        except Exception as e:
+            print(f"❌ Error dropping indexes: {e}")
+            return False
+
+    def _quote(self, name: str) -> str:
+        """Dialect-quoted identifier, e.g. [My]]Table] on SQL Server"""
+        return self.db_service.connection.engine.dialect.identifier_preparer.quote_identifier(name)
+
+    @staticmethod
+    def _literal(value: str) -> str:
+        """N'...' string literal for table names written as VariableName/MachineName"""
+        return "N'" + value.replace("'", "''") + "'"
+
+    def _get_table_columns(self, conn, tables: List[str]) -> Dict[str, Dict[str, str]]:
+        """table -> {column: data type} for the given tables"""
+        columns = {}
+        for table_name, column_name, data_type in conn.execute(self.TABLE_COLUMNS_SQL, {"tables": tables}):
+            columns.setdefault(table_name, {})[column_name] = data_type.lower()
+        return columns
+
+    def _get_source_columns(self) -> Dict[str, Dict[str, str]]:
+        """Column names and types of every source and cycle table, from one schema query per service"""
+        if self._source_columns is None:
+            with self.db_service.connection.engine.connect() as conn:
+                self._source_columns = self._get_table_columns(
+                    conn, self.source_tables + [self.lote_table, self.summary_table])
+        return self._source_columns
+
+    def _value_column(self, table_name: str) -> Optional[str]:
+        """The source table's value column, looked up in a map built once from the schema"""
+        if self._value_columns is None:
+            self._value_columns = {
+                table: next((col for col in self.VALUE_COLUMNS if col in table_columns), None)
+                for table, table_columns in self._get_source_columns().items()
+            }
+        return self._value_columns.get(table_name)
+
+    @staticmethod
+    def _as_datetime(column: str, data_type: Optional[str]) -> str:
+        """SQL expression reading a time column as DATETIME (dd/mm/yyyy text is converted)"""
+        if data_type == 'datetime':
+            return column
+        return f"TRY_CONVERT(DATETIME, {column}, 103)"
+
+    def _insert_sql(self, table_name: str, table_columns: Dict[str, str],
+                    has_lote: bool, has_summary: bool) -> Optional[str]:
+        """INSERT...SELECT copying one source table into FactSamples, or None if it has no usable columns"""
+        value_col = next((col for col in self.VALUE_COLUMNS if col in table_columns), None)
+        if 'TimeString' not in table_columns or not value_col:
+            return None
+
+        # Exact LOTE_DATA match first, then the LOTE_SUMMARY cycle covering the
+        # sample: the last one starting at or before it, if it has not ended yet.
+        # Both are index seeks into the staged temp tables, as in the pandas path
+        cycle_id = "NULL"
+        joins = ""
+        if has_lote:
+            joins += """
+            OUTER APPLY (
+                SELECT TOP 1 l.CycleID FROM #FactLote AS l
+                WHERE l.TimeString = s.TimeString
+            ) AS l"""
+            cycle_id = "l.CycleID"
+        if has_summary:
+            joins += """
+            OUTER APPLY (
+                SELECT TOP 1 c.CycleID, c.EndTime FROM #FactCycles AS c
+                WHERE c.StartTime <= s.TimeString
+                ORDER BY c.StartTime DESC
+            ) AS c"""
+            covering = "CASE WHEN s.TimeString <= c.EndTime THEN c.CycleID END"
+            cycle_id = f"COALESCE({cycle_id}, {covering})" if has_lote else covering
+
+        name = self._literal(table_name)
+        return f"""
+            INSERT INTO FactSamples (TimeString, VariableName, Value, CycleID, MachineName)
+            SELECT DATEADD(MILLISECOND, -DATEPART(MILLISECOND, s.TimeString), s.TimeString),
+                   {name}, TRY_CAST(s.Value AS FLOAT), {cycle_id}, {name}
+            FROM (
+                SELECT {self._as_datetime('TimeString', table_columns['TimeString'])} AS TimeString,
+                       {self._quote(value_col)} AS Value
+                FROM {self._quote(table_name)}
+            ) AS s{joins}
+            WHERE s.TimeString IS NOT NULL
+        """
+
+    def load_server_side(self) -> Optional[int]:
+        """
+        Fill FactSamples with INSERT...SELECT from every source table, so no
+        rows pass through pandas. Returns the rows inserted, or None on failure
+        """
+        cycle_tables = [self.lote_table, self.summary_table]
+        try:
+            with self.db_service.connection.engine.begin() as conn:
+                columns = self._get_table_columns(conn, self.source_tables + cycle_tables)
+                lote_columns = columns.get(self.lote_table, {})
+                summary_columns = columns.get(self.summary_table, {})
+                lote_time_type = lote_columns['TimeString'] if {'TimeString', 'CycleID'} <= lote_columns.keys() else None
+                has_summary = {'CycleID', 'StartTime', 'EndTime'} <= summary_columns.keys()
+
+                # The cycle tables store their times as text: convert them once into
+                # indexed temp tables, so each sample's lookup is a seek, not a scan
+                if lote_time_type is not None:
+                    conn.exec_driver_sql(f"""
+                        SELECT {self._as_datetime('TimeString', lote_time_type)} AS TimeString, CycleID
+                        INTO #FactLote
+                        FROM {self._quote(self.lote_table)}
+                    """)
+                    conn.exec_driver_sql("CREATE CLUSTERED INDEX IX_FactLote_TimeString ON #FactLote (TimeString)")
+                if has_summary:
+                    conn.exec_driver_sql(f"""
+                        SELECT CycleID,
+                               {self._as_datetime('StartTime', summary_columns['StartTime'])} AS StartTime,
+                               {self._as_datetime('EndTime', summary_columns['EndTime'])} AS EndTime
+                        INTO #FactCycles
+                        FROM {self._quote(self.summary_table)}
+                    """)
+                    conn.exec_driver_sql("CREATE CLUSTERED INDEX IX_FactCycles_StartTime ON #FactCycles (StartTime)")
+
+                conn.exec_driver_sql("TRUNCATE TABLE FactSamples")
+
+                total_rows = 0
+                total = len(self.source_tables)
+                for done, table_name in enumerate(self.source_tables, start=1):
+                    insert_sql = self._insert_sql(table_name, columns.get(table_name, {}),
+                                                  lote_time_type is not None, has_summary)
+                    if insert_sql is None:
+                        print(f"⚠️  Skipping {table_name} - missing TimeString or value column")
+                    else:
+                        result = conn.exec_driver_sql(insert_sql)
+                        total_rows += max(result.rowcount, 0)
+                        print(f"✅ Loaded {table_name}: {result.rowcount} rows")
+                    if self.progress_callback:
+                        self.progress_callback(done, total, table_name)
+
+                if lote_time_type is not None:
+                    conn.exec_driver_sql("DROP TABLE #FactLote")
+                if has_summary:
+                    conn.exec_driver_sql("DROP TABLE #FactCycles")
+                return total_rows
+        except Exception as e:
+            print(f"❌ Error loading FactSamples server-side: {e}")
+            return None
+
     def load_cycles(self) -> tuple:
         """Load cycle mapping tables"""
         try:
-            lote_df = self.db_service.fetch_table_data(self.lote_table)
-            if lote_df is not None and 'TimeString' in lote_df.columns and 'CycleID' in lote_df.columns:
-                lote_df = lote_df[['TimeString', 'CycleID']].copy()
-                lote_df['TimeString'] = pd.to_datetime(lote_df['TimeString'], errors='coerce')
+            # Only the mapping columns are fetched; DATETIME columns arrive typed
+            # and parse_time_string hands them back without re-parsing
+            columns = self._get_source_columns()
+            lote_df = None
+            if {'TimeString', 'CycleID'} <= columns.get(self.lote_table, {}).keys():
+                lote_df = self.db_service.fetch_table_columns(self.lote_table, ['TimeString', 'CycleID'])
+            if lote_df is not None:
                 lote_df = lote_df.dropna(subset=['TimeString'])
             else:
                 lote_df = pd.DataFrame(columns=['TimeString', 'CycleID'])
 
-            summary_df = self.db_service.fetch_table_data(self.summary_table)
-            if summary_df is not None and all(col in summary_df.columns for col in ['CycleID', 'StartTime', 'EndTime']):
-                summary_df = summary_df[['CycleID', 'StartTime', 'EndTime']].copy()
-                summary_df['StartTime'] = pd.to_datetime(summary_df['StartTime'], errors='coerce')
-                summary_df['EndTime'] = pd.to_datetime(summary_df['EndTime'], errors='coerce')
+            summary_df = None
+            if {'CycleID', 'StartTime', 'EndTime'} <= columns.get(self.summary_table, {}).keys():
+                summary_df = self.db_service.fetch_table_columns(self.summary_table, ['CycleID', 'StartTime', 'EndTime'])
+            if summary_df is not None:
+                summary_df['StartTime'] = CycleAnalyzer.parse_time_string(summary_df['StartTime'])
+                summary_df['EndTime'] = CycleAnalyzer.parse_time_string(summary_df['EndTime'])
                 summary_df = summary_df.dropna(subset=['StartTime', 'EndTime'])
             else:
                 summary_df = pd.DataFrame(columns=['CycleID', 'StartTime', 'EndTime'])
@@ -109,84 +325,146 @@ class FactSamplesService:
             return lote_df, summary_df
         except Exception as e:
             print(f"❌ Error loading cycle data: {e}")
-            return pd.DataFrame(), pd.DataFrame()
+            return (pd.DataFrame(columns=['TimeString', 'CycleID']),
+                    pd.DataFrame(columns=['CycleID', 'StartTime', 'EndTime']))
 
-    def process_table(self, table_name: str, lote_df: pd.DataFrame, summary_df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    @staticmethod
+    def _cycle_lookup(lote_df: pd.DataFrame, summary_df: pd.DataFrame) -> tuple:
+        """
+        Sorted arrays for the CycleID lookups, built once per run and shared by every table:
+        (lote times, lote ids, cycle starts, cycle ends, cycle ids)
+        """
+        lote_values = lote_df['TimeString'].to_numpy(dtype='datetime64[ns]')
+        by_time = np.argsort(lote_values, kind='stable')
+        lote_ids = lote_df['CycleID'].to_numpy(dtype='float64', na_value=np.nan)[by_time]
+
+        start_values = summary_df['StartTime'].to_numpy(dtype='datetime64[ns]')
+        by_start = np.argsort(start_values, kind='stable')
+        ends = summary_df['EndTime'].to_numpy(dtype='datetime64[ns]')[by_start]
+        cycle_ids = summary_df['CycleID'].to_numpy(dtype='float64', na_value=np.nan)[by_start]
+        return lote_values[by_time], lote_ids, start_values[by_start], ends, cycle_ids
+
+    def process_table(self, table_name: str, cycle_lookup: tuple) -> Optional[pd.DataFrame]:
         """Process a single table into fact samples format"""
         try:
             print(f"📊 Processing {table_name}...")
-            df = self.db_service.fetch_table_data(table_name)
-            if df is None or df.empty or 'TimeString' not in df.columns:
-                print(f"⚠️  Skipping {table_name} - no data or missing TimeString")
+            # Pick the value column from the schema, then fetch just the two columns
+            # needed, with the value already cast to FLOAT by SQL Server
+            value_col = self._value_column(table_name)
+            if 'TimeString' not in self._get_source_columns().get(table_name, {}) or not value_col:
+                print(f"⚠️  Skipping {table_name} - missing TimeString or value column")
+                return None
+
+            df = self.db_service.fetch_table_columns(table_name, ['TimeString', value_col],
+                                                     float_columns=[value_col])
+            if df is None or df.empty:
+                print(f"⚠️  Skipping {table_name} - no data")
                 return None
 
             result_df = df[['TimeString']].copy()
-            result_df['TimeString'] = pd.to_datetime(result_df['TimeString'], errors='coerce')
+            result_df['TimeString'] = CycleAnalyzer.parse_time_string(result_df['TimeString'])
             result_df = result_df.dropna(subset=['TimeString'])
 
             if result_df.empty:
                 return None
 
-            value_col = next((col for col in ['VarValue', 'Value', 'VALOR', 'Medicion'] if col in df.columns), None)
-            if not value_col:
-                return None
-
+            # Already float64 unless every value was NULL (then an object column of None)
             result_df['Value'] = df[value_col].astype(float)
-            result_df['VariableName'] = table_name
-            result_df['MachineName'] = table_name
+            # One category and int8 codes instead of a string pointer per row
+            names = pd.Categorical.from_codes(np.zeros(len(result_df), dtype=np.int8), categories=[table_name])
+            result_df['VariableName'] = names
+            result_df['MachineName'] = names
 
-            if not lote_df.empty:
-                result_df = result_df.merge(lote_df, on='TimeString', how='left')
-            else:
-                result_df['CycleID'] = None
-
-            missing_cycles = result_df[result_df['CycleID'].isna()]
-            if not missing_cycles.empty and not summary_df.empty:
-                summary_sorted = summary_df.sort_values('StartTime')
-                missing_sorted = missing_cycles.sort_values('TimeString')
-                merged = pd.merge_asof(
-                    missing_sorted, summary_sorted,
-                    left_on='TimeString', right_on='StartTime',
-                    direction='forward'
-                )
-                valid_cycles = merged[
-                    (merged['TimeString'] >= merged['StartTime']) &
-                    (merged['TimeString'] <= merged['EndTime'])
-                ]
-                result_df.loc[valid_cycles.index, 'CycleID'] = valid_cycles['CycleID_y']
+            lote_times, lote_ids, starts, ends, cycle_ids = cycle_lookup
+            times = result_df['TimeString'].to_numpy(dtype='datetime64[ns]')
+            sample_cycles = np.full(len(times), np.nan)
+
+            if len(lote_times):
+                # Exact LOTE_DATA timestamp match, by binary search into the sorted times
+                pos = np.searchsorted(lote_times, times).clip(max=len(lote_times) - 1)
+                matched = lote_times[pos] == times
+                sample_cycles[matched] = lote_ids[pos[matched]]
+
+            missing = np.flatnonzero(np.isnan(sample_cycles))
+            if missing.size and len(starts):
+                # Binary-search each sample's cycle: the last one starting at or
+                # before it, provided the sample is not past that cycle's end
+                missing_times = times[missing]
+                if njit is not None:
+                    # Search and end check fused in one compiled pass over int64 views
+                    idx = _covering_cycles(missing_times.view('i8'), starts.view('i8'), ends.view('i8'))
+                    covered = idx >= 0
+                else:
+                    idx = np.searchsorted(starts, missing_times, side='right') - 1
+                    covered = (idx >= 0) & (missing_times <= ends[idx.clip(0)])
+                sample_cycles[missing[covered]] = cycle_ids[idx[covered]]
 
+            result_df['CycleID'] = sample_cycles
             return result_df[['TimeString', 'VariableName', 'Value', 'CycleID', 'MachineName']]
         except Exception as e:
             print(f"❌ Error processing {table_name}: {e}")
             return None
 
-    def process_all_tables(self) -> pd.DataFrame:
-        """Process all source tables and combine results"""
+    def process_all_tables(self) -> int:
+        """Process all source tables, appending each one to FactSamples as it finishes; returns rows saved"""
         print("🔄 Loading cycle mapping data...")
+        # This also reads the schema, before any worker thread needs it
         lote_df, summary_df = self.load_cycles()
+        # Sorted once here instead of re-sorted (and merged) inside every table
+        cycle_lookup = self._cycle_lookup(lote_df, summary_df)
 
-        all_results = []
-        for table_name in self.source_tables:
-            df = self.process_table(table_name, lote_df, summary_df)
-            if df is not None and not df.empty:
-                all_results.append(df)
+        # Each table is a blocking fetch, so several run at once. Finished tables
+        # are written and released straight away, so at most the in-flight
+        # tables are held in memory instead of every table's rows at once
+        saved_rows = 0
+        total = len(self.source_tables)
+        with ThreadPoolExecutor(max_workers=max(1, min(self.MAX_WORKERS, total))) as executor:
+            futures = {
+                executor.submit(self.process_table, table_name, cycle_lookup): table_name
+                for table_name in self.source_tables
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                table_name = futures[future]
+                result = future.result()
+                del futures[future]
+                if result is not None and not result.empty and self.save_to_db(result):
+                    saved_rows += len(result)
+                if self.progress_callback:
+                    self.progress_callback(done, total, table_name)
 
-        if all_results:
-            return pd.concat(all_results, ignore_index=True)
-        return pd.DataFrame()
+        return saved_rows
 
     def save_to_db(self, fact_samples: pd.DataFrame) -> bool:
-        """Save processed data to FactSamples table"""
+        """Append processed rows to the FactSamples table"""
         if fact_samples.empty:
             return False
         try:
-            fact_samples['TimeString'] = pd.to_datetime(fact_samples['TimeString']).dt.strftime('%Y-%m-%d %H:%M:%S')
-            fact_samples['TimeString'] = pd.to_datetime(fact_samples['TimeString'])
-            return self.db_service.save_lotedata(fact_samples, 'FactSamples')
+            # Drop sub-second precision on the datetime64 buffer (no string round-trip)
+            fact_samples['TimeString'] = CycleAnalyzer.parse_time_string(fact_samples['TimeString']).dt.floor('s')
+            # Appending keeps the schema from create_schema (identity key, PartitionKey)
+            return self.db_service.save_lotedata(fact_samples, 'FactSamples', if_exists='append')
         except Exception as e:
             print(f"❌ Error saving to database: {e}")
             return False
 
+    def _load(self) -> bool:
+        """Fill FactSamples, in SQL Server when possible, otherwise through pandas"""
+        loaded_rows = self.load_server_side()
+        if loaded_rows is None:
+            print("⚠️ Server-side load failed, falling back to pandas pipeline")
+            try:
+                with self.db_service.connection.engine.begin() as conn:
+                    conn.exec_driver_sql("TRUNCATE TABLE FactSamples")
+            except Exception as e:
+                print(f"❌ Error clearing FactSamples: {e}")
+                return False
+            loaded_rows = self.process_all_tables()
+        if loaded_rows == 0:
+            print("⚠️ No data processed, exiting")
+            return False
+        print(f"✅ Loaded {loaded_rows} rows into FactSamples")
+        return True
+
     def run(self) -> bool:
         """Complete ETL pipeline"""
         print("=" * 60)
@@ -195,14 +473,15 @@ class FactSamplesService:
 
         if not self.create_schema():
             return False
-        self.create_indexes()
 
-        fact_data = self.process_all_tables()
-        if fact_data.empty:
-            print("⚠️ No data processed, exiting")
-            return False
+        # Load into a table without secondary indexes, then build each one in a
+        # single sorted pass; they are rebuilt even if the load fails
+        self.drop_indexes()
+        try:
+            success = self._load()
+        finally:
+            self.create_indexes()
 
-        success = self.save_to_db(fact_data)
         print("=" * 60)
         print("🎉 FACT SAMPLES ETL COMPLETED SUCCESSFULLY!" if success else "❌ FACT SAMPLES ETL FAILED!")
         return success
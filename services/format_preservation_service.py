@@ -1,9 +1,11 @@
 # services/format_preservation_service.py
 import pandas as pd
-from datetime import datetime
-import re
 
 class FormatPreservationService:
+    TIME_FORMAT = '%d/%m/%Y %H:%M:%S'
+    # Values already in TIME_FORMAT are kept as they are
+    CANONICAL_PATTERN = r'\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2}'
+
     @staticmethod
     def ensure_timestring_format(df: pd.DataFrame, time_column: str = "TimeString") -> pd.DataFrame:
         """
@@ -11,29 +13,32 @@ class FormatPreservationService:
         """
         if time_column not in df.columns:
             return df
-        
+
         df = df.copy()
-        
-        # Handle different input formats
-        for i, value in enumerate(df[time_column]):
-            if pd.isna(value) or value == "":
-                continue
-                
-            # If already in correct format, keep it
-            if isinstance(value, str) and re.match(r'\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2}', value):
-                continue
-                
-            # If it's a datetime object, format it
-            if isinstance(value, (datetime, pd.Timestamp)):
-                df[time_column].iloc[i] = value.strftime('%d/%m/%Y %H:%M:%S')
-            else:
-                # Try to parse and reformat
-                try:
-                    parsed = pd.to_datetime(value, dayfirst=True, errors='coerce')
-                    if not pd.isna(parsed):
-                        df[time_column].iloc[i] = parsed.strftime('%d/%m/%Y %H:%M:%S')
-                except:
-                    pass
-        
+        values = df[time_column]
+
+        # A datetime64 column formats in one vectorized pass (NaT stays missing)
+        if pd.api.types.is_datetime64_any_dtype(values):
+            df[time_column] = values.dt.strftime(FormatPreservationService.TIME_FORMAT)
+            return df
+
+        # Only values that are neither missing/empty nor already canonical need parsing
+        try:
+            canonical = values.str.match(FormatPreservationService.CANONICAL_PATTERN)
+            canonical = canonical.fillna(False).astype(bool)
+        except AttributeError:
+            # No strings in the column at all
+            canonical = pd.Series(False, index=values.index)
+        to_parse = ~canonical & values.notna() & (values.astype(str) != "")
+        if not to_parse.any():
+            return df
+
+        # Mixed inputs (datetime objects and free-form strings) are parsed element by element
+        parsed = pd.to_datetime(values[to_parse], dayfirst=True, errors='coerce', format='mixed')
+        parsed = parsed[parsed.notna()]
+        if not parsed.empty:
+            formatted = values.astype(object)
+            formatted[parsed.index] = parsed.dt.strftime(FormatPreservationService.TIME_FORMAT)
+            df[time_column] = formatted
+
         return df
-    
\ No newline at end of file
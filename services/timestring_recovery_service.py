@@ -3,11 +3,70 @@ from unittest import result
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Optional, Tuple
 import re
+import calendar
+from collections import Counter
+from core.cycle_analyzer import CycleAnalyzer
+
+try:
+    import ciso8601
+except ImportError:
+    ciso8601 = None
+
+# Compiled once instead of looked up in re's cache on every _try_fix_common_issues call
+_TIME_OVERFLOW_RE = re.compile(r'(\d{1,2}/\d{1,2}/\d{4}) (\d{2}):(\d{2}):(\d{2})')
+_DATE_OVERFLOW_RE = re.compile(r'(\d{2})/(\d{2})/(\d{4})')
+# Every layout in common_date_patterns: date parts split by one '-' or '/', then H:M:S
+_GENERIC_TS_RE = re.compile(r'(\d{1,4})([-/])(\d{1,2})\2(\d{1,4}) (\d{1,2}):(\d{1,2}):(\d{1,2})')
+# Text values (after strip/lower) that count as missing timestamps
+_NULL_TOKENS = frozenset({'', 'null', 'none', 'nan', 'n/a', 'na'})
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _estimate_kernel(indices: np.ndarray, valid_indices: np.ndarray, times_ns: np.ndarray,
+                     tail_interval_ns: int, tail_confidence: float, n_rows: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Confidence and estimated int64 ns per missing row, in one pass (see _estimate_timestamps)"""
+    n_valid = valid_indices.shape[0]
+    confidences = np.empty(indices.shape[0], dtype=np.float64)
+    estimates = np.empty(indices.shape[0], dtype=np.int64)
+    minute_ns = 60 * 1_000_000_000
+    for k in range(indices.shape[0]):
+        index = indices[k]
+        pos = np.searchsorted(valid_indices, index)
+        if 0 < pos < n_valid:
+            prev_idx = valid_indices[pos - 1]
+            gap = valid_indices[pos] - prev_idx
+            position = (index - prev_idx) / gap
+            estimates[k] = times_ns[pos - 1] + np.int64((times_ns[pos] - times_ns[pos - 1]) * position)
+            confidences[k] = 0.9 - (0.2 * (gap - 1) / n_rows)
+        elif pos > 0:
+            estimates[k] = times_ns[pos - 1] + tail_interval_ns * (index - valid_indices[pos - 1])
+            confidences[k] = tail_confidence
+        else:
+            estimates[k] = times_ns[0] - minute_ns * (valid_indices[0] - index)
+            confidences[k] = 0.6
+    return confidences, estimates
+
+
+if njit is not None:
+    _estimate_kernel = njit(cache=True, boundscheck=False)(_estimate_kernel)
 
 class TimeStringRecoveryService:
+    # Distinct raw strings remembered by _parse_timestamp before the memo is reset
+    PARSE_CACHE_SIZE = 65536
+    # Leading non-null text values checked against common_date_patterns to pick the bulk format
+    FORMAT_SAMPLE_SIZE = 50
+    # Invalid rows reported individually in invalid_examples; all of them are still counted
+    MAX_INVALID_EXAMPLES = 100
+
     def __init__(self):
+        # raw string -> (parsed timestamp or None, issue); sensor logs repeat the same bad tokens
+        self._parse_cache: Dict[str, Tuple[Optional[datetime], str]] = {}
         self.common_date_patterns = [
             '%d/%m/%Y %H:%M:%S',    # 15/01/2024 10:30:45
             '%Y-%m-%d %H:%M:%S',    # 2024-01-15 10:30:45
@@ -23,6 +82,20 @@ class TimeStringRecoveryService:
         if time_column not in df.columns:
             return {"error": f"Column '{time_column}' not found"}
         
+        # A datetime64 column without NaT is valid row for row: no per-row classification needed
+        column = df[time_column]
+        if pd.api.types.is_datetime64_any_dtype(column) and not column.hasnans:
+            return {
+                "total_rows": len(df),
+                "valid_count": len(df),
+                "invalid_count": 0,
+                "null_count": 0,
+                "invalid_examples": [],
+                "date_range_valid": {"min": column.min(), "max": column.max()} if len(df) else None,
+                "common_issues": {},
+                "data_loss_percentage": 0.0
+            }
+        
         analysis = {
             "total_rows": len(df),
             "valid_count": 0,
@@ -34,25 +107,49 @@ class TimeStringRecoveryService:
             "data_loss_percentage": 0
         }
         
-        valid_timestamps = []
-        
-        for idx, value in enumerate(df[time_column]):
-            if self._is_null_value(value):
-                analysis["null_count"] += 1
-                analysis["invalid_examples"].append({
-                    "index": idx, "value": value, "issue": "null_value"
-                })
-                continue
-                
-            parsed, issue = self._parse_timestamp(value)
-            if parsed is not None and not pd.isna(parsed):
+        # One vectorized parse in the column's dominant layout; cache=True parses
+        # each distinct string once. Only the rows it rejects are classified one by one
+        parsed = self._parse_column(column)
+        fast_valid = parsed.notna().to_numpy()
+        analysis["valid_count"] = int(fast_valid.sum())
+        
+        valid_min = parsed.min() if analysis["valid_count"] else None
+        valid_max = parsed.max() if analysis["valid_count"] else None
+        valid_timestamps = [ts for ts in (valid_min, valid_max) if ts is not None]
+        
+        # Null-like values among the rejected rows are flagged in one vectorized pass
+        pending = np.flatnonzero(~fast_valid)
+        pending_values = column.iloc[pending]
+        tokens = pending_values.astype('string').str.strip().str.lower()
+        null_mask = (pending_values.isna() | tokens.isin(_NULL_TOKENS)).to_numpy(dtype=bool)
+        
+        values = pending_values.to_numpy(dtype=object)
+        analysis["null_count"] = int(null_mask.sum())
+        issue_counts = Counter({"null_value": analysis["null_count"]})
+        
+        # Issues are counted as rows are classified; only the first rows are kept as examples
+        examples = [
+            (idx, value, "null_value")
+            for idx, value in zip(pending[null_mask][:self.MAX_INVALID_EXAMPLES].tolist(),
+                                  values[null_mask][:self.MAX_INVALID_EXAMPLES])
+        ]
+        for idx, value in zip(pending[~null_mask].tolist(), values[~null_mask]):
+            parsed_value, issue = self._parse_timestamp(value)
+            if parsed_value is not None and not pd.isna(parsed_value):
                 analysis["valid_count"] += 1
-                valid_timestamps.append(parsed)
+                valid_timestamps.append(parsed_value)
             else:
                 analysis["invalid_count"] += 1
-                analysis["invalid_examples"].append({
-                    "index": idx, "value": value, "issue": issue
-                })
+                issue_counts[issue] += 1
+                if analysis["invalid_count"] <= self.MAX_INVALID_EXAMPLES:
+                    examples.append((idx, value, issue))
+        
+        # Null and unparseable examples in row order
+        examples.sort(key=lambda example: example[0])
+        analysis["invalid_examples"] = [
+            {"index": idx, "value": value, "issue": issue}
+            for idx, value, issue in examples[:self.MAX_INVALID_EXAMPLES]
+        ]
         
         # Calculate statistics
         if valid_timestamps:
@@ -61,29 +158,92 @@ class TimeStringRecoveryService:
                 "max": max(valid_timestamps)
             }
         
-        analysis["data_loss_percentage"] = (
-            (analysis["invalid_count"] + analysis["null_count"]) / 
-            analysis["total_rows"] * 100
-        )
+        if analysis["total_rows"]:
+            analysis["data_loss_percentage"] = (
+                (analysis["invalid_count"] + analysis["null_count"]) / 
+                analysis["total_rows"] * 100
+            )
         
         # Analyze patterns
-        analysis["common_issues"] = self._analyze_issue_patterns(analysis["invalid_examples"])
+        analysis["common_issues"] = self._analyze_issue_patterns(issue_counts)
         
         return analysis
     
+    def _detect_format(self, values: pd.Series) -> str:
+        """The common_date_patterns entry matching most of the first non-null text values"""
+        sample = values.head(self.FORMAT_SAMPLE_SIZE * 4).dropna().head(self.FORMAT_SAMPLE_SIZE)
+        sample = sample[sample.map(lambda value: isinstance(value, str))]
+        if sample.empty:
+            return CycleAnalyzer.TIME_FORMAT
+        
+        hits = {
+            pattern: int(pd.to_datetime(sample, format=pattern, errors='coerce').notna().sum())
+            for pattern in self.common_date_patterns
+        }
+        best = max(hits, key=hits.get)
+        return best if hits[best] else CycleAnalyzer.TIME_FORMAT
+    
+    def _parse_column(self, values: pd.Series) -> pd.Series:
+        """Bulk-parse a time column with an explicit format (NaT where it does not apply)"""
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values
+        if not (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)):
+            # Numeric columns have no text layout to detect
+            return pd.to_datetime(values, dayfirst=True, errors='coerce')
+        
+        fmt = self._detect_format(values)
+        try:
+            parsed = pd.to_datetime(values, format=fmt, errors='coerce', cache=True)
+            # Values written back by the recovery strategies use the canonical layout
+            unparsed = parsed.isna() & values.notna()
+            if fmt != CycleAnalyzer.TIME_FORMAT and unparsed.any():
+                parsed[unparsed] = pd.to_datetime(values[unparsed], format=CycleAnalyzer.TIME_FORMAT,
+                                                  errors='coerce', cache=True)
+                unparsed = parsed.isna() & values.notna()
+            # Valid values in any other layout (fractional seconds, ISO 'T', ...)
+            # must not be mistaken for bad ones, so they get the slower fallbacks
+            if unparsed.any():
+                parsed[unparsed] = CycleAnalyzer._parse_other_layouts(values[unparsed])
+            return parsed
+        except (TypeError, ValueError):
+            return pd.to_datetime(values, dayfirst=True, errors='coerce')
+    
     def _is_null_value(self, value) -> bool:
         """Check if value is null-like"""
         if pd.isna(value):
             return True
-        if isinstance(value, str) and value.strip().lower() in ['', 'null', 'none', 'nan', 'n/a', 'na']:
+        if isinstance(value, str) and value.strip().lower() in _NULL_TOKENS:
             return True
         return False
     
     def _parse_timestamp(self, value) -> Tuple[Optional[datetime], str]:
+        """Try to parse timestamp with multiple strategies (string results are memoized)"""
+        if not isinstance(value, str):
+            # Already-parsed values need no parsing at all (NaT still reports as null)
+            if isinstance(value, (datetime, np.datetime64)) and not pd.isna(value):
+                return pd.Timestamp(value), "valid"
+            return self._parse_timestamp_uncached(value)
+        
+        cached = self._parse_cache.get(value)
+        if cached is None:
+            cached = self._parse_timestamp_uncached(value)
+            if len(self._parse_cache) >= self.PARSE_CACHE_SIZE:
+                self._parse_cache.clear()
+            self._parse_cache[value] = cached
+        return cached
+    
+    def _parse_timestamp_uncached(self, value) -> Tuple[Optional[datetime], str]:
         """Try to parse timestamp with multiple strategies"""
         if pd.isna(value):
             return None, "null_value"
         
+        # ISO 8601 strings go through ciso8601's C parser when it is installed
+        if ciso8601 is not None and isinstance(value, str):
+            try:
+                return pd.Timestamp(ciso8601.parse_datetime_as_naive(value)), "valid"
+            except ValueError:
+                pass
+        
         # Try standard parsing first
         try:
             parsed = pd.to_datetime(value, dayfirst=True, errors='coerce')
@@ -92,13 +252,22 @@ class TimeStringRecoveryService:
         except:
             pass
         
-        # Try multiple date patterns
-        for pattern in self.common_date_patterns:
-            try:
-                parsed = datetime.strptime(str(value), pattern)
+        # Try the common date patterns: one regex match, then the field order
+        # is read off the year's position instead of trying strptime per pattern
+        text_value = str(value)
+        match = _GENERIC_TS_RE.fullmatch(text_value)
+        if match:
+            parsed = self._datetime_from_match(match)
+            if parsed is not None:
                 return parsed, "fixed_format"
-            except:
-                continue
+        else:
+            # Anything the regex does not cover (e.g. space-padded fields) keeps the strptime path
+            for pattern in self.common_date_patterns:
+                try:
+                    parsed = datetime.strptime(text_value, pattern)
+                    return parsed, "fixed_format"
+                except:
+                    continue
         
         # Try to fix common issues
         fixed_value, fix_type = self._try_fix_common_issues(value)
@@ -112,47 +281,73 @@ class TimeStringRecoveryService:
         
         return None, "unparseable"
     
+    @staticmethod
+    def _datetime_from_match(match: re.Match) -> Optional[datetime]:
+        """Build the datetime for a _GENERIC_TS_RE match, trying layouts in common_date_patterns order"""
+        first, separator, second, third, hour, minute, second_of_minute = match.groups()
+        time_parts = (int(hour), int(minute), int(second_of_minute))
+        
+        if len(first) == 4 and len(third) <= 2:
+            # %Y-%m-%d / %Y/%m/%d
+            candidates = [(int(first), int(second), int(third))]
+        elif len(third) == 4 and len(first) <= 2:
+            # Day first, then (for '/') the US month-first layout
+            candidates = [(int(third), int(second), int(first))]
+            if separator == '/':
+                candidates.append((int(third), int(first), int(second)))
+        else:
+            return None
+        
+        hour_int, minute_int, second_int = time_parts
+        if not (hour_int < 24 and minute_int < 60 and second_int < 60):
+            return None
+        for year, month, day in candidates:
+            if TimeStringRecoveryService._is_valid_date(year, month, day):
+                return datetime(year, month, day, *time_parts)
+        return None
+    
+    @staticmethod
+    def _is_valid_date(year: int, month: int, day: int) -> bool:
+        """Whether datetime(year, month, day) exists, checked without raising"""
+        return (1 <= year <= 9999 and 1 <= month <= 12
+                and 1 <= day <= calendar.monthrange(year, month)[1])
+    
     def _try_fix_common_issues(self, value: str) -> Tuple[str, str]:
         """Try to fix common timestamp issues"""
         original = str(value).strip()
         
         # Fix time overflow (25:00 -> 01:00 next day)
-        time_overflow_match = re.match(r'(\d{1,2}/\d{1,2}/\d{4}) (\d{2}):(\d{2}):(\d{2})', original)
+        time_overflow_match = _TIME_OVERFLOW_RE.match(original)
         if time_overflow_match:
             date_part, hour, minute, second = time_overflow_match.groups()
             hour_int = int(hour)
             if hour_int >= 24:
                 fixed_hour = hour_int % 24
                 days_to_add = hour_int // 24
-                try:
-                    base_date = datetime.strptime(date_part, '%d/%m/%Y')
-                    new_date = base_date + timedelta(days=days_to_add)
+                day_int, month_int, year_int = (int(part) for part in date_part.split('/'))
+                if (self._is_valid_date(year_int, month_int, day_int) and
+                        datetime(year_int, month_int, day_int).toordinal() + days_to_add <= datetime.max.toordinal()):
+                    new_date = datetime(year_int, month_int, day_int) + timedelta(days=days_to_add)
                     fixed_date = new_date.strftime('%d/%m/%Y')
                     return f"{fixed_date} {fixed_hour:02d}:{minute}:{second}", "time_overflow"
-                except:
-                    pass
         
         # Fix date overflow (32/01/2024 -> 31/01/2024)
-        date_overflow_match = re.match(r'(\d{2})/(\d{2})/(\d{4})', original)
+        date_overflow_match = _DATE_OVERFLOW_RE.match(original)
         if date_overflow_match:
             day, month, year = date_overflow_match.groups()
             day_int, month_int, year_int = int(day), int(month), int(year)
             
             # Check if day is invalid for month
-            try:
-                datetime(year_int, month_int, 1)  # Check if month is valid
-                days_in_month = (datetime(year_int, month_int % 12 + 1, 1) - 
-                               timedelta(days=1)).day
+            if 1 <= year_int <= 9999 and 1 <= month_int <= 12:
+                days_in_month = calendar.monthrange(year_int, month_int)[1]
                 if day_int > days_in_month:
                     fixed_day = days_in_month
                     return original.replace(day, str(fixed_day)), "date_overflow"
-            except:
-                pass
         
         return original, "unfixable"
     
-    def _analyze_issue_patterns(self, invalid_examples: List[Dict]) -> Dict:
-        """Analyze patterns in invalid timestamps"""
+    def _analyze_issue_patterns(self, issue_counts: Dict[str, int]) -> Dict:
+        """Analyze patterns in invalid timestamps (issue -> number of rows)"""
         patterns = {
             "null_values": 0,
             "wrong_format": 0,
@@ -162,12 +357,11 @@ class TimeStringRecoveryService:
             "unparseable": 0
         }
         
-        for example in invalid_examples:
-            issue = example.get("issue", "unparseable")
+        for issue, count in issue_counts.items():
             if issue in patterns:
-                patterns[issue] += 1
+                patterns[issue] += count
             else:
-                patterns["unparseable"] += 1
+                patterns["unparseable"] += count
         
         return patterns
     
@@ -195,8 +389,11 @@ class TimeStringRecoveryService:
             else:
                 strategy = "pattern"
         
-        # Create working copy
-        df_recovered = df.copy()
+        # Shallow working copy that shares every column but time_column, the only
+        # one edited; its own copy keeps the caller's frame unchanged on pandas
+        # versions without copy-on-write
+        df_recovered = df.copy(deep=False)
+        df_recovered[time_column] = df_recovered[time_column].copy()
         recovery_report = {
             "strategy_used": strategy,
             "total_recovered": 0,
@@ -205,14 +402,28 @@ class TimeStringRecoveryService:
         }
         
         # Convert to datetime for processing
-        datetime_series = pd.to_datetime(df_recovered[time_column], dayfirst=True, errors='coerce')
+        datetime_series = self._parse_column(df_recovered[time_column])
         valid_mask = datetime_series.notna()
         
         if strategy == "interpolate":
-            # Simple interpolation between valid values
-            datetime_series = datetime_series.interpolate(method='time')
+            # Linear interpolation by row position between the valid neighbours,
+            # over int64 nanoseconds (method='time' needs a DatetimeIndex). Gaps
+            # before the first or after the last valid value are left unfilled
+            valid_positions = np.flatnonzero(valid_mask.to_numpy())
+            if not valid_positions.size:
+                return {
+                    "success": False,
+                    "message": "No parseable timestamps to interpolate between",
+                    "analysis": analysis
+                }
+            inside = np.arange(valid_positions[0], valid_positions[-1] + 1)
+            valid_ns = datetime_series.to_numpy(dtype='datetime64[ns]')[valid_positions].view('i8')
+            filled = np.interp(inside, valid_positions, valid_ns).astype('i8').view('datetime64[ns]')
+            datetime_series = datetime_series.astype('datetime64[ns]')
+            datetime_series.iloc[valid_positions[0]:valid_positions[-1] + 1] = filled
             recovered_mask = datetime_series.notna() & ~valid_mask
-            df_recovered[time_column] = datetime_series.dt.strftime('%d/%m/%Y %H:%M:%S')
+            # Stays datetime64: the block below only has to drop the milliseconds
+            df_recovered[time_column] = datetime_series
             
             recovery_report["total_recovered"] = recovered_mask.sum()
             recovery_report["average_confidence"] = 0.85
@@ -221,23 +432,39 @@ class TimeStringRecoveryService:
             # More sophisticated reconstruction
             valid_indices = np.where(valid_mask)[0]
             valid_times = datetime_series[valid_mask].values
+            original_values = df[time_column].to_numpy(dtype=object)
             
-            for i in range(len(df_recovered)):
-                if not valid_mask.iloc[i]:
-                    confidence, estimated_time = self._estimate_timestamp(
-                        i, valid_indices, valid_times, strategy, df_recovered, time_column
-                    )
-                    
-                    if confidence >= confidence_threshold:
-                        df_recovered[time_column].iloc[i] = estimated_time.strftime('%d/%m/%Y %H:%M:%S')
-                        recovery_report["total_recovered"] += 1
-                        recovery_report["recovery_details"].append({
-                            "index": i,
-                            "original_value": str(df[time_column].iloc[i]),
-                            "recovered_value": estimated_time.strftime('%d/%m/%Y %H:%M:%S'),
-                            "confidence": confidence
-                        })
-                        recovery_report["confidence_scores"].append(confidence)
+            # All estimates in one vectorized pass, then keep the confident ones
+            invalid_positions = np.flatnonzero(~valid_mask.to_numpy())
+            confidences, estimates = self._estimate_timestamps(
+                invalid_positions, valid_indices, valid_times, strategy, len(df_recovered)
+            )
+            accepted = confidences >= confidence_threshold
+            recovered_positions = invalid_positions[accepted].tolist()
+            recovered_values = pd.DatetimeIndex(estimates[accepted]).strftime('%d/%m/%Y %H:%M:%S').tolist()
+            accepted_confidences = confidences[accepted].tolist()
+            
+            recovery_report["total_recovered"] = len(recovered_positions)
+            recovery_report["recovery_details"] = [
+                {
+                    "index": i,
+                    "original_value": str(original_values[i]),
+                    "recovered_value": recovered_value,
+                    "confidence": confidence
+                }
+                for i, recovered_value, confidence in zip(recovered_positions, recovered_values, accepted_confidences)
+            ]
+            recovery_report["confidence_scores"] = accepted_confidences
+            
+            if recovered_positions:
+                time_values = df_recovered[time_column]
+                if pd.api.types.is_datetime64_any_dtype(time_values):
+                    # A datetime column takes the estimates as timestamps, not strings
+                    recovered_values = pd.to_datetime(recovered_values, format='%d/%m/%Y %H:%M:%S')
+                else:
+                    time_values = time_values.astype(object)
+                time_values.iloc[recovered_positions] = recovered_values
+                df_recovered[time_column] = time_values
             
             if recovery_report["confidence_scores"]:
                 recovery_report["average_confidence"] = sum(recovery_report["confidence_scores"]) / len(recovery_report["confidence_scores"])
@@ -248,11 +475,10 @@ class TimeStringRecoveryService:
         # Ensure proper datetime type
         if not pd.api.types.is_datetime64_any_dtype(df_recovered[time_column]):
             # Convert string timestamps to datetime
-            df_recovered[time_column] = pd.to_datetime(df_recovered[time_column], dayfirst=True, errors='coerce')
+            df_recovered[time_column] = self._parse_column(df_recovered[time_column])
         
-        # Remove milliseconds by converting to string and back to datetime
-        df_recovered[time_column] = df_recovered[time_column].dt.strftime('%Y-%m-%d %H:%M:%S')
-        df_recovered[time_column] = pd.to_datetime(df_recovered[time_column], errors='coerce')
+        # Remove milliseconds on the datetime64 values themselves (no string round trip)
+        df_recovered[time_column] = df_recovered[time_column].dt.floor('s')
         
         return {
             "success": True,
@@ -261,64 +487,63 @@ class TimeStringRecoveryService:
             "recovery_report": recovery_report
         }
 
-    def _estimate_timestamp(self, index: int, valid_indices: np.array, valid_times: np.array,
-                          strategy: str, df: pd.DataFrame, time_column: str) -> Tuple[float, datetime]:
-        """Estimate a missing timestamp"""
-        # Find nearest valid timestamps
-        prev_valid_idx = valid_indices[valid_indices < index]
-        next_valid_idx = valid_indices[valid_indices > index]
-        
-        has_prev = len(prev_valid_idx) > 0
-        has_next = len(next_valid_idx) > 0
-        
-        if has_prev and has_next:
-            # Between two valid points - use interpolation
-            prev_idx = prev_valid_idx[-1]
-            next_idx = next_valid_idx[0]
-            
-            prev_time = pd.to_datetime(df[time_column].iloc[prev_idx], dayfirst=True)
-            next_time = pd.to_datetime(df[time_column].iloc[next_idx], dayfirst=True)
-            
-            # Calculate position between points
-            position = (index - prev_idx) / (next_idx - prev_idx)
-            time_diff = next_time - prev_time
-            estimated_time = prev_time + time_diff * position
-            
-            confidence = 0.9 - (0.2 * (next_idx - prev_idx - 1) / len(df))  # Confidence decreases with gap size
-            
-            return confidence, estimated_time
-            
-        elif has_prev:
-            # Only previous point available - use pattern if possible
-            prev_idx = prev_valid_idx[-1]
-            prev_time = pd.to_datetime(df[time_column].iloc[prev_idx], dayfirst=True)
-            
-            if strategy == "pattern" and len(prev_valid_idx) > 1:
-                # Calculate average interval from recent points
-                recent_intervals = []
-                for i in range(1, min(4, len(prev_valid_idx))):
-                    idx1, idx2 = prev_valid_idx[-i-1], prev_valid_idx[-i]
-                    time1 = pd.to_datetime(df[time_column].iloc[idx1], dayfirst=True)
-                    time2 = pd.to_datetime(df[time_column].iloc[idx2], dayfirst=True)
-                    recent_intervals.append((time2 - time1) / (idx2 - idx1))
-                
-                if recent_intervals:
-                    avg_interval = sum(recent_intervals, timedelta(0)) / len(recent_intervals)
-                    estimated_time = prev_time + avg_interval * (index - prev_idx)
-                    confidence = 0.7
-                    return confidence, estimated_time
-            
-            # Fallback: assume regular interval
-            estimated_time = prev_time + timedelta(minutes=1) * (index - prev_idx)
-            return 0.6, estimated_time
-            
-        elif has_next:
-            # Only next point available
-            next_idx = next_valid_idx[0]
-            next_time = pd.to_datetime(df[time_column].iloc[next_idx], dayfirst=True)
-            estimated_time = next_time - timedelta(minutes=1) * (next_idx - index)
-            return 0.6, estimated_time
-        
-        else:
+    def _estimate_timestamps(self, indices: np.ndarray, valid_indices: np.ndarray, valid_times: np.ndarray,
+                             strategy: str, n_rows: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Confidence and estimated datetime64[ns] for each missing row index, from its valid neighbours"""
+        confidences = np.full(len(indices), 0.3)
+        if len(valid_indices) == 0:
             # No reference points - use overall pattern (shouldn't happen with validation)
-            return 0.3, datetime.now()
\ No newline at end of file
+            return confidences, np.full(len(indices), np.datetime64(datetime.now(), 'ns'))
+        
+        times_ns = valid_times.astype('datetime64[ns]').view('i8')
+        minute_ns = 60 * 1_000_000_000
+        
+        # Rows after the last valid one all extend it by the same interval: the
+        # recent average for "pattern", otherwise one minute per row
+        last = len(valid_indices)
+        tail_interval_ns, tail_confidence = minute_ns, 0.6
+        if strategy == "pattern" and last > 1 and indices.size and indices[-1] > valid_indices[-1]:
+            recent = [
+                pd.Timedelta(int(times_ns[last - i] - times_ns[last - i - 1]), unit='ns')
+                / int(valid_indices[last - i] - valid_indices[last - i - 1])
+                for i in range(1, min(4, last))
+            ]
+            tail_interval_ns = (sum(recent, timedelta(0)) / len(recent)).value
+            tail_confidence = 0.7
+        
+        if njit is not None:
+            # Search, interpolation and scoring fused in one compiled loop
+            confidences, estimates = _estimate_kernel(
+                indices.astype(np.int64), valid_indices.astype(np.int64), times_ns,
+                tail_interval_ns, tail_confidence, n_rows
+            )
+            return confidences, estimates.view('datetime64[ns]')
+        
+        # valid_indices is ascending: one binary search per row finds its neighbours
+        pos = np.searchsorted(valid_indices, indices)
+        has_prev = pos > 0
+        has_next = pos < len(valid_indices)
+        prev_pos = np.maximum(pos - 1, 0)
+        next_pos = np.minimum(pos, len(valid_indices) - 1)
+        prev_idx, next_idx = valid_indices[prev_pos], valid_indices[next_pos]
+        prev_ns, next_ns = times_ns[prev_pos], times_ns[next_pos]
+        estimates = np.zeros(len(indices), dtype=np.int64)
+        
+        # Between two valid points - linear interpolation; confidence decreases with gap size
+        both = has_prev & has_next
+        gap = (next_idx - prev_idx)[both]
+        position = (indices[both] - prev_idx[both]) / gap
+        estimates[both] = prev_ns[both] + ((next_ns[both] - prev_ns[both]) * position).astype(np.int64)
+        confidences[both] = 0.9 - (0.2 * (gap - 1) / n_rows)
+        
+        # Only previous point available
+        only_prev = has_prev & ~has_next
+        estimates[only_prev] = prev_ns[only_prev] + tail_interval_ns * (indices[only_prev] - prev_idx[only_prev])
+        confidences[only_prev] = tail_confidence
+        
+        # Only next point available - one minute per row back from it
+        only_next = ~has_prev & has_next
+        estimates[only_next] = next_ns[only_next] - minute_ns * (next_idx[only_next] - indices[only_next])
+        confidences[only_next] = 0.6
+        
+        return confidences, estimates.view('datetime64[ns]')